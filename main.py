@@ -1,11 +1,18 @@
 import os
 import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from dataclasses import dataclass
-from stage.process import Preprocess
-from stage.clients import Cliente
-from stage.sizing_backup import Dimensionamiento
-from stage.optimization import Optimizador
-from utils.helpers import SimpleLogger
+from typing import Optional
+from utils.cache import CacheEtapas
+from utils.consumo import get_almacen_consumo
+from utils.eventos import RegistroEventos, emitir
+from utils.helpers import SimpleLogger, silenciar_consola
+from utils.memo import get_memo_demanda
+from utils.perf import MedidorRendimiento, exportar_json
+from utils.pgen import construir_matriz_pgen, get_almacen_pgen
+from utils.referencia import get_almacen
+from utils.reportes import DETALLE, SILENCIO, Reportes
+from utils.seleccion import IndiceEncuesta
 
 @dataclass
 class Config:
@@ -17,93 +24,747 @@ class Config:
     path_consumo_zona: str = r"data/PConsumoZone.xlsx"
     path_pgen_clientes: str = r"data/BBDD_Gen/"
     path_equipos: str = r"data/BBDD_Equipos.xlsx"
+    path_log: str = r"log_ejecucion.txt"
+    path_reporte_rendimiento: str = r"reporte_rendimiento.json"
+    path_cache: str = r".cache"
+    usar_cache: bool = True             # Reutiliza salidas de etapas cuyas entradas no cambiaron
+    max_workers: Optional[int] = None   # Procesos del modo lote (None = os.cpu_count())
+    tamano_bloque: int = 500            # Respuestas de la encuesta por bloque en modo lote
+    motor_demanda: bool = True          # Modo lote: demanda de cada bloque con MotorDemanda (vectorizado)
+    memo_demanda: bool = True           # Reutiliza la demanda de clientes con la misma firma (ver utils.memo)
+    capacidad_memo: int = 1024          # Perfiles guardados en memoria por proceso (LRU)
+    memo_disco: bool = False            # Guarda además los perfiles del memo en disco (requiere usar_cache)
+    resolucion_minutos: int = 60        # Demanda anual 12x24 (60) o 12x144 con picos reales de 10 minutos (10)
+    modelo_calefaccion: str = "zona"    # "zona" (PConsumoZone x factor trapezoidal) o "bomba_calor" (grados-hora)
+    path_clima: Optional[str] = None    # CSV Zona;Mes;Hora;Temperatura (None = hoja 'temp' del PGEN del cliente)
+    percentil_demanda: Optional[int] = None  # Dimensiona con el perfil P<n> de los sorteos de ocupación (None = determinístico)
+    n_sorteos: int = 2000               # Sorteos del Monte Carlo de ocupación
+    semilla: int = 0                    # Semilla del Monte Carlo de ocupación (mismos resultados con la misma semilla)
+    objetivo_bateria: Optional[float] = None  # Energía no servida máxima (fracción) para dimensionar baterías por SOC (None = autonomía)
+    objetivo_lolp: Optional[float] = None     # OffGrid: superficie LOLP PV x batería y combinación de menor costo (None = no se calcula)
+    buscar_configuraciones: bool = False      # OffGrid: frente de Pareto costo vs. margen de panel x MPPT x inversor x batería
+    nivel_log: str = "INFO"             # DEBUG incluye el detalle de los campos de cada cliente
+    verbosidad: int = DETALLE           # Tablas impresas por las etapas: SILENCIO, RESUMEN o DETALLE
+    path_reportes: Optional[str] = None # Carpeta donde exportar las tablas de cada cliente (None = no exportar)
+    path_eventos: Optional[str] = r"eventos_ejecucion.jsonl"  # Eventos JSONL para análisis (None = desactivado)
 
 class GestorProyecto:
     """Clase orquestadora del flujo de simulación completo"""
-    
-    def __init__(self, config: Config):
+
+    def __init__(self, config: Config, logger=None, reportes=None):
         self.config = config
         self.resultados = {} # Almacén central de resultados
-        self.logger = SimpleLogger(filename="log_ejecucion.txt")
-        
+        self.logger = logger if logger is not None else SimpleLogger(filename=config.path_log, nivel=config.nivel_log)
+        self.cache = CacheEtapas(os.path.join(config.path_cache, "etapas"), activo=config.usar_cache)
+        # Eventos estructurados (JSONL): mediciones, mensajes de las etapas y resultado por cliente
+        self.eventos = RegistroEventos() if config.path_eventos else None
+        self.medidor = MedidorRendimiento(eventos=self.eventos)
+        # Tablas de referencia (.npz) y perfiles PGEN, compartidos por los gestores del mismo proceso
+        self.almacen, self.almacen_pgen = _almacenes(config)
+        self.almacen_consumo = get_almacen_consumo(config.path_BBDD_clientes)
+        # Calefacción con bomba de calor por grados-hora (opcional, ver stage.calefaccion)
+        self.modelo_calefaccion = None
+        if config.modelo_calefaccion == "bomba_calor":
+            from stage.calefaccion import ModeloBombaCalor
+            self.modelo_calefaccion = ModeloBombaCalor(config.path_clima, config.path_pgen_clientes,
+                                                       almacen_pgen=self.almacen_pgen)
+        elif config.modelo_calefaccion != "zona":
+            raise ValueError(f"❌ Modelo de calefacción no reconocido: {config.modelo_calefaccion}")
+        # Tablas y DataFrames intermedios de las etapas (impresos según config.verbosidad)
+        self.reportes = reportes if reportes is not None else Reportes(
+            verbosidad=config.verbosidad, guardar=config.path_reportes is not None)
+        self.indice_encuesta = None  # IndiceEncuesta para los selectores (ver seleccionar_clientes)
+        self.motor_demanda = None    # MotorDemanda del modo lote (ver _demanda_bloque)
+        # Perfiles de demanda por firma del cliente, compartidos por los gestores del mismo proceso
+        self.memo_demanda = None
+        if config.memo_demanda:
+            directorio = os.path.join(config.path_cache, "memo") if config.memo_disco and config.usar_cache else None
+            self.memo_demanda = get_memo_demanda(config.capacidad_memo, directorio)
+
     def log(self, mensaje):
         self.logger.log(mensaje)
+        emitir(self.eventos, "Gestor", mensaje=mensaje)
+
+    def escribir_eventos(self, eventos=None):
+        """Agrega al archivo JSONL los eventos acumulados (o los entregados, p. ej. de un worker)."""
+        if self.eventos is not None:
+            self.eventos.escribir(self.config.path_eventos, eventos)
+
+    def seleccionar_clientes(self, ids=None, nombres=None, filtro=None):
+        """
+        Índices (base 0) de los clientes que cumplen los selectores, sin interacción.
+
+        Parameters
+        ----------
+        ids : str, optional
+            IDs o rangos con la numeración del menú, ej. '1,3,5-8'.
+        nombres : iterable of str, optional
+            Nombres de clientes (sin distinguir mayúsculas).
+        filtro : str, optional
+            Expresión sobre columnas de la encuesta, ej. "Zona == 'Los Lagos' and Tipo de solución == 'OffGrid'".
+
+        Returns
+        -------
+        list of int or None
+            None si no se entregó ningún selector (todas las filas).
+        """
+        if ids is None and not nombres and filtro is None:
+            return None
+        if not nombres and filtro is None:
+            # Sólo IDs: no hace falta recorrer la encuesta
+            return sorted(set(IndiceEncuesta.por_ids(ids)))
+        if self.indice_encuesta is None:
+            # El índice se construye una vez por gestor, en una sola pasada por la encuesta
+            from stage.process import Preprocess
+            self.indice_encuesta = Preprocess(self.config.ruta_archivo).construir_indice(self.config.tamano_bloque)
+        for nombre in nombres or ():
+            if not self.indice_encuesta.por_nombre(nombre):
+                self.log(f"⚠️ No hay clientes con el nombre '{nombre}'")
+        indices = self.indice_encuesta.seleccionar(ids=ids, nombres=nombres, filtro=filtro)
+        self.log(f"🔎 Selección: {len(indices)} de {self.indice_encuesta.n_filas} clientes")
+        return indices
 
-    def ejecutar(self):
+    def ejecutar(self, numero=None):
+        """Pipeline completo para un cliente; numero (base 1) lo preselecciona sin pedirlo por consola."""
         start_time = time.time()
         self.log("🚀 Iniciando pipeline de simulación")
-        
+
         try:
             # 1. Preprocesamiento: Carga de encuesta y selección de usuario
             self.log("▶ Paso 1: Preprocesamiento de Encuesta")
-            prepro = Preprocess(self.config.ruta_archivo)
-            indice, cliente_data, vector = prepro.ejecutar()
-            self.resultados['indice'] = indice
-            self.resultados['cliente_data'] = cliente_data
+            with self.medidor.medir("Preprocess"):
+                from stage.process import Preprocess
+                prepro = Preprocess(self.config.ruta_archivo)
+                indice, cliente_data, vector = prepro.ejecutar(numero)
             self.log("✅ Preprocesamiento finalizado.")
-            
-            # 2. Cliente: Construcción de Perfiles de Demanda
-            self.log("▶ Paso 2: Análisis de Cliente y Demanda")
+
+            # 2-4. Demanda, dimensionamiento y optimización
+            self.ejecutar_cliente(indice, cliente_data, vector)
+
+            elapsed = time.time() - start_time
+            print("\n" + "="*50)
+            self.log(f"🏁 Ejecución completada exitosamente en {elapsed:.2f} segundos.")
+            print("="*50)
+            emitir(self.eventos, "Gestor", tipo="cliente", estado="ok", duracion_s=elapsed)
+            self.medidor.exportar_json(self.config.path_reporte_rendimiento, extra={"tiempo_total_s": elapsed})
+            self.log(f"📈 Reporte de rendimiento guardado en {self.config.path_reporte_rendimiento}")
+
+        except Exception as e:
+            print("\n" + "!"*50)
+            self.log(f"❌ Error crítico en la ejecución: {e}")
+            import traceback
+            traceback.print_exc()
+            print("!"*50)
+            emitir(self.eventos, "Gestor", tipo="cliente", estado="error",
+                   error=f"{type(e).__name__}: {e}", duracion_s=time.time() - start_time)
+        finally:
+            self.escribir_eventos()
+
+    def ejecutar_cliente(self, indice, cliente_data, vector, demanda=None):
+        """
+        Ejecuta las etapas Cliente → Dimensionamiento → Optimizador para un cliente ya
+        preprocesado. Es el tramo común del modo interactivo y del modo lote.
+        demanda: (pdem_cliente, Dem_Max) ya calculados por MotorDemanda (se omite Cliente).
+
+        Returns
+        -------
+        dict
+            self.resultados con las salidas de cada etapa.
+        """
+        self.resultados['indice'] = indice
+        self.resultados['cliente_data'] = cliente_data
+        if self.eventos is not None:
+            self.eventos.indice = indice
+
+        archivo_pgen = self._archivo_pgen(indice)
+
+        # 2. Cliente: Construcción de Perfiles de Demanda
+        self.log("▶ Paso 2: Análisis de Cliente y Demanda")
+        with self.medidor.medir("Cliente") as registro:
+            clave_cliente, pdem_cliente, Dem_Max, registro["cache"] = self._etapa_cliente(
+                indice, cliente_data, vector, demanda)
+            registro["motor"] = demanda is not None
+            registro["forma_pdem"] = getattr(pdem_cliente, "shape", None)
+        self.resultados['pdem_cliente'] = pdem_cliente
+        self.resultados['Dem_Max'] = Dem_Max
+        self.log("✅ Perfiles de cliente generados.")
+
+        # 3. Dimensionamiento Técnico: Selección de Equipos (Sizing)
+        self.log("▶ Paso 3: Dimensionamiento Técnico (Generación y Equipos)")
+        with self.medidor.medir("Dimensionamiento") as registro:
+            clave_sizing, sizing, registro["cache"] = self._etapa_sizing(
+                indice, cliente_data, pdem_cliente, Dem_Max, clave_cliente, archivo_pgen)
+        self.resultados['sizing'] = sizing
+        self.log("✅ Dimensionamiento técnico completado.")
+
+        # 4. Optimización y Evaluación Financiera
+        self.log("▶ Paso 4: Optimización Económica y Flujo de Caja")
+        with self.medidor.medir("Optimizador") as registro:
+            resultados_opt, registro["cache"] = self._etapa_optimizacion(
+                indice, cliente_data, pdem_cliente, sizing, clave_sizing, archivo_pgen)
+            # Estado y condición de término del solver (None mientras la resolución esté deshabilitada)
+            registro["estado"] = resultados_opt.get("status")
+            registro["terminacion"] = resultados_opt.get("termination_condition")
+        self.resultados['optimizacion'] = resultados_opt
+
+        if self.config.path_reportes is not None:
+            ruta = os.path.join(self.config.path_reportes, f"cliente_{indice + 1:02d}.txt")
+            self.reportes.exportar(ruta)
+            self.log(f"📝 Reportes del cliente guardados en {ruta}")
+
+        return self.resultados
+
+    def _etapa_cliente(self, indice, cliente_data, vector, demanda=None):
+        """Perfiles de demanda del cliente, desde caché si sus entradas no cambiaron."""
+        archivos = (self.config.path_perfil_base, self.config.path_perfil_extra,
+                    self.config.path_BBDD_clientes, self.config.path_consumo_zona)
+        if self.modelo_calefaccion is not None:
+            # Temperaturas del modelo de bomba de calor: CSV de clima u hoja 'temp' del PGEN
+            archivos += (self.config.path_clima or self._archivo_pgen(indice),)
+        clave = self.cache.clave(
+            "clientes",
+            {"indice": indice, "cliente_data": cliente_data, "vector": vector},
+            archivos=archivos,
+            parametros={"resolucion_minutos": self.config.resolucion_minutos,
+                        "modelo_calefaccion": self.config.modelo_calefaccion,
+                        "ocupacion": self._parametros_ocupacion()},
+        )
+        if demanda is not None:
+            # Calculada junto con el resto del bloque (idéntica a la de Cliente)
+            pdem_cliente, Dem_Max = demanda
+            self.log("⚡ Perfiles de cliente calculados en bloque (MotorDemanda).")
+            return clave, pdem_cliente, Dem_Max, False
+        encontrado, salida = self.cache.obtener("clientes", clave)
+        if encontrado:
+            pdem_cliente, Dem_Max = salida
+            if self.config.percentil_demanda is not None:
+                self.resultados['ocupacion'] = self.cache.obtener("ocupacion", clave)[1]
+            self.log("♻️ Perfiles de cliente recuperados desde caché.")
+        else:
+            from stage.clients import Cliente
             cliente = Cliente(
-                indice, 
-                cliente_data, 
-                self.config.path_perfil_base, 
+                indice,
+                cliente_data,
+                self.config.path_perfil_base,
                 self.config.path_perfil_extra,
-                self.config.path_BBDD_clientes, 
-                self.config.path_consumo_zona, 
-                vector_prueba=vector, 
-                cliente_actual=prepro.cliente_actual,
-                logger=self.logger # Inyección del logger
+                self.config.path_BBDD_clientes,
+                self.config.path_consumo_zona,
+                vector_prueba=vector,
+                cliente_actual=cliente_data,
+                logger=self.logger, # Inyección del logger
+                medidor=self.medidor,
+                almacen=self.almacen,
+                almacen_consumo=self.almacen_consumo,
+                reportes=self.reportes,
+                eventos=self.eventos,
+                resolucion_minutos=self.config.resolucion_minutos,
+                modelo_calefaccion=self.modelo_calefaccion,
+                # Sin memo en modo percentil: simular_ocupacion necesita los cálculos intermedios
+                memo=self.memo_demanda if self.config.percentil_demanda is None else None
             )
             pdem_cliente,Dem_Max = cliente.ejecutar()
-            self.resultados['pdem_cliente'] = pdem_cliente
-            self.log("✅ Perfiles de cliente generados.")
+            if self.config.percentil_demanda is not None:
+                pdem_cliente, Dem_Max = self._demanda_percentil(cliente, Dem_Max)
+                self.cache.guardar("ocupacion", clave, self.resultados['ocupacion'])
+            self.cache.guardar("clientes", clave, (pdem_cliente, Dem_Max))
+        return clave, pdem_cliente, Dem_Max, encontrado
+
+    def _parametros_ocupacion(self):
+        """Parámetros del Monte Carlo de ocupación que cambian la demanda (None en modo determinístico)."""
+        if self.config.percentil_demanda is None:
+            return None
+        return {"percentil": self.config.percentil_demanda, "n_sorteos": self.config.n_sorteos,
+                "semilla": self.config.semilla}
+
+    def _demanda_percentil(self, cliente, dem_max_determinista):
+        """
+        Reemplaza la demanda del cliente por el percentil config.percentil_demanda de los
+        sorteos de ocupación (perfil y demanda máxima) y deja el resumen en
+        self.resultados['ocupacion'].
+        """
+        from stage.ocupacion import SimuladorOcupacion
 
-            # 3. Dimensionamiento Técnico: Selección de Equipos (Sizing)
-            self.log("▶ Paso 3: Dimensionamiento Técnico (Generación y Equipos)")
+        percentil = self.config.percentil_demanda
+        percentiles = sorted({50, 90, percentil})
+        simulador = SimuladorOcupacion(self.config.n_sorteos, self.config.semilla)
+        ocupacion = cliente.simular_ocupacion(simulador, percentiles)
+        ocupacion["percentil"] = percentil
+        ocupacion["dem_max_determinista"] = dem_max_determinista
+        self.resultados['ocupacion'] = ocupacion
+        Dem_Max = ocupacion["dem_max_percentiles"][percentil]
+        self.log(f"🎲 Demanda P{percentil} de {simulador.n_sorteos} sorteos: Dem_Max {Dem_Max:.3f} kWh "
+                 f"(determinístico {dem_max_determinista:.3f} kWh)")
+        return ocupacion["perfiles"][percentil], Dem_Max
+
+    def _etapa_sizing(self, indice, cliente_data, pdem_cliente, Dem_Max, clave_cliente, archivo_pgen):
+        """Dimensionamiento técnico, desde caché si sus entradas no cambiaron."""
+        clave = self.cache.clave(
+            "sizing",
+            {"clave_cliente": clave_cliente, "indice": indice},
+            archivos=(archivo_pgen, self.config.path_equipos),
+            parametros={"interactive_mode": False, "objetivo_bateria": self.config.objetivo_bateria,
+                        "objetivo_lolp": self.config.objetivo_lolp,
+                        "buscar_configuraciones": self.config.buscar_configuraciones},
+        )
+        encontrado, sizing = self.cache.obtener("sizing", clave)
+        if encontrado:
+            self.log("♻️ Dimensionamiento recuperado desde caché.")
+        else:
+            from stage.sizing_backup import Dimensionamiento
             sizing = Dimensionamiento(
-                indice, 
-                cliente_data, 
-                pdem_cliente, 
+                indice,
+                cliente_data,
+                pdem_cliente,
                 Dem_Max,
-                self.config.path_pgen_clientes, 
+                self.config.path_pgen_clientes,
                 path_equipos=self.config.path_equipos,
                 logger=self.logger, # Logger
-                interactive_mode=False  # Flag para controlar inputs (True=solicitar, False=usar defaults)
+                interactive_mode=False,  # Flag para controlar inputs (True=solicitar, False=usar defaults)
+                medidor=self.medidor,
+                almacen=self.almacen,
+                almacen_pgen=self.almacen_pgen,
+                reportes=self.reportes,
+                eventos=self.eventos,
+                objetivo_bateria=self.config.objetivo_bateria,
+                objetivo_lolp=self.config.objetivo_lolp,
+                buscar_configuraciones=self.config.buscar_configuraciones
             )
             sizing = sizing.ejecutar()
-            self.resultados['sizing'] = sizing
-            self.log("✅ Dimensionamiento técnico completado.")
-            
-            # 4. Optimización y Evaluación Financiera
-            self.log("▶ Paso 4: Optimización Económica y Flujo de Caja")
+            self.cache.guardar("sizing", clave, sizing)
+        return clave, sizing, encontrado
+
+    def _etapa_optimizacion(self, indice, cliente_data, pdem_cliente, sizing, clave_sizing, archivo_pgen):
+        """Optimización y evaluación económica, desde caché si sus entradas no cambiaron."""
+        clave = self.cache.clave(
+            "optimizacion",
+            {"clave_sizing": clave_sizing, "indice": indice},
+            archivos=(archivo_pgen,),
+            parametros={"optimizar_anual": True},
+        )
+        encontrado, resultados_opt = self.cache.obtener("optimizacion", clave)
+        if encontrado:
+            self.log("♻️ Resultados de optimización recuperados desde caché.")
+        else:
+            from stage.optimization import Optimizador
             optimizador = Optimizador(
-                indice, 
-                cliente_data, 
-                pdem_cliente, 
-                sizing, 
+                indice,
+                cliente_data,
+                pdem_cliente,
+                sizing,
                 self.config.path_pgen_clientes,
-                logger=self.logger)
+                logger=self.logger,
+                medidor=self.medidor,
+                almacen_pgen=self.almacen_pgen,
+                eventos=self.eventos)
             optimizador.ejecutar()
-            
-            elapsed = time.time() - start_time
-            print("\n" + "="*50)
-            self.log(f"🏁 Ejecución completada exitosamente en {elapsed:.2f} segundos.")
-            print("="*50)
-            
+            resultados_opt = optimizador.resultados_opt
+            self.cache.guardar("optimizacion", clave, resultados_opt)
+        return resultados_opt, encontrado
+
+    def _archivo_pgen(self, indice):
+        """Ruta del archivo PGEN_XX_*.xlsx del cliente (para la huella de la caché)."""
+        return self.almacen_pgen.ruta(indice)
+
+    def _preparar_matriz_pgen(self):
+        """
+        Consolida todos los PGEN en una matriz (n, 12, 24) en disco para que los workers
+        la mapeen en memoria. Devuelve su carpeta, o None si no se pudo construir.
+        """
+        destino = os.path.join(self.config.path_cache, "pgen")
+        inicio = time.perf_counter()
+        try:
+            indice = construir_matriz_pgen(self.config.path_pgen_clientes, destino, almacen=self.almacen,
+                                           reconstruir=not self.config.usar_cache)
+            self.almacen_pgen.adjuntar_matriz(destino)
         except Exception as e:
-            print("\n" + "!"*50)
-            self.log(f"❌ Error crítico en la ejecución: {e}")
-            import traceback
-            traceback.print_exc()
-            print("!"*50)
+            self.log(f"⚠️ No se pudo consolidar los perfiles PGEN ({e}); cada cliente leerá su archivo.")
+            return None
+        self.log(f"🗂️ Matriz PGEN: {len(indice['codigos'])} perfiles en {time.perf_counter() - inicio:.2f} s")
+        for codigo, error in indice["errores"].items():
+            self.log(f"⚠️ PGEN {codigo} no incluido en la matriz: {error}")
+        return destino
+
+    def _motor(self):
+        """MotorDemanda del gestor (se crea al primer uso)."""
+        if self.motor_demanda is None:
+            from stage.demanda import MotorDemanda
+            self.motor_demanda = MotorDemanda(
+                self.config.path_perfil_base,
+                self.config.path_perfil_extra,
+                self.config.path_BBDD_clientes,
+                self.config.path_consumo_zona,
+                almacen=self.almacen,
+                almacen_consumo=self.almacen_consumo,
+                medidor=self.medidor,
+                resolucion_minutos=self.config.resolucion_minutos,
+                modelo_calefaccion=self.modelo_calefaccion)
+        return self.motor_demanda
+
+    def _bloques_preparados(self, prepro, pendientes, errores, verbose=False):
+        """
+        Recorre la encuesta por bloques y entrega, por bloque, la lista de
+        (indice, cliente_data, vector) ya preprocesados.
+
+        pendientes (set de índices o None = todos) se va vaciando; al terminar quedan los
+        índices que no existen en la encuesta. Los errores de preprocesamiento se guardan
+        en `errores` como resultados de error.
+        """
+        # La encuesta se recorre en streaming: sólo un bloque de respuestas en memoria
+        for bloque in prepro.leer_encuesta_por_bloques(self.config.tamano_bloque):
+            # Vectores de electrodomésticos y zonas de todo el bloque en una pasada
+            bloque, vectores, revisar = prepro.preparar_bloque(bloque)
+            preparados = []
+            for posicion, (indice, registro) in enumerate(bloque.iterrows()):
+                if pendientes is not None:
+                    if indice not in pendientes:
+                        continue
+                    pendientes.discard(indice)
+                try:
+                    if revisar[posicion]:
+                        with silenciar_consola(not verbose):
+                            _, cliente_data, vector = prepro.preparar_registro(indice, registro.drop('Tipo Zona'))
+                    else:
+                        cliente_data, vector = registro, vectores[posicion].tolist()
+                except Exception as e:
+                    errores[indice] = _resultado_error(indice, None, e)
+                    self.log(f"❌ Cliente {indice}: error en preprocesamiento ({e})")
+                    continue
+                preparados.append((indice, cliente_data, vector))
+            yield preparados
+            if pendientes is not None and not pendientes:
+                break
+
+    def _demanda_bloque(self, preparados):
+        """
+        Demanda de un bloque de clientes con MotorDemanda. Devuelve, por cliente,
+        (pdem_cliente, Dem_Max) o None si debe calcularse con Cliente en el worker.
+        """
+        if not self.config.motor_demanda or not preparados:
+            return [None] * len(preparados)
+        if self.config.percentil_demanda is not None:
+            # La demanda por percentiles de ocupación se calcula cliente a cliente (ver _demanda_percentil)
+            return [None] * len(preparados)
+        try:
+            demandas = self._motor().ejecutar(preparados)
+        except Exception as e:
+            self.log(f"⚠️ MotorDemanda no disponible ({e}); cada cliente se calculará con Cliente.")
+            return [None] * len(preparados)
+        calculados = sum(d is not None for d in demandas)
+        self.log(f"⚡ MotorDemanda: {calculados}/{len(preparados)} clientes del bloque calculados en bloque")
+        return demandas
+
+    def ejecutar_lote(self, indices=None, max_workers=None, verbose=False):
+        """
+        Ejecuta el pipeline sin interacción para varias filas de la encuesta,
+        repartiendo los clientes en un ProcessPoolExecutor.
+
+        Parameters
+        ----------
+        indices : iterable of int, optional
+            Índices (base 0) de los clientes a evaluar. Por defecto, todas las filas.
+        max_workers : int, optional
+            Número de procesos. Por defecto config.max_workers (None = os.cpu_count()).
+        verbose : bool
+            Si es False, se suprime la salida por consola de cada etapa.
+
+        Returns
+        -------
+        dict
+            Resultados por índice de cliente (estado, salidas de cada etapa y tiempo).
+        """
+        start_time = time.perf_counter()
+        if max_workers is None:
+            max_workers = self.config.max_workers
+        self.log("🚀 Iniciando pipeline de simulación en modo lote")
+
+        from stage.process import Preprocess
+        prepro = Preprocess(self.config.ruta_archivo)
+        pendientes = None if indices is None else set(indices)
+        self.log(f"▶ Leyendo encuesta en bloques de {self.config.tamano_bloque} respuestas "
+                 f"con {max_workers or os.cpu_count()} procesos")
+
+        destino_pgen = self._preparar_matriz_pgen()
+
+        resultados = {}
+        # Los workers envían su log por una cola; sólo este proceso escribe el archivo
+        cola_log = self.logger.cola_procesos()
+        with ProcessPoolExecutor(max_workers=max_workers, initializer=_inicializar_worker,
+                                 initargs=(self.config, destino_pgen, cola_log, verbose)) as pool:
+            futuros = {}
+            for preparados in self._bloques_preparados(prepro, pendientes, resultados, verbose):
+                # Demanda de todo el bloque a la vez; los workers siguen con sizing y optimización
+                for (indice, cliente_data, vector), demanda in zip(preparados, self._demanda_bloque(preparados)):
+                    futuro = pool.submit(_ejecutar_cliente_lote, self.config, indice, cliente_data, vector,
+                                         verbose, demanda)
+                    futuros[futuro] = indice
+            for indice in pendientes or ():
+                resultados[indice] = _resultado_error(indice, None, IndexError("Índice fuera de rango"))
+                self.log(f"❌ Cliente {indice}: no existe en la encuesta")
+            n_clientes = len(futuros) + len(resultados)
+            self.log(f"▶ {n_clientes} clientes a evaluar")
+
+            for futuro in as_completed(futuros):
+                indice = futuros[futuro]
+                try:
+                    resultado = futuro.result()
+                except Exception as e:  # Falla del proceso worker (no del cálculo)
+                    resultado = _resultado_error(indice, None, e)
+                # Los eventos del worker se escriben aquí: un solo proceso escribe el archivo
+                self.escribir_eventos(resultado.pop("eventos", []))
+                resultados[indice] = resultado
+                if resultado["estado"] == "ok":
+                    self.log(f"✅ Cliente {indice} ({resultado['nombre']}) completado en {resultado['tiempo_s']:.2f} s")
+                else:
+                    self.log(f"❌ Cliente {indice} ({resultado['nombre']}): {resultado['error']}")
+
+        elapsed = time.perf_counter() - start_time
+        n_ok = sum(1 for r in resultados.values() if r["estado"] == "ok")
+        throughput = n_clientes / elapsed if elapsed > 0 else 0.0
+        print("\n" + "="*50)
+        self.log(f"🏁 Lote completado: {n_ok}/{n_clientes} clientes en {elapsed:.2f} segundos "
+                 f"({throughput:.2f} clientes/s).")
+        print("="*50)
+
+        resultados = dict(sorted(resultados.items()))
+        for indice, r in resultados.items():
+            emitir(self.eventos, "Gestor", tipo="cliente", indice=indice, nombre=r["nombre"],
+                   estado=r["estado"], error=r["error"], duracion_s=r["tiempo_s"])
+        self.resultados['lote'] = resultados
+        self.resultados['lote_resumen'] = {
+            "clientes": n_clientes,
+            "exitosos": n_ok,
+            "fallidos": n_clientes - n_ok,
+            "tiempo_s": elapsed,
+            "clientes_por_segundo": throughput,
+            "memo_demanda": _resumen_memo(resultados),
+        }
+        exportar_json(self.config.path_reporte_rendimiento, {
+            "lote": self.resultados['lote_resumen'],
+            "clientes": {str(i): {"tiempo_s": r["tiempo_s"], "etapas": r.get("rendimiento", {})}
+                         for i, r in resultados.items()},
+        })
+        self.log(f"📈 Reporte de rendimiento guardado en {self.config.path_reporte_rendimiento}")
+        self.escribir_eventos()
+        self.logger.vaciar()
+        return resultados
+
+    def generar_serie_anual(self, indices=None, anio=2025, feriados=(), ruta=None, verbose=False):
+        """
+        Series cronológicas de 8760 horas de los clientes, con días laborales, fines de
+        semana y feriados (ver MotorDemanda.serie_anual).
+
+        Parameters
+        ----------
+        indices : iterable of int, optional
+            Índices (base 0) de los clientes. Por defecto, todas las filas de la encuesta.
+        anio : int
+            Año del calendario.
+        feriados : iterable
+            Feriados adicionales a los de fecha fija ('AAAA-MM-DD').
+        ruta : str, optional
+            Archivo .npz donde guardar las series (float32) y sus índices.
+        verbose : bool
+            Si es False, se suprime la salida por consola del preprocesamiento.
+
+        Returns
+        -------
+        tuple
+            (índices de los clientes calculados, ndarray float32 (N, 8760) [kWh]).
+        """
+        import numpy as np
+        from stage.demanda import HORAS_ANIO
+        from stage.process import Preprocess
+
+        start_time = time.perf_counter()
+        self.log(f"📆 Generando series de 8760 h (año {anio})")
+        prepro = Preprocess(self.config.ruta_archivo)
+        pendientes = None if indices is None else set(indices)
+        errores = {}
+        calculados, partes = [], []
+        with self.medidor.medir("SerieAnual") as registro:
+            for preparados in self._bloques_preparados(prepro, pendientes, errores, verbose):
+                series, validos = self._motor().serie_anual(preparados, anio=anio, feriados=feriados)
+                for (indice, _, _), valido in zip(preparados, validos):
+                    if valido:
+                        calculados.append(indice)
+                    else:
+                        self.log(f"⚠️ Cliente {indice}: datos no válidos para la serie anual")
+                partes.append(series[validos])
+            registro["clientes"] = len(calculados)
+        for indice in pendientes or ():
+            self.log(f"❌ Cliente {indice}: no existe en la encuesta")
+
+        series = np.concatenate(partes) if partes else np.zeros((0, HORAS_ANIO), dtype=np.float32)
+        if ruta:
+            np.savez_compressed(ruta, series=series, indices=np.asarray(calculados, dtype=np.int64), anio=anio)
+            self.log(f"💾 Series guardadas en {ruta}")
+        elapsed = time.perf_counter() - start_time
+        self.log(f"🏁 Series de 8760 h: {len(calculados)} clientes en {elapsed:.2f} s "
+                 f"({series.nbytes / 1e6:.1f} MB en float32)")
+        self.escribir_eventos()
+        self.logger.vaciar()
+        return calculados, series
+
+
+def _almacenes(config):
+    """Almacenes de referencia y PGEN del proceso para una configuración."""
+    almacen = get_almacen(os.path.join(config.path_cache, "referencia"), activo=config.usar_cache)
+    return almacen, get_almacen_pgen(config.path_pgen_clientes, almacen=almacen)
+
+
+def _resumen_memo(resultados):
+    """Aciertos (en memoria o disco) y fallos del memo de demanda en los clientes del lote."""
+    resumen = {"memoria": 0, "disco": 0, "fallos": 0}
+    for r in resultados.values():
+        pasos = r.get("rendimiento", {}).get("Cliente", {}).get("pasos", {})
+        if "memo" in pasos:
+            resumen[pasos["memo"].get("origen") or "fallos"] += 1
+    return resumen
+
+
+# Logger del proceso worker (ver _inicializar_worker)
+_logger_worker = None
+
+
+def _inicializar_worker(config, destino_pgen, cola_log=None, verbose=False):
+    """
+    Inicializador de los procesos worker: crea el logger que envía a la cola del
+    proceso principal y mapea la matriz PGEN consolidada (si existe).
+    """
+    global _logger_worker
+    if cola_log is not None:
+        _logger_worker = SimpleLogger(cola=cola_log, consola=verbose, nivel=config.nivel_log)
+    if destino_pgen is not None:
+        _, almacen_pgen = _almacenes(config)
+        almacen_pgen.adjuntar_matriz(destino_pgen)
+
+
+def _resultado_error(indice, nombre, error):
+    return {
+        "indice": indice,
+        "nombre": nombre,
+        "estado": "error",
+        "error": f"{type(error).__name__}: {error}",
+        "tiempo_s": 0.0,
+    }
+
+
+def _ejecutar_cliente_lote(config, indice, cliente_data, vector, verbose=False, demanda=None):
+    """Tarea de un proceso worker: etapas 2-4 para un cliente, capturando sus errores."""
+    inicio = time.perf_counter()
+    nombre = cliente_data.get('Nombre')
+    # El worker escribe en el log del proceso principal (por su cola, o agregando al archivo)
+    logger = _logger_worker
+    if logger is None:
+        logger = SimpleLogger(filename=config.path_log, modo="a", consola=verbose, nivel=config.nivel_log)
+    # Sin --verbose no se imprime nada: sólo se generan las tablas que se exportan
+    reportes = Reportes(verbosidad=config.verbosidad if verbose else SILENCIO,
+                        guardar=config.path_reportes is not None)
+    gestor = GestorProyecto(config, logger=logger, reportes=reportes)
+    try:
+        with silenciar_consola(not verbose):
+            salida = gestor.ejecutar_cliente(indice, cliente_data, vector, demanda)
+    except Exception as e:
+        resultado = _resultado_error(indice, nombre, e)
+    else:
+        resultado = {"indice": indice, "nombre": nombre, "estado": "ok", "error": None}
+        resultado.update({k: v for k, v in salida.items() if k != 'indice'})
+    resultado["tiempo_s"] = time.perf_counter() - inicio
+    resultado["rendimiento"] = gestor.medidor.reporte()
+    resultado["eventos"] = gestor.eventos.vaciar() if gestor.eventos is not None else []
+    return resultado
+
 
 if __name__ == "__main__":
-    os.system("cls" if os.name == 'nt' else 'clear')
-    
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Evaluación de proyectos FV-batería por cliente.")
+    parser.add_argument("--lote", action="store_true",
+                        help="Evalúa sin interacción todas las filas de la encuesta (o las seleccionadas).")
+    parser.add_argument("--clientes", default=None,
+                        help="IDs o rangos de clientes con la numeración del menú, ej. '1,3,5-8'.")
+    parser.add_argument("--nombre", action="append", default=None,
+                        help="Selecciona clientes por nombre (se puede repetir).")
+    parser.add_argument("--filtro", default=None,
+                        help="Expresión de filtro, ej. \"Zona == 'Los Lagos' and Tipo de solución == 'OffGrid'\".")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Número de procesos del modo lote.")
+    parser.add_argument("--verbose", action="store_true",
+                        help="Muestra la salida detallada de cada etapa en modo lote.")
+    parser.add_argument("--sin-cache", action="store_true",
+                        help="Recalcula todas las etapas sin usar la caché en disco.")
+    parser.add_argument("--sin-memo", action="store_true",
+                        help="Calcula la demanda de cada cliente aunque otro tenga la misma firma.")
+    parser.add_argument("--memo-disco", action="store_true",
+                        help="Guarda también en disco los perfiles del memo de demanda (para otras ejecuciones).")
+    parser.add_argument("--nivel-log", default="INFO", choices=["DEBUG", "INFO", "WARNING", "ERROR"],
+                        help="Nivel mínimo de los mensajes del log (DEBUG incluye los datos de cada cliente).")
+    parser.add_argument("--verbosidad", type=int, default=DETALLE, choices=[0, 1, 2],
+                        help="Tablas impresas por las etapas: 0 ninguna, 1 resumen, 2 detalle.")
+    parser.add_argument("--exportar-reportes", default=None, metavar="DIR",
+                        help="Guarda las tablas de cada cliente en DIR/cliente_XX.txt.")
+    parser.add_argument("--eventos", default=Config.path_eventos, metavar="RUTA",
+                        help="Archivo JSONL donde se agregan los eventos de la ejecución ('' lo desactiva).")
+    parser.add_argument("--resolucion", type=int, default=Config.resolucion_minutos, choices=[60, 10],
+                        help="Resolución de la demanda en minutos: 60 (12x24) o 10 (12x144, picos de 10 minutos).")
+    parser.add_argument("--calefaccion", default=Config.modelo_calefaccion, choices=["zona", "bomba_calor"],
+                        help="Modelo de calefacción: perfil por zona o bomba de calor por grados-hora.")
+    parser.add_argument("--clima", default=None, metavar="CSV",
+                        help="Temperaturas por zona para la bomba de calor (por defecto, hoja 'temp' del PGEN).")
+    parser.add_argument("--percentil", type=int, default=None, metavar="P",
+                        help="Dimensiona con el perfil P (p. ej. 90) del Monte Carlo de ocupación en vez del determinístico.")
+    parser.add_argument("--sorteos", type=int, default=Config.n_sorteos,
+                        help="Sorteos del Monte Carlo de ocupación (con --percentil).")
+    parser.add_argument("--semilla", type=int, default=Config.semilla,
+                        help="Semilla del Monte Carlo de ocupación (con --percentil).")
+    parser.add_argument("--objetivo-bateria", type=float, default=None, metavar="FRACCION",
+                        help="Dimensiona las baterías simulando el SOC hora a hora: energía no servida máxima (ej. 0.01).")
+    parser.add_argument("--lolp", type=float, default=None, metavar="FRACCION",
+                        help="OffGrid: calcula la superficie LOLP PV x batería y la combinación de menor costo con LOLP <= FRACCION.")
+    parser.add_argument("--pareto", action="store_true",
+                        help="OffGrid: busca el frente de Pareto costo vs. margen entre todas las configuraciones de equipos compatibles.")
+    parser.add_argument("--serie-anual", default=None, metavar="RUTA",
+                        help="Genera las series de 8760 h de los clientes (o los seleccionados) en RUTA (.npz) y termina.")
+    parser.add_argument("--anio", type=int, default=2025,
+                        help="Año del calendario de --serie-anual (días laborales, fines de semana y feriados).")
+    parser.add_argument("--medir-arranque", action="store_true",
+                        help="Mide el arranque en frío de cada módulo contra su presupuesto y termina.")
+    args = parser.parse_args()
+
+    if args.medir_arranque:
+        from utils.perf import medir_arranque
+        medicion = medir_arranque()
+        print("Módulo               | Arranque [s] | Presupuesto [s]")
+        for modulo, m in medicion.items():
+            estado = "✅" if m["cumple"] else "❌"
+            print(f"{modulo:<20} | {m['tiempo_s']:>12.3f} | {m['presupuesto_s']:>15.2f} {estado}")
+        raise SystemExit(0 if all(m["cumple"] for m in medicion.values()) else 1)
+
     # Inicialización de configuración y gestor
-    configuracion = Config()
+    configuracion = Config(usar_cache=not args.sin_cache, memo_demanda=not args.sin_memo,
+                           memo_disco=args.memo_disco, nivel_log=args.nivel_log,
+                           verbosidad=args.verbosidad, path_reportes=args.exportar_reportes,
+                           path_eventos=args.eventos or None, resolucion_minutos=args.resolucion,
+                           modelo_calefaccion=args.calefaccion, path_clima=args.clima,
+                           percentil_demanda=args.percentil, n_sorteos=args.sorteos, semilla=args.semilla,
+                           objetivo_bateria=args.objetivo_bateria, objetivo_lolp=args.lolp,
+                           buscar_configuraciones=args.pareto)
     gestor_principal = GestorProyecto(configuracion)
-    
-    # Ejecución del flujo principal
-    gestor_principal.ejecutar()
\ No newline at end of file
+
+    # Selectores (IDs, nombres, filtro): sin ellos, el modo interactivo pide el cliente por consola
+    try:
+        indices = gestor_principal.seleccionar_clientes(ids=args.clientes, nombres=args.nombre, filtro=args.filtro)
+    except ValueError as e:
+        parser.error(str(e))
+
+    if args.serie_anual:
+        gestor_principal.generar_serie_anual(indices=indices, anio=args.anio, ruta=args.serie_anual,
+                                             verbose=args.verbose)
+    elif args.lote or (indices is not None and len(indices) != 1):
+        gestor_principal.ejecutar_lote(indices=indices, max_workers=args.workers, verbose=args.verbose)
+    elif indices is not None:
+        gestor_principal.ejecutar(numero=indices[0] + 1)
+    else:
+        os.system("cls" if os.name == 'nt' else 'clear')
+        # Ejecución del flujo principal
+        gestor_principal.ejecutar()
@@ -0,0 +1,218 @@
+import numpy as np
+
+HORAS_DIA = 24
+VOLTAJE_SISTEMA = 48          # [V], como en SeleccionBateria.numero_baterias
+
+# Parámetros por defecto de una batería de litio
+PROFUNDIDAD_DESCARGA = 0.8    # Fracción utilizable de la capacidad nominal [-]
+EFICIENCIA_CARGA = 0.95       # Energía almacenada / energía PV que entra [-]
+EFICIENCIA_DESCARGA = 0.95    # Energía entregada a la carga / energía que sale [-]
+
+
+class SimuladorSOC:
+    """
+    Simulación cronológica del estado de carga (SOC) de una batería OffGrid.
+
+    En cada hora el excedente PV carga la batería (con pérdidas de carga) y el déficit
+    la descarga (con pérdidas de descarga), entre el SOC mínimo (1 - profundidad de
+    descarga) y la capacidad nominal. Lo que no cabe en la batería se vierte y lo que
+    la batería no alcanza a entregar es energía no servida. La variación de energía
+    almacenada de cada hora no depende del SOC, así que las capacidades se simulan
+    juntas: el ciclo recorre las horas con operaciones sobre el vector de capacidades,
+    en lotes de capacidades para acotar la memoria.
+
+    Parameters
+    ----------
+    profundidad_descarga : float
+        Fracción utilizable de la capacidad.
+    eficiencia_carga, eficiencia_descarga : float
+        Eficiencias de carga y descarga.
+    soc_inicial : float
+        Fracción de la energía utilizable al inicio del año.
+    tamano_lote : int
+        Capacidades (o combinaciones PV x batería) simuladas por lote.
+    """
+
+    def __init__(self, profundidad_descarga=PROFUNDIDAD_DESCARGA, eficiencia_carga=EFICIENCIA_CARGA,
+                 eficiencia_descarga=EFICIENCIA_DESCARGA, soc_inicial=1.0, tamano_lote=256):
+        self.profundidad_descarga = profundidad_descarga
+        self.eficiencia_carga = eficiencia_carga
+        self.eficiencia_descarga = eficiencia_descarga
+        self.soc_inicial = soc_inicial
+        self.tamano_lote = tamano_lote
+
+    def simular(self, generacion, demanda, capacidades):
+        """
+        Simula un año (o cualquier serie horaria) para varias capacidades.
+
+        Parameters
+        ----------
+        generacion, demanda : array_like (T,)
+            Generación PV y demanda por hora [kWh].
+        capacidades : array_like (K,)
+            Capacidades nominales de batería [kWh].
+
+        Returns
+        -------
+        dict
+            Arreglos (K,): energia_no_servida y vertimiento [kWh], fraccion_no_servida
+            (respecto de la demanda total), horas_deficit (horas con energía no servida),
+            lolp (horas_deficit / horas), ciclos (ciclos equivalentes completos de la energía
+            utilizable) y soc_final [kWh].
+        """
+        demanda = np.asarray(demanda, dtype=float)
+        capacidades = np.asarray(capacidades, dtype=float).reshape(-1)
+        delta = self._variacion(np.asarray(generacion, dtype=float) - demanda)
+        columnas = np.zeros(len(capacidades), dtype=np.int64)
+        return self._simular(delta[:, None], columnas, capacidades, demanda.sum())
+
+    def superficie(self, generacion_kwp, demanda, potencias, capacidades):
+        """
+        Simula todas las combinaciones de potencia PV y capacidad de batería.
+
+        Parameters
+        ----------
+        generacion_kwp : array_like (T,)
+            Generación por kWp instalado [kWh/kWp].
+        demanda : array_like (T,)
+            Demanda por hora [kWh].
+        potencias : array_like (P,)
+            Potencias PV [kWp].
+        capacidades : array_like (B,)
+            Capacidades nominales de batería [kWh].
+
+        Returns
+        -------
+        SuperficieLOLP
+        """
+        demanda = np.asarray(demanda, dtype=float)
+        potencias = np.asarray(potencias, dtype=float).reshape(-1)
+        capacidades = np.asarray(capacidades, dtype=float).reshape(-1)
+        neto = np.asarray(generacion_kwp, dtype=float)[:, None] * potencias[None, :] - demanda[:, None]
+        columnas, baterias = np.meshgrid(np.arange(len(potencias)), np.arange(len(capacidades)), indexing="ij")
+        resultado = self._simular(self._variacion(neto), columnas.reshape(-1), capacidades[baterias.reshape(-1)],
+                                  demanda.sum())
+        forma = (len(potencias), len(capacidades))
+        return SuperficieLOLP(potencias, capacidades, {campo: valores.reshape(forma) for campo, valores in resultado.items()})
+
+    def _variacion(self, neto):
+        """Variación de la energía almacenada antes de aplicar los límites de la batería."""
+        return np.where(neto > 0, neto * self.eficiencia_carga, neto / self.eficiencia_descarga)
+
+    def _simular(self, delta, columnas, capacidades, demanda_total):
+        """Simula cada capacidad con la columna de delta (T, C) que le corresponde, por lotes."""
+        campos = ("energia_no_servida", "vertimiento", "horas_deficit", "ciclos", "soc_final")
+        resultado = {campo: np.empty(len(capacidades)) for campo in campos}
+        for inicio in range(0, len(capacidades), self.tamano_lote):
+            lote = slice(inicio, inicio + self.tamano_lote)
+            for campo, valores in self._simular_lote(delta[:, columnas[lote]], capacidades[lote]).items():
+                resultado[campo][lote] = valores
+        resultado["fraccion_no_servida"] = resultado["energia_no_servida"] / demanda_total if demanda_total > 0 \
+            else np.zeros(len(capacidades))
+        resultado["lolp"] = resultado["horas_deficit"] / len(delta)
+        return resultado
+
+    def _simular_lote(self, delta, capacidades):
+        maximo = capacidades
+        minimo = capacidades * (1.0 - self.profundidad_descarga)
+        soc = np.empty((len(delta) + 1, len(capacidades)))
+        soc[0] = minimo + (maximo - minimo) * self.soc_inicial
+        for t, variacion in enumerate(delta):
+            np.add(soc[t], variacion, out=soc[t + 1])
+            np.clip(soc[t + 1], minimo, maximo, out=soc[t + 1])
+
+        # Lo que los límites recortaron: positivo = vertimiento, negativo = déficit (en energía almacenada)
+        recorte = soc[:-1] + delta - soc[1:]
+        no_servida = np.maximum(-recorte, 0.0) * self.eficiencia_descarga
+        utilizable = maximo - minimo
+        descarga = np.maximum(soc[:-1] - soc[1:], 0.0).sum(axis=0)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            ciclos = np.where(utilizable > 0, descarga / utilizable, 0.0)
+        return {
+            "energia_no_servida": no_servida.sum(axis=0),
+            "vertimiento": (np.maximum(recorte, 0.0) / self.eficiencia_carga).sum(axis=0),
+            "horas_deficit": (no_servida > 1e-9).sum(axis=0),
+            "ciclos": ciclos,
+            "soc_final": soc[-1],
+        }
+
+
+class SuperficieLOLP:
+    """
+    Resultados de SimuladorSOC.superficie sobre la grilla potencia PV x capacidad de batería.
+
+    Attributes
+    ----------
+    potencias : ndarray (P,)
+        Potencias PV [kWp].
+    capacidades : ndarray (B,)
+        Capacidades de batería [kWh].
+    valores : dict
+        Arreglos (P, B): lolp, fraccion_no_servida, energia_no_servida, vertimiento,
+        horas_deficit, ciclos y soc_final.
+    """
+
+    def __init__(self, potencias, capacidades, valores):
+        self.potencias = potencias
+        self.capacidades = capacidades
+        self.valores = valores
+
+    def tabla(self, campo="lolp"):
+        """DataFrame potencias x capacidades de un campo, para reportes."""
+        import pandas as pd
+
+        return pd.DataFrame(self.valores[campo],
+                            index=pd.Index(self.potencias, name="PV [kWp]"),
+                            columns=pd.Index(self.capacidades, name="Batería [kWh]"))
+
+    def isocurva(self, objetivo):
+        """Menor capacidad de batería con LOLP <= objetivo para cada potencia PV (NaN si ninguna), (P,)."""
+        cumple = self.valores["lolp"] <= objetivo
+        return np.where(cumple.any(axis=1), self.capacidades[cumple.argmax(axis=1)], np.nan)
+
+    def minimo_costo(self, objetivo, precio_kwp, precio_kwh):
+        """
+        Combinación de menor costo (potencias x precio_kwp + capacidades x precio_kwh) entre
+        las que cumplen LOLP <= objetivo, o None si ninguna lo cumple.
+        """
+        costo = self.potencias[:, None] * precio_kwp + self.capacidades[None, :] * precio_kwh
+        costo = np.where(self.valores["lolp"] <= objetivo, costo, np.inf)
+        if not np.isfinite(costo).any():
+            return None
+        p, b = np.unravel_index(np.argmin(costo), costo.shape)
+        return {
+            "Potencia_PV": float(self.potencias[p]),
+            "Capacidad_Bateria": float(self.capacidades[b]),
+            "Costo": float(costo[p, b]),
+            **{campo: float(valores[p, b]) for campo, valores in self.valores.items()},
+        }
+
+
+def serie_anual_horaria(perfil, anio=2025):
+    """
+    Año cronológico (8760 h) a partir de un día tipo por mes.
+
+    Parameters
+    ----------
+    perfil : array_like (24 * p, 12)
+        Energía por intervalo de cada mes (p = 1 horario, p = 6 cada 10 minutos; los
+        intervalos se suman a horas).
+    anio : int
+        Año del calendario (ver stage.demanda.calendario).
+
+    Returns
+    -------
+    numpy.ndarray (8760,)
+    """
+    from stage.demanda import calendario
+
+    perfil = np.asarray(perfil, dtype=float)
+    pasos = len(perfil) // HORAS_DIA
+    horario = perfil.reshape(HORAS_DIA, pasos, 12).sum(axis=1)
+    meses, _ = calendario(anio)
+    return horario[:, meses].T.reshape(-1)
+
+
+def capacidad_kwh(capacidad_ah, cantidad=1, voltaje=VOLTAJE_SISTEMA):
+    """Capacidad nominal [kWh] de `cantidad` baterías de `capacidad_ah` [Ah] a `voltaje` [V]."""
+    return np.asarray(cantidad) * np.asarray(capacidad_ah, dtype=float) * voltaje / 1000.0
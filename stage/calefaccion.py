@@ -0,0 +1,159 @@
+import numpy as np
+from utils.pgen import get_almacen_pgen
+
+NOMBRES_MESES = ['Enero', 'Febrero', 'Marzo', 'Abril', 'Mayo', 'Junio',
+                 'Julio', 'Agosto', 'Septiembre', 'Octubre', 'Noviembre', 'Diciembre']
+
+# Curvas de una bomba de calor aire-aire típica: (temperatura exterior [°C], valor).
+# COP: calor entregado / electricidad consumida. Capacidad: fracción de la potencia nominal (a 7 °C).
+CURVA_COP = ((-15.0, 1.7), (-7.0, 2.2), (2.0, 2.8), (7.0, 3.4), (12.0, 4.0), (20.0, 4.8))
+CURVA_CAPACIDAD = ((-15.0, 0.60), (-7.0, 0.75), (2.0, 0.90), (7.0, 1.00), (12.0, 1.05), (20.0, 1.10))
+
+TEMPERATURA_BASE = 18.0      # Sin calefacción sobre esta temperatura exterior [°C]
+COP_RESPALDO = 1.0           # Resistencia eléctrica para la carga que la bomba no alcanza a cubrir
+COLUMNAS_CLIMA = ('Zona', 'Mes', 'Hora', 'Temperatura')
+
+
+class ModeloBombaCalor:
+    """
+    Demanda eléctrica de calefacción con bomba de calor, por grados-hora.
+
+    Para cada cliente, la carga térmica horaria es UA x max(0, T_base - T_ext), con UA
+    tal que a la temperatura de diseño (la mínima de su serie) la carga es la potencia
+    de calefacción de la encuesta (habitaciones x 2.63 kW). La bomba de calor, de potencia
+    nominal igual a esa carga, entrega hasta su capacidad a T_ext con el COP de T_ext; el
+    resto lo cubre una resistencia eléctrica. Todo se calcula sobre arreglos
+    (clientes, meses, horas).
+
+    Las temperaturas (12 meses x 24 horas) vienen de un CSV por zona (columnas Zona, Mes,
+    Hora, Temperatura; separador ';') o, si no se entrega, de la hoja 'temp' del PGEN
+    del cliente.
+
+    Parameters
+    ----------
+    path_clima : str, optional
+        CSV de temperaturas por zona. Tiene prioridad sobre la hoja 'temp' del PGEN.
+    path_pgen : str, optional
+        Carpeta de los PGEN (para la hoja 'temp').
+    almacen_pgen : AlmacenPGEN, optional
+        Almacén PGEN (si es None se usa el del proceso para path_pgen).
+    temperatura_base : float
+        Temperatura exterior de equilibrio [°C].
+    curva_cop, curva_capacidad : sequence of (float, float)
+        Puntos (temperatura, valor), interpolados linealmente y constantes fuera del rango.
+    """
+
+    def __init__(self, path_clima=None, path_pgen=None, almacen_pgen=None, temperatura_base=TEMPERATURA_BASE,
+                 curva_cop=CURVA_COP, curva_capacidad=CURVA_CAPACIDAD):
+        self.path_clima = path_clima
+        self.path_pgen = path_pgen
+        self.almacen_pgen = almacen_pgen
+        self.temperatura_base = temperatura_base
+        self.curva_cop = np.asarray(curva_cop, dtype=float).T
+        self.curva_capacidad = np.asarray(curva_capacidad, dtype=float).T
+        self._clima = None  # zona -> ndarray (12, 24) [°C]
+
+    def cargar_clima(self):
+        """Temperaturas del CSV por zona (se lee una sola vez); {} si no hay CSV."""
+        if self._clima is None:
+            self._clima = {}
+            if self.path_clima:
+                import pandas as pd
+                datos = pd.read_csv(self.path_clima, delimiter=';')
+                faltantes = set(COLUMNAS_CLIMA) - set(datos.columns)
+                if faltantes:
+                    raise ValueError(f"❌ Faltan columnas en {self.path_clima}: {', '.join(sorted(faltantes))}")
+                for zona, filas in datos.groupby('Zona'):
+                    matriz = np.full((12, 24), np.nan)
+                    matriz[filas['Mes'].to_numpy(dtype=int) - 1, filas['Hora'].to_numpy(dtype=int)] = filas['Temperatura']
+                    if np.isnan(matriz).any():
+                        raise ValueError(f"❌ La zona {zona} de {self.path_clima} no tiene los 12 meses x 24 horas")
+                    self._clima[str(zona)] = matriz
+        return self._clima
+
+    def temperaturas(self, indice, zona):
+        """Temperaturas (12, 24) [°C] del cliente: CSV de su zona o hoja 'temp' de su PGEN; None si no hay."""
+        clima = self.cargar_clima()
+        if clima:
+            return clima.get(zona)
+        if self.almacen_pgen is None:
+            if self.path_pgen is None:
+                return None
+            self.almacen_pgen = get_almacen_pgen(self.path_pgen)
+        try:
+            return self.almacen_pgen.temperaturas(indice)
+        except (FileNotFoundError, KeyError, ValueError):
+            return None
+
+    def temperaturas_bloque(self, indices, zonas):
+        """
+        Temperaturas de N clientes.
+
+        Returns
+        -------
+        tuple
+            (ndarray (N, 12, 24) [°C], ndarray bool (N,) de clientes con temperaturas).
+        """
+        temperaturas = np.zeros((len(indices), 12, 24))
+        disponibles = np.zeros(len(indices), dtype=bool)
+        for i, (indice, zona) in enumerate(zip(indices, zonas)):
+            serie = self.temperaturas(indice, zona)
+            if serie is not None:
+                temperaturas[i] = serie
+                disponibles[i] = True
+        return temperaturas, disponibles
+
+    def demanda(self, temperaturas, carga_diseno):
+        """
+        Potencia eléctrica de calefacción.
+
+        Parameters
+        ----------
+        temperaturas : ndarray (N, 12, 24)
+            Temperatura exterior [°C].
+        carga_diseno : ndarray (N,)
+            Carga térmica a la temperatura de diseño = potencia nominal de la bomba [kW].
+
+        Returns
+        -------
+        dict
+            electrica, termica y respaldo: ndarray (N, 12, 24) [kW]; cop: ndarray (N, 12, 24).
+        """
+        temperaturas = np.asarray(temperaturas, dtype=float)
+        carga_diseno = np.asarray(carga_diseno, dtype=float)
+        t_diseno = temperaturas.min(axis=(1, 2))
+        salto_diseno = self.temperatura_base - t_diseno
+        with np.errstate(divide="ignore", invalid="ignore"):
+            ua = np.where(salto_diseno > 0, carga_diseno / salto_diseno, 0.0)  # [kW/K]
+        grados_hora = np.maximum(0.0, self.temperatura_base - temperaturas)
+        termica = ua[:, None, None] * grados_hora
+
+        cop = np.interp(temperaturas, self.curva_cop[0], self.curva_cop[1])
+        capacidad = carga_diseno[:, None, None] * np.interp(temperaturas, self.curva_capacidad[0],
+                                                            self.curva_capacidad[1])
+        bomba = np.minimum(termica, capacidad)
+        respaldo = termica - bomba
+        return {
+            "electrica": bomba / cop + respaldo / COP_RESPALDO,
+            "termica": termica,
+            "respaldo": respaldo,
+            "cop": cop,
+        }
+
+    def perfil(self, indice, zona, carga_diseno):
+        """
+        Perfil eléctrico de calefacción de un cliente, (24, 12) [kW] (horas x meses, como
+        las columnas de Cliente.function_heat), o None si no hay temperaturas.
+        """
+        serie = self.temperaturas(indice, zona)
+        if serie is None:
+            return None
+        return self.demanda(serie[None, :, :], [carga_diseno])["electrica"][0].T
+
+
+def scop_mensual(resultado):
+    """SCOP de cada mes (calor entregado / electricidad) a partir de ModeloBombaCalor.demanda, (N, 12)."""
+    termica = resultado["termica"].sum(axis=2)
+    electrica = resultado["electrica"].sum(axis=2)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(electrica > 0, termica / electrica, np.nan)
@@ -1,15 +1,31 @@
 import numpy as np
 import pandas as pd
-import matplotlib.pyplot as plt
+from utils.perf import medir
+from utils.consumo import get_almacen_consumo
+from utils.referencia import leer_tabla
+from utils.reportes import DETALLE, RESUMEN, Reportes, tabla
+from stage.calefaccion import scop_mensual
 
 
 class Cliente:
-    def __init__(self, indice, datos, path_consumo_base, path_consumo_extra, path_BBDD_clientes, path_consumo_zona, vector_prueba=None, cliente_actual=None, logger=None):
+    def __init__(self, indice, datos, path_consumo_base, path_consumo_extra, path_BBDD_clientes, path_consumo_zona, vector_prueba=None, cliente_actual=None, logger=None, medidor=None, almacen=None, almacen_consumo=None, reportes=None, eventos=None, resolucion_minutos=60, modelo_calefaccion=None, memo=None):
+        if resolucion_minutos not in (60, 10):
+            raise ValueError(f"❌ Resolución no soportada: {resolucion_minutos} min (usar 60 o 10).")
         self.indice = indice
         self.datos = datos
         self.cliente_actual = cliente_actual
         self.logger = logger  # Logger recibido desde el Gestor
+        self.medidor = medidor  # Medidor de rendimiento recibido desde el Gestor (opcional)
+        self.eventos = eventos  # Registro de eventos JSONL (opcional, ver utils.eventos)
+        self.reportes = reportes if reportes is not None else Reportes()  # Tablas según verbosidad (ver utils.reportes)
+        self.almacen = almacen  # Almacén de tablas de referencia (opcional, ver utils.referencia)
+        self.almacen_consumo = almacen_consumo  # Consumos mensuales BBDD_Clientes (si es None se usa el del proceso)
         self.tipo_zona = datos.get('Zona', 'No aplica')
+        self.resolucion_minutos = resolucion_minutos  # 60: perfil anual 24x12; 10: perfil anual 144x12 (float32)
+        self.pasos_por_hora = 60 // resolucion_minutos
+        self.modelo_calefaccion = modelo_calefaccion  # ModeloBombaCalor (opcional, ver stage.calefaccion); None = perfil por zona
+        self.memo = memo  # MemoDemanda: perfiles ya calculados por firma (opcional, ver utils.memo)
+        self.origen_memo = None  # 'memoria', 'disco' o None si el perfil se calculó (ver ejecutar)
         self.path_consumo_base = path_consumo_base
         self.path_consumo_extra = path_consumo_extra
         self.path_consumo_zona = path_consumo_zona 
@@ -23,66 +39,134 @@ class Cliente:
         self.df_consumo_extra_resumen = None                                               
         self.df_cliente_filtrado = None      # DataFrame filtrado de consumo extra del cliente                       
         self.df_cliente_total = None        # DataFrame de consumo total del cliente
+        self.df_componentes_base = None     # Columnas del perfil base que usa el cliente (ver simular_ocupacion)
+        self.perfil_calefaccion = None      # Calefacción por intervalo y mes, si el cliente la desea
         self.factor_mes_cliente = None  # Factor de escala mensual del cliente
         self.factor_dia = None          # Factor de escala dia del cliente
         self.pdem_escalado = None   # Perfil horario escalado del cliente
         self.perfil_1h = None  # Perfil de consumo reducido a 1 hora
+        self.perfil_10min = None  # Perfil de consumo escalado de 10 minutos (144 valores)
         self.inicio_invierno = None  # Mes de inicio del invierno según la zona
         self.fin_invierno = None  # Mes de fin del invierno según la zona
-        self.consumo_anual = None # Matriz de consumo anual (24x12)
+        self.consumo_anual = None # Matriz de consumo anual (24x12, o 144x12 con resolución de 10 minutos)
         self.factores_trapezoidales = None  # Factores trapezoidales de calefacción
         self.m2_calefaccion = None
         self.btu_requeridos = None
         self.costo_calefaccion = None
         self.potencia_calefaccion = None
         self.perfil_demanda_cliente = None
-        self.Dem_Max = None           #Cambio 17-02-26
+        self.Dem_Max = None           #Cambio 17-02-26 (con resolución de 10 minutos: máximo de 10 minutos)
 
-    def log(self, mensaje):
-        """Wrapper para loggear mensajes usando el logger centralizado"""
+    def log(self, mensaje, *args, nivel="INFO"):
+        """Wrapper para loggear mensajes usando el logger centralizado (args al estilo %, formateo diferido)"""
         if self.logger:
-            self.logger.log(mensaje, prefijo=f"Cliente")
+            self.logger.log(mensaje, *args, prefijo=f"Cliente", nivel=nivel)
         else:
-            print(f"[Cliente] {mensaje}")
+            print(f"[Cliente] {mensaje % args if args else mensaje}")
+        if self.eventos is not None and (self.logger is None or self.logger.habilitado(nivel)):
+            self.eventos.emitir("Cliente", mensaje=mensaje % args if args else mensaje, nivel=nivel)
 
     def ejecutar(self, ruta_perfil_base = None, ruta_perfil_extra = None, path_BBDD_clientes = None):
         print("---")
         print("\n🚀 Iniciando ejecución de cálculos para el cliente.")
         self.log("Iniciando ejecución de cálculos para el cliente.")
         
+        # Detalle de la encuesta sólo en nivel DEBUG (en INFO no se formatea)
         for key, value in self.datos.items():
-            self.log(f"{key:35}: {value}".format(key=key, value=value))
+            self.log("%-35s: %s", key, value, nivel="DEBUG")
         """Método principal que ejecuta todos los cálculos del cliente"""
+        # Clientes con la misma firma tienen el mismo perfil: se reutiliza el del memo
+        clave_memo = None
+        if self.memo is not None and (ruta_perfil_base, ruta_perfil_extra, path_BBDD_clientes) == (None, None, None):
+            with medir(self.medidor, "Cliente", "memo") as registro:
+                firma = self.firma()
+                if firma is not None:
+                    clave_memo = self.memo.clave(firma, archivos=(
+                        self.path_consumo_base, self.path_consumo_extra,
+                        self.path_BBDD_clientes, self.path_consumo_zona))
+                    self.origen_memo, salida = self.memo.obtener(clave_memo)
+                registro["origen"] = self.origen_memo
+            if self.origen_memo is not None:
+                self.perfil_consumo_total_anual, self.Dem_Max = salida
+                self.log("♻️ Perfil de demanda recuperado del memo (%s) por firma del cliente.", self.origen_memo)
+                return self.perfil_consumo_total_anual, self.Dem_Max
         ##Carga de Perfiles
         if ruta_perfil_base is None:
             ruta_perfil_base = self.path_consumo_base  # ✅ usa el del constructor si no se pasa
-        self.cargar_perfil_consumo_base(ruta_perfil_base)
+        with medir(self.medidor, "Cliente", "cargar_perfil_consumo_base"):
+            self.cargar_perfil_consumo_base(ruta_perfil_base)
         if ruta_perfil_extra is None:
             ruta_perfil_extra = self.path_consumo_extra
-        self.cargar_perfil_consumo_extra(ruta_perfil_extra)
+        with medir(self.medidor, "Cliente", "cargar_perfil_consumo_extra"):
+            self.cargar_perfil_consumo_extra(ruta_perfil_extra)
         ## Cálculos 
-        self.extender_vector_por_cine()
-        self.calcular_numero_luces_perfil_extra()
-        self.calculo_consumo_total_perfil_base()
-        self.filtrar_consumo_por_dispositivos_cliente()
-        self.resumir_consumo_extra()
-        self.consumo_baseyextra_total()
         if path_BBDD_clientes is None:
             path_BBDD_clientes = self.path_BBDD_clientes
-        self.generador_factor_meses(path_BBDD_clientes)
-        self.agrupar_perfil_horario()
-        self.calculo_consumo_anual()
-        self.obtener_rango_invierno()
-        self.calcular_factores_trapezoidales()
-        self.function_heat(self.path_consumo_zona)
-
+        pasos = [
+            ("extender_vector_por_cine", self.extender_vector_por_cine),
+            ("calcular_numero_luces_perfil_extra", self.calcular_numero_luces_perfil_extra),
+            ("calculo_consumo_total_perfil_base", self.calculo_consumo_total_perfil_base),
+            ("filtrar_consumo_por_dispositivos_cliente", self.filtrar_consumo_por_dispositivos_cliente),
+            ("resumir_consumo_extra", self.resumir_consumo_extra),
+            ("consumo_baseyextra_total", self.consumo_baseyextra_total),
+            ("generador_factor_meses", lambda: self.generador_factor_meses(path_BBDD_clientes)),
+            ("agrupar_perfil_horario", self.agrupar_perfil_horario),
+            ("calculo_consumo_anual", self.calculo_consumo_anual),
+            ("obtener_rango_invierno", self.obtener_rango_invierno),
+            ("calcular_factores_trapezoidales", self.calcular_factores_trapezoidales),
+            ("function_heat", lambda: self.function_heat(self.path_consumo_zona)),
+        ]
+        for nombre, paso in pasos:
+            with medir(self.medidor, "Cliente", nombre):
+                paso()
+
+        if clave_memo is not None:
+            self.memo.guardar(clave_memo, (self.perfil_consumo_total_anual, self.Dem_Max))
         return self.perfil_consumo_total_anual, self.Dem_Max      #Cambio 17-02-26 se agrego Dem_Max
 
+    def firma(self):
+        """
+        Entradas que determinan el perfil anual y Dem_Max del cliente (ver utils.memo).
+
+        Returns
+        -------
+        dict or None
+            Firma canónica, o None si el cliente no tiene fila en BBDD_Clientes (se
+            calcula sin memo para que ejecutar() informe el error).
+        """
+        almacen_consumo = self.almacen_consumo
+        if almacen_consumo is None or almacen_consumo.ruta_csv != self.path_BBDD_clientes:
+            almacen_consumo = get_almacen_consumo(self.path_BBDD_clientes)
+        if not 0 < self.indice <= len(almacen_consumo):
+            return None
+        teletrabajo = self.datos.get('Teletrabajo', '')
+        firma = {
+            "vector": None if self.vector_prueba is None else list(self.vector_prueba),
+            "habitaciones": self.datos.get('N° habitaciones', 0),
+            "banos": self.datos.get('N° baños', 0),
+            "teletrabajo": teletrabajo.strip() if isinstance(teletrabajo, str) else teletrabajo,
+            "tipo_zona": self.datos.get('Tipo Zona'),
+            "desea_calefaccion": self.datos.get('Desea calefacción', 'No'),
+            "habitaciones_calefaccion": self.datos.get('N° habitaciones que quiere calefaccionar', 0),
+            "consumos": almacen_consumo.consumos(self.indice),
+            "resolucion_minutos": self.resolucion_minutos,
+            "calefaccion": None,
+        }
+        if self.modelo_calefaccion is not None:
+            modelo = self.modelo_calefaccion
+            firma["calefaccion"] = {
+                "temperaturas": modelo.temperaturas(self.indice, firma["tipo_zona"]),
+                "temperatura_base": modelo.temperatura_base,
+                "curva_cop": modelo.curva_cop,
+                "curva_capacidad": modelo.curva_capacidad,
+            }
+        return firma
+
     def cargar_perfil_consumo_base(self, ruta_archivo):
         print("---")
         print("\n📊 Cargando perfil base de consumo desde:", ruta_archivo)
         try:
-            self.df_consumo_base = pd.read_excel(ruta_archivo, nrows=144)
+            self.df_consumo_base = leer_tabla(self.almacen, ruta_archivo, nrows=144)
             print()
             print("📊 Perfil base de consumo cargado correctamente.")
         except Exception as e:
@@ -93,7 +177,7 @@ class Cliente:
         print("---")
         print("\n📊 Cargando perfil extra de consumo desde:", ruta_archivo)    
         try:
-            self.df_consumo_extra = pd.read_excel(ruta_archivo, nrows=144)
+            self.df_consumo_extra = leer_tabla(self.almacen, ruta_archivo, nrows=144)
             print("📊 Perfil extra de consumo cargado correctamente.")
         except Exception as e:
             print(f"❌ Error al cargar perfil extra de consumo: {e}")
@@ -111,8 +195,7 @@ class Cliente:
 
         # Copia segura del vector actual
         vector_extendido = self.vector_prueba.copy()
-        print("Vector")
-        print(vector_extendido)
+        self.reportes.agregar("Cliente", "Vector", lambda v=tuple(vector_extendido): list(v), nivel=DETALLE)
 
         # Evaluar el último valor del vector
         ultimo_valor = vector_extendido[-1]
@@ -122,9 +205,8 @@ class Cliente:
 
         # Guardar en nuevo atributo sin sobrescribir el original
         self.vector_prueba_extendido = vector_extendido
-        print()
-        print("🧩 Vector con consumos domésticos extendido (con Cine en casa):")
-        print(self.vector_prueba_extendido)
+        self.reportes.agregar("Cliente", "\n🧩 Vector con consumos domésticos extendido (con Cine en casa):",
+                              lambda v=tuple(vector_extendido): list(v), nivel=DETALLE)
 
     def calcular_numero_luces_perfil_extra(self):
         print("---")
@@ -165,6 +247,8 @@ class Cliente:
                 df['Consumo_Total'] = df.iloc[:, 2:].sum(axis=1)
             else:
                 df['Consumo_Total'] = df.iloc[:, 2:14].sum(axis=1)
+            columnas_uso = list(df.columns[2:-1]) if home_office == 'Si' else list(df.columns[2:14])
+            self.df_componentes_base = df[['Hour', 'Minute'] + columnas_uso]
 
             self.consumo_total = df[['Hour', 'Minute', 'Consumo_Total']]
             print()
@@ -197,10 +281,11 @@ class Cliente:
             df_filtrado = self.df_consumo_extra[columnas_seleccionadas].mul(self.vector_prueba_extendido, axis=1)
             suma_columnas = df_filtrado.sum()
             suma_mayor_a_cero = suma_columnas[suma_columnas > 0]
-            print("\n📊 Consumo de electrodomésticos Extra del cliente:")
-          
-            for dispositivo, consumo in suma_mayor_a_cero.items():
-                print("{:28}: {:>5.2f} [kWh/dia]".format(dispositivo, consumo))
+            self.reportes.agregar(
+                "Cliente", "\n📊 Consumo de electrodomésticos Extra del cliente:",
+                lambda: tabla("{:28}: {:>5.2f} [kWh/dia]".format(dispositivo, consumo)
+                              for dispositivo, consumo in suma_mayor_a_cero.items()),
+                nivel=RESUMEN)
 
             # Agregar columnas Hour y Minute nuevamente si están
             if 'Hour' in self.df_consumo_extra.columns and 'Minute' in self.df_consumo_extra.columns:
@@ -287,8 +372,10 @@ class Cliente:
         print("---")
         print("\n📊 Generando factores mensuales de consumo para el cliente...")
         try:
-            # Cargar la base de datos de clientes
-            data_BBDD = pd.read_csv(path_csv, delimiter=';')
+            # Base de datos de clientes (matriz cargada una sola vez por proceso, ver utils.consumo)
+            if self.almacen_consumo is None or self.almacen_consumo.ruta_csv != path_csv:
+                self.almacen_consumo = get_almacen_consumo(path_csv)
+            n_clientes = len(self.almacen_consumo)
 
             # Extraer nombre del cliente actual
             # client_name = self.cliente_actual['Nombre']
@@ -296,8 +383,8 @@ class Cliente:
             # print("\nLista de Clientes")
 
             # Usar directamente el índice previamente capturado
-            if 0 < self.indice <= len(data_BBDD):
-                cliente_info = data_BBDD.iloc[self.indice].copy()
+            if 0 < self.indice <= n_clientes:
+                client_values = self.almacen_consumo.consumos(self.indice)
             else:
                 raise IndexError(f"Índice {self.indice} fuera del rango de la base de datos.")
 
@@ -309,31 +396,31 @@ class Cliente:
 
             # Extraer los valores de consumo mensual y convertir a lista
             # client_values = cliente_info.iloc[:, 1:].values.flatten().tolist()
-            client_values = cliente_info.iloc[1:].values.flatten().tolist() 
             meses = ['Ene', 'Feb', 'Mar', 'Abr', 'May', 'Jun',
                      'Jul', 'Ago', 'Sep', 'Oct', 'Nov', 'Dic']
             
-            print("Coonsumo Anual")
-            for x in range(12):
-                print("{:}: {:d} [kWh/mes]".format(meses[x], client_values[x]))
+            self.reportes.agregar(
+                "Cliente", "Coonsumo Anual",
+                lambda: tabla("{:}: {:d} [kWh/mes]".format(meses[x], client_values[x]) for x in range(12)),
+                nivel=RESUMEN)
             
             # Encontrar el valor máximo de consumo mensual
             max_dem = max(client_values)
             print("Demanda máxima: ", max_dem)
 
-            # Calcular el factor mensual
-            factor_mes = [round(val / max_dem,5) for val in client_values]
-            print()
-            print("Factores mes\n")
-            for n in range(12):
-                print(f"{meses[n]}: {factor_mes[n]:.2f} [-]")
+            # Factor mensual round(val / max_dem, 5), precalculado para todos los clientes
+            factor_mes = self.almacen_consumo.factor_mes(self.indice)
+            self.reportes.agregar(
+                "Cliente", "\nFactores mes\n",
+                lambda: tabla(f"{meses[n]}: {factor_mes[n]:.2f} [-]" for n in range(12)),
+                nivel=RESUMEN)
 
             # Guardar el DataFrame con factores mensuales
             self.factor_mes_cliente = pd.DataFrame(factor_mes, columns=["Factor"])
 
              # Cálculo del factor diario
             energia_dia = self.df_cliente_total['Consumo_Total'].sum()  # kWh/día aprox
-            factor_dia = (max_dem / 30) / energia_dia
+            factor_dia = self.almacen_consumo.factor_dia(self.indice, energia_dia)
             self.factor_dia = factor_dia
             
             print("\n📆 Consumo diario estimado del perfil:", round(energia_dia, 2), "[kWh/día]")
@@ -381,14 +468,19 @@ class Cliente:
                     contador = 0
 
             self.perfil_1h = pd.DataFrame(consumo_1h, columns=["Consumo_Total_1h"])
-            print()
-            print("📉 Perfil de consumo reducido a 1 hora:")
-            print(self.perfil_1h['Consumo_Total_1h'])
+            self.reportes.agregar("Cliente", "\n📉 Perfil de consumo reducido a 1 hora:",
+                                  lambda serie=self.perfil_1h['Consumo_Total_1h']: serie, nivel=DETALLE)
             print(f"\n🔍 Consumo total original (10min): {sum(perfil_10min):.2f} kWh")
             print(f"🔍 Consumo total resumido (1h): {sum(consumo_1h):.2f} kWh")
 
             self.Dem_Max = max(consumo_1h)  # Guardar la demanda máxima del perfil horario para uso posterior
             print("Demanda máxima del perfil horario (1h): {:.2f} kWh".format(self.Dem_Max))
+
+            if self.pasos_por_hora > 1:
+                # Resolución de 10 minutos: Dem_Max es la energía máxima en 10 minutos (x6 = potencia pico real)
+                self.perfil_10min = perfil_10min
+                self.Dem_Max = max(perfil_10min)
+                print("Demanda máxima del perfil de 10 minutos: {:.3f} kWh ({:.2f} kW)".format(self.Dem_Max, self.Dem_Max * 6))
         except Exception as e:
             print(f"❌ Error en agrupar_perfil_horario: {e}")
 
@@ -405,22 +497,28 @@ class Cliente:
         consumo_horario = self.perfil_1h['Consumo_Total_1h'] if isinstance(self.perfil_1h, pd.DataFrame) else self.perfil_1h
         
         factores_mensuales = self.factor_mes_cliente['Factor'] if isinstance(self.factor_mes_cliente, pd.DataFrame) else self.factor_mes_cliente
-        print()
-        print('Factores Mensuales del cliente:')
-        for i in range(12):
-            print(f"{nombres_meses[i]:11}: {factores_mensuales[i]:.2f} [-]")
-
-        self.consumo_anual = pd.DataFrame(
-            data=[[round(h * f, 3) for f in factores_mensuales] for h in consumo_horario],
-            columns=nombres_meses,
-            index=[str(i) for i in range(24)]
-        )
+        self.reportes.agregar(
+            "Cliente", "\nFactores Mensuales del cliente:",
+            lambda: tabla(f"{nombres_meses[i]:11}: {factores_mensuales[i]:.2f} [-]" for i in range(12)),
+            nivel=RESUMEN)
+
+        if self.pasos_por_hora > 1:
+            # 144x12 sin redondeo: cada valor es la energía de un intervalo de 10 minutos
+            self.consumo_anual = pd.DataFrame(
+                data=self.perfil_10min[:, None] * np.asarray(factores_mensuales, dtype=float)[None, :],
+                columns=nombres_meses,
+                index=np.arange(len(self.perfil_10min))
+            )
+        else:
+            self.consumo_anual = pd.DataFrame(
+                data=[[round(h * f, 3) for f in factores_mensuales] for h in consumo_horario],
+                columns=nombres_meses,
+                index=[str(i) for i in range(24)]
+            )
         
         print("\n📊 Generando matriz de consumo anual...")
-        print()
-        print()
-        print("📅 Matriz de consumo anual (kWh por hora para cada mes):")
-        print(self.consumo_anual)
+        self.reportes.agregar("Cliente", "\n\n📅 Matriz de consumo anual (kWh por hora para cada mes):",
+                              lambda df=self.consumo_anual: df, nivel=DETALLE)
 
     def obtener_rango_invierno(self):
         """
@@ -447,9 +545,10 @@ class Cliente:
             self.fin_invierno = meses_invierno_por_zona[zona]['fin']
             print(f"Zona del cliente: {zona}")
             print(f"🌨️ Rango de invierno para zona {zona}: {nombres_meses[self.inicio_invierno - 1]} a {nombres_meses[self.fin_invierno - 1]}.")
-            print(f"📌 Meses de invierno:")
-            for m in range(self.inicio_invierno, self.fin_invierno + 1):
-                print(f"- {nombres_meses[m - 1]}")
+            self.reportes.agregar(
+                "Cliente", "📌 Meses de invierno:",
+                lambda meses=range(self.inicio_invierno, self.fin_invierno + 1): tabla(f"- {nombres_meses[m - 1]}" for m in meses),
+                nivel=RESUMEN)
         else:
             print("Zona no reconocida. Se usará rango por defecto (junio-agosto).")
             self.inicio_invierno = 6
@@ -480,12 +579,14 @@ class Cliente:
 
         self.factores_trapezoidales = factores
 
-        print("📊 Factores trapezoidales de calefacción:\n")
         meses = ['Ene', 'Feb', 'Mar', 'Abr', 'May', 'Jun', 'Jul', 'Ago', 'Sep', 'Oct', 'Nov', 'Dic']
-        for i in range(12):
-            print(f"{meses[i]}: {factores[i]:.2f} [-]")
+        self.reportes.agregar(
+            "Cliente", "📊 Factores trapezoidales de calefacción:\n",
+            lambda: tabla(f"{meses[i]}: {factores[i]:.2f} [-]" for i in range(12)),
+            nivel=RESUMEN)
 
-        # Opcional: Mostrar gráfico
+        # Opcional: Mostrar gráfico (importar matplotlib solo si se habilita)
+        # import matplotlib.pyplot as plt
         # meses = ['Ene', 'Feb', 'Mar', 'Abr', 'May', 'Jun', 'Jul', 'Ago', 'Sep', 'Oct', 'Nov', 'Dic']
         # plt.figure(figsize=(10, 4))
         # plt.plot(meses, factores, marker='o', linestyle='-', color='black')
@@ -516,32 +617,63 @@ class Cliente:
             CLP_heat = Rooms_heat * 301.717
             POT_kW = Rooms_heat * 2.63
 
-            data_Zone_Heat = pd.read_excel(path_zone_heat)
+            data_Zone_Heat = leer_tabla(self.almacen, path_zone_heat)
             horas = data_Zone_Heat['T'].tolist()
+            pasos = self.pasos_por_hora
 
-            Perfil_Mensual = pd.DataFrame(index=horas)
+            Perfil_Mensual = pd.DataFrame(index=np.arange(len(horas) * pasos))
             #print("Zona del cliente: \n", zona_cliente)
-            print(f"Perfil Calefacción base para zona {zona_cliente} [kW]:")
-            print("Hora  | Potencia [kW]")
-            for h, val in zip(data_Zone_Heat['T'], data_Zone_Heat[zona_cliente]):
-                print(f"{h:02d}:00 | {val:6.2f}")
+            self.reportes.agregar(
+                "Cliente", f"Perfil Calefacción base para zona {zona_cliente} [kW]:",
+                lambda: tabla((f"{h:02d}:00 | {val:6.2f}" for h, val in zip(data_Zone_Heat['T'], data_Zone_Heat[zona_cliente])),
+                              encabezado=["Hora  | Potencia [kW]"]),
+                nivel=DETALLE)
 
             #print(data_Zone_Heat[zona_cliente])
             print("\nTotal de calefacción requerida : {} [kWh/dia][Zona {}]\n".format(data_Zone_Heat[zona_cliente].sum(), zona_cliente))
-            print("{:11} | {:6} [-] | {:6} [kW]".format("Mes", "Factor", "POT_kW"))
+            self.reportes.agregar(
+                "Cliente", "Factores de calefacción por mes:",
+                lambda pot=POT_kW: tabla(("{:11} | {:^10.2f} | {:6.2f} ".format(nombres_meses[i], factor, pot)
+                                          for i, factor in enumerate(Factores_meses)),
+                                         encabezado=["{:11} | {:6} [-] | {:6} [kW]".format("Mes", "Factor", "POT_kW")]),
+                nivel=RESUMEN)
+            # Bomba de calor por grados-hora (si hay temperaturas para el cliente); si no, perfil por zona
+            perfil_bomba = None
+            if self.modelo_calefaccion is not None:
+                perfil_bomba = self.modelo_calefaccion.perfil(self.indice, zona_cliente, POT_kW)
+                if perfil_bomba is None:
+                    print("⚠️ Sin temperaturas para el cliente: se usa el perfil de calefacción por zona.")
+                else:
+                    print("\n🌡️ Calefacción con bomba de calor (grados-hora): {:.2f} [kWh/dia] promedio".format(
+                        perfil_bomba.sum(axis=0).mean()))
+                    self.reportes.agregar(
+                        "Cliente", "SCOP mensual de la bomba de calor:",
+                        lambda modelo=self.modelo_calefaccion, pot=POT_kW: tabla(
+                            f"{nombres_meses[i]:11}: {scop:5.2f} [-]" for i, scop in enumerate(scop_mensual(
+                                modelo.demanda(modelo.temperaturas(self.indice, zona_cliente)[None], [pot]))[0])),
+                        nivel=RESUMEN)
             for i, factor in enumerate(Factores_meses):
-                print("{:11} | {:^10.2f} | {:6.2f} ".format(nombres_meses[i], factor, POT_kW))
-                columna = data_Zone_Heat[zona_cliente] * factor * POT_kW
-                Perfil_Mensual[nombres_meses[i]] = columna.values
+                if perfil_bomba is not None:
+                    columna = pd.Series(perfil_bomba[:, i])
+                else:
+                    columna = data_Zone_Heat[zona_cliente] * factor * POT_kW
+                if pasos > 1:
+                    # Potencia horaria [kW] -> energía de cada intervalo [kWh]
+                    Perfil_Mensual[nombres_meses[i]] = np.repeat(columna.values, pasos) / pasos
+                else:
+                    Perfil_Mensual[nombres_meses[i]] = columna.values
 
             # Sumar al perfil existente si desea calefacción
-            Perfil_Demanda_Cliente = pd.DataFrame(0, index=np.arange(24), columns=nombres_meses)
+            Perfil_Demanda_Cliente = pd.DataFrame(0, index=np.arange(24 * pasos), columns=nombres_meses)
             if info_cliente.get('Desea calefacción', 'No') == 'Si':
+                self.perfil_calefaccion = Perfil_Mensual
                 for mes in nombres_meses:
                     Perfil_Demanda_Cliente[mes] = Perfil_Mensual[mes].values + self.consumo_anual[mes].values
             else:
                 Perfil_Demanda_Cliente = self.consumo_anual.copy()
                 M2_heat = BTU_heat = CLP_heat = POT_kW = 0
+            if pasos > 1:
+                Perfil_Demanda_Cliente = Perfil_Demanda_Cliente.astype(np.float32)  # 1728 valores, en float32
 
             # Guardar resultados en atributos
             self.m2_calefaccion = M2_heat
@@ -550,11 +682,59 @@ class Cliente:
             self.potencia_calefaccion = POT_kW
             self.perfil_consumo_total_anual = Perfil_Demanda_Cliente
             # Log para inspección
-            print("📊 Perfil de demanda con calefacción ajustado:")
-            print(self.perfil_consumo_total_anual)
+            self.reportes.agregar("Cliente", "📊 Perfil de demanda con calefacción ajustado:",
+                                  lambda df=self.perfil_consumo_total_anual: df, nivel=DETALLE)
 
         except Exception as e:
             print(f"❌ Error en function_heat: {e}")
 
     
 
+    def simular_ocupacion(self, simulador=None, percentiles=(50, 90)):
+        """
+        Demanda estocástica del cliente: Monte Carlo de los horarios y duraciones de uso
+        de cada electrodoméstico (ver stage.ocupacion). Requiere haber llamado a ejecutar().
+
+        Returns
+        -------
+        dict
+            perfiles {p: DataFrame} con el formato de perfil_consumo_total_anual (calefacción
+            incluida), dem_max ndarray (n_sorteos,) a la resolución de Dem_Max,
+            dem_max_percentiles {p: float}, dem_max_media, n_sorteos y semilla.
+        """
+        from stage.ocupacion import SimuladorOcupacion, percentiles_perfil
+
+        simulador = simulador if simulador is not None else SimuladorOcupacion()
+        nombres_meses = ['Enero', 'Febrero', 'Marzo', 'Abril', 'Mayo', 'Junio',
+                         'Julio', 'Agosto', 'Septiembre', 'Octubre', 'Noviembre', 'Diciembre']
+        # Un perfil de 10 minutos por electrodoméstico, alineados como en consumo_baseyextra_total
+        componentes = pd.merge(self.df_componentes_base, self.df_cliente_filtrado, on=['Hour', 'Minute'],
+                               how='outer', suffixes=('_Base', '_Extra')).drop(columns=['Hour', 'Minute']).fillna(0)
+        componentes = componentes.loc[:, componentes.sum() > 0]
+
+        with medir(self.medidor, "Cliente", "simular_ocupacion", sorteos=simulador.n_sorteos):
+            sorteos = simulador.sortear(componentes.to_numpy(dtype=float).T) * self.factor_dia
+            resultado = percentiles_perfil(sorteos, percentiles, self.pasos_por_hora)
+
+        factores = np.asarray(self.factor_mes_cliente['Factor'], dtype=float)
+        dtype = np.float32 if self.pasos_por_hora > 1 else float
+        perfiles = {}
+        for p, perfil in resultado["perfiles"].items():
+            anual = perfil[:, None] * factores[None, :]
+            if self.perfil_calefaccion is not None:
+                anual = anual + self.perfil_calefaccion.to_numpy(dtype=float)
+            perfiles[p] = pd.DataFrame(anual.astype(dtype), index=np.arange(len(perfil)), columns=nombres_meses)
+        resultado["perfiles"] = perfiles
+        resultado["dem_max_media"] = float(resultado["dem_max"].mean())
+        resultado["n_sorteos"] = simulador.n_sorteos
+        resultado["semilla"] = simulador.semilla
+
+        self.log("Monte Carlo de ocupación: %d sorteos (semilla %s) con %d electrodomésticos",
+                 simulador.n_sorteos, simulador.semilla, componentes.shape[1])
+        self.reportes.agregar(
+            "Cliente", "\n🎲 Demanda máxima por sorteos de ocupación:",
+            lambda r=resultado: tabla([f"{'Media':8}: {r['dem_max_media']:.3f} [kWh]"] +
+                                      [f"P{p:<7g}: {valor:.3f} [kWh]" for p, valor in r["dem_max_percentiles"].items()] +
+                                      [f"{'Perfil':8}: {self.Dem_Max:.3f} [kWh] (determinístico)"]),
+            nivel=RESUMEN)
+        return resultado
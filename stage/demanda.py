@@ -0,0 +1,430 @@
+import numbers
+
+import numpy as np
+import pandas as pd
+from utils.consumo import get_almacen_consumo
+from utils.perf import medir
+from utils.redondeo import redondear
+from utils.referencia import leer_tabla
+
+NOMBRES_MESES = ['Enero', 'Febrero', 'Marzo', 'Abril', 'Mayo', 'Junio',
+                 'Julio', 'Agosto', 'Septiembre', 'Octubre', 'Noviembre', 'Diciembre']
+
+# Rango de invierno por zona (mismo criterio que Cliente.obtener_rango_invierno)
+MESES_INVIERNO_POR_ZONA = {
+    'Z1': {'inicio': 6, 'fin': 8},
+    'Z2': {'inicio': 5, 'fin': 9},
+    'Z3': {'inicio': 4, 'fin': 10},
+    'Z4': {'inicio': 4, 'fin': 11},
+    'Z5': {'inicio': 1, 'fin': 12}
+}
+
+# Columnas del perfil base que se suman sin teletrabajo (2:14); con teletrabajo se suman todas
+COLUMNAS_SIN_TELETRABAJO = slice(0, 12)
+INTERVALOS_POR_HORA = 6  # Perfiles de 10 minutos
+
+# Tipos de día de la serie anual de 8760 h (ver calendario y MotorDemanda.serie_anual)
+LABORAL, FIN_DE_SEMANA, FERIADO = 0, 1, 2
+TIPOS_DIA = ('laboral', 'fin_de_semana', 'feriado')
+HORAS_ANIO = 8760
+
+# Feriados nacionales de fecha fija (mes, día); los móviles se agregan con el parámetro `feriados`
+FERIADOS_FIJOS = ((1, 1), (5, 1), (5, 21), (7, 16), (8, 15), (9, 18), (9, 19), (11, 1), (12, 8), (12, 25))
+
+
+class MotorDemanda:
+    """
+    Perfiles de demanda de N clientes a la vez, con el mismo resultado que Cliente.
+
+    Las tablas de referencia (perfil base, perfil extra y calefacción por zona) se
+    cargan una sola vez; la unión base/extra por (Hour, Minute) se resuelve una vez
+    para todos los clientes. Cada paso de Cliente se aplica sobre arreglos
+    (N, 144), (N, 24) y (N, 24, 12) con el mismo orden de operaciones de punto
+    flotante que pandas, de modo que los perfiles y Dem_Max son idénticos bit a bit.
+
+    Parameters
+    ----------
+    path_consumo_base, path_consumo_extra, path_BBDD_clientes, path_consumo_zona : str
+        Las mismas rutas que recibe Cliente.
+    almacen : AlmacenReferencia, optional
+        Almacén de tablas de referencia (ver utils.referencia).
+    almacen_consumo : AlmacenConsumo, optional
+        Consumos mensuales de BBDD_Clientes (si es None se usa el del proceso).
+    medidor : MedidorRendimiento, optional
+    resolucion_minutos : int
+        60 (perfiles 24x12) o 10 (perfiles 144x12 en float32), como en Cliente.
+    modelo_calefaccion : ModeloBombaCalor, optional
+        Calefacción con bomba de calor por grados-hora (ver stage.calefaccion), como en Cliente.
+    """
+
+    def __init__(self, path_consumo_base, path_consumo_extra, path_BBDD_clientes, path_consumo_zona,
+                 almacen=None, almacen_consumo=None, medidor=None, resolucion_minutos=60, modelo_calefaccion=None):
+        if resolucion_minutos not in (60, 10):
+            raise ValueError(f"❌ Resolución no soportada: {resolucion_minutos} min (usar 60 o 10).")
+        self.path_consumo_base = path_consumo_base
+        self.path_consumo_extra = path_consumo_extra
+        self.path_BBDD_clientes = path_BBDD_clientes
+        self.path_consumo_zona = path_consumo_zona
+        self.almacen = almacen
+        self.almacen_consumo = almacen_consumo if almacen_consumo is not None else get_almacen_consumo(path_BBDD_clientes)
+        self.medidor = medidor
+        self.pasos_por_hora = 60 // resolucion_minutos
+        self.modelo_calefaccion = modelo_calefaccion
+        self._tablas = None
+
+    def cargar(self):
+        """Lee las tablas de referencia y resuelve la unión base/extra (una sola vez)."""
+        if self._tablas is not None:
+            return self._tablas
+        df_base = leer_tabla(self.almacen, self.path_consumo_base, nrows=144)
+        df_extra = leer_tabla(self.almacen, self.path_consumo_extra, nrows=144)
+        df_zona = leer_tabla(self.almacen, self.path_consumo_zona)
+
+        # Filas de la unión externa por (Hour, Minute), como en Cliente.consumo_baseyextra_total
+        claves = ['Hour', 'Minute']
+        union = pd.merge(df_base[claves].assign(_fila_base=np.arange(len(df_base))),
+                         df_extra[claves].assign(_fila_extra=np.arange(len(df_extra))),
+                         on=claves, how='outer')
+        self._tablas = {
+            "base": df_base.iloc[:, 2:].to_numpy(dtype=float),
+            "columna_luces": list(df_base.columns[2:]).index('Bath_Light'),
+            "extra": df_extra.iloc[:, 2:].to_numpy(dtype=float),
+            "fila_base": union['_fila_base'].to_numpy(dtype=float),
+            "fila_extra": union['_fila_extra'].to_numpy(dtype=float),
+            "zona": df_zona,
+        }
+        return self._tablas
+
+    def entradas(self, clientes):
+        """
+        Arreglos de entrada del motor a partir de (indice, cliente_data, vector) de cada cliente.
+
+        Returns
+        -------
+        dict
+            vectores (N, 14), luces (N,), teletrabajo (N,), indices (N,), zonas (N,),
+            potencia_calefaccion (N,), desea_calefaccion (N,) y validos (N,). Los clientes
+            no válidos (datos que Cliente rechaza) deben calcularse con Cliente.
+        """
+        tablas = self.cargar()
+        n = len(clientes)
+        n_extra = tablas["extra"].shape[1]
+        n_bbdd = len(self.almacen_consumo)
+        datos_entrada = {
+            "vectores": np.zeros((n, n_extra - 1), dtype=float),
+            "luces": np.zeros(n, dtype=float),
+            "teletrabajo": np.zeros(n, dtype=bool),
+            "indices": np.zeros(n, dtype=np.int64),
+            "zonas": np.empty(n, dtype=object),
+            "potencia_calefaccion": np.zeros(n, dtype=float),
+            "desea_calefaccion": np.zeros(n, dtype=bool),
+            "validos": np.zeros(n, dtype=bool),
+        }
+        columnas_zona = set(tablas["zona"].columns) - {'T'}
+        for i, (indice, datos, vector) in enumerate(clientes):
+            try:
+                luces = 2 * int(datos.get('N° habitaciones', 0)) + int(datos.get('N° baños', 0))
+                teletrabajo = datos.get('Teletrabajo', '').strip() == 'Si'
+            except Exception:
+                continue
+            habitaciones_calor = datos.get('N° habitaciones que quiere calefaccionar', 0)
+            if pd.isna(habitaciones_calor):
+                habitaciones_calor = 0
+            zona = datos.get('Tipo Zona')
+            if (vector is None or len(vector) != n_extra - 1 or not 0 < indice <= n_bbdd
+                    or not isinstance(zona, str) or zona not in columnas_zona
+                    or not isinstance(habitaciones_calor, numbers.Number)):
+                continue
+            datos_entrada["vectores"][i] = vector
+            datos_entrada["luces"][i] = luces
+            datos_entrada["teletrabajo"][i] = teletrabajo
+            datos_entrada["indices"][i] = indice
+            datos_entrada["zonas"][i] = zona
+            datos_entrada["potencia_calefaccion"][i] = habitaciones_calor * 2.63
+            datos_entrada["desea_calefaccion"][i] = datos.get('Desea calefacción', 'No') == 'Si'
+            datos_entrada["validos"][i] = True
+        return datos_entrada
+
+    def _consumo_10min(self, vectores, luces, teletrabajo):
+        """Consumo base + extra de un día (N, 144) [kWh], sin escalar (Cliente.consumo_baseyextra_total)."""
+        tablas = self.cargar()
+        n = len(vectores)
+        # Perfil base: Bath_Light x luces y suma por columnas (en orden, como pandas)
+        base = tablas["base"]
+        aporte = base[None, :, :] * np.ones((n, 1, 1))
+        aporte[:, :, tablas["columna_luces"]] = base[None, :, tablas["columna_luces"]] * luces[:, None]
+        total_base = _suma_columnas(aporte[:, :, COLUMNAS_SIN_TELETRABAJO])
+        if teletrabajo.any():
+            total_base[teletrabajo] = _suma_columnas(aporte[teletrabajo])
+
+        # Perfil extra: columnas x vector extendido (Cine en casa se repite para los parlantes)
+        extendido = np.concatenate([vectores, (vectores[:, -1:] == 1).astype(float)], axis=1)
+        total_extra = _suma_columnas(tablas["extra"][None, :, :] * extendido[:, None, :])
+
+        # Unión externa base/extra: las filas sin pareja aportan 0 (fillna(0))
+        return _tomar(total_base, tablas["fila_base"]) + _tomar(total_extra, tablas["fila_extra"])
+
+    def _calor(self, zonas, potencia_calefaccion, desea_calefaccion, indices=None):
+        """Calefacción horaria por mes (N, 24, 12) [kW]; cero para quien no la desea (Cliente.function_heat)."""
+        tablas = self.cargar()
+        calor = np.zeros((len(zonas), 24, 12))
+        if self.modelo_calefaccion is not None and indices is not None and desea_calefaccion.any():
+            # Bomba de calor para quienes tienen temperaturas; el resto sigue con el perfil por zona
+            filas = np.flatnonzero(desea_calefaccion)
+            temperaturas, disponibles = self.modelo_calefaccion.temperaturas_bloque(indices[filas], zonas[filas])
+            with medir(self.medidor, "MotorDemanda", "bomba_calor", clientes=int(disponibles.sum())):
+                filas, temperaturas = filas[disponibles], temperaturas[disponibles]
+                if len(filas):
+                    electrica = self.modelo_calefaccion.demanda(temperaturas, potencia_calefaccion[filas])["electrica"]
+                    calor[filas] = electrica.transpose(0, 2, 1)
+            desea_calefaccion = desea_calefaccion.copy()
+            desea_calefaccion[filas] = False
+        for zona in np.unique(zonas[desea_calefaccion]) if desea_calefaccion.any() else ():
+            filas = desea_calefaccion & (zonas == zona)
+            perfil_zona = tablas["zona"][zona].to_numpy()
+            # (perfil zona x factor mes) x potencia, en ese orden
+            base_calor = perfil_zona[:, None] * np.asarray(factores_trapezoidales(zona))[None, :]
+            calor[filas] = base_calor[None, :, :] * potencia_calefaccion[filas, None, None]
+        return calor
+
+    def calcular(self, vectores, luces, teletrabajo, factores_mes, diario_max, zonas,
+                 potencia_calefaccion, desea_calefaccion, indices=None):
+        """
+        Perfiles anuales y demanda máxima (horaria, o de 10 minutos) de N clientes.
+
+        Parameters
+        ----------
+        vectores : ndarray (N, 14)
+            Matriz de electrodomésticos (Preprocess.matriz_electrodomesticos).
+        luces : ndarray (N,)
+            Número de luces (2 x habitaciones + baños).
+        teletrabajo : ndarray bool (N,)
+        factores_mes : ndarray (N, 12)
+            Factores mensuales (AlmacenConsumo.factores_mes).
+        diario_max : ndarray (N,)
+            Consumo diario máximo de BBDD_Clientes [kWh/día].
+        zonas : ndarray (N,)
+            'Tipo Zona' de cada cliente.
+        potencia_calefaccion : ndarray (N,)
+            Habitaciones a calefaccionar x 2.63 [kW].
+        desea_calefaccion : ndarray bool (N,)
+        indices : ndarray (N,), optional
+            Índices de los clientes (temperaturas del modelo de bomba de calor).
+
+        Returns
+        -------
+        tuple
+            (perfiles ndarray (N, 12, 24) [Meses x Horas], dem_max ndarray (N,)). Con
+            resolución de 10 minutos, perfiles (N, 12, 144) en float32 y dem_max el máximo
+            de 10 minutos.
+        """
+        tablas = self.cargar()
+        n = len(vectores)
+
+        with medir(self.medidor, "MotorDemanda", "perfil_10min"):
+            consumo = self._consumo_10min(vectores, luces, teletrabajo)
+
+        with medir(self.medidor, "MotorDemanda", "perfil_horario"):
+            energia_dia = consumo.sum(axis=1)
+            with np.errstate(divide="ignore", invalid="ignore"):
+                factor_dia = diario_max / energia_dia
+            escalado = consumo * factor_dia[:, None]
+            if escalado.shape[1] != 24 * INTERVALOS_POR_HORA:
+                raise ValueError(f"Perfil esperado con 144 registros (24h * 6), pero tiene: {escalado.shape[1]}.")
+            # Acumulación de 6 intervalos en orden (0 + c0 + c1 + ... + c5)
+            bloques = escalado.reshape(n, 24, INTERVALOS_POR_HORA)
+            perfil_1h = np.zeros((n, 24))
+            for k in range(INTERVALOS_POR_HORA):
+                perfil_1h = perfil_1h + bloques[:, :, k]
+            dem_max = perfil_1h.max(axis=1) if n else np.zeros(0)
+            pasos = self.pasos_por_hora
+            if pasos > 1:
+                dem_max = escalado.max(axis=1) if n else np.zeros(0)
+
+        with medir(self.medidor, "MotorDemanda", "perfil_anual"):
+            if pasos > 1:
+                # (N, 144, 12) sin redondeo, como Cliente con resolución de 10 minutos
+                anual = escalado[:, :, None] * factores_mes[:, None, :]
+            else:
+                # (N, 24, 12): round(h x f, 3) igual que round() de Python
+                anual = redondear(perfil_1h[:, :, None] * factores_mes[:, None, :], 3)
+            calor = self._calor(zonas, potencia_calefaccion, desea_calefaccion, indices)
+            if pasos > 1:
+                calor = np.repeat(calor, pasos, axis=1) / pasos  # kW horarios -> kWh por intervalo
+            perfiles = np.where(desea_calefaccion[:, None, None], calor + anual, anual)
+            if pasos > 1:
+                perfiles = perfiles.astype(np.float32)
+
+        return perfiles.transpose(0, 2, 1), dem_max
+
+    def ejecutar(self, clientes):
+        """
+        Calcula la demanda de una lista de (indice, cliente_data, vector).
+
+        Returns
+        -------
+        list
+            Por cliente, (pdem_cliente DataFrame 24x12 o 144x12, Dem_Max) igual que Cliente.ejecutar,
+            o None si el cliente debe calcularse con Cliente.
+        """
+        if not clientes:
+            return []
+        with medir(self.medidor, "MotorDemanda", "entradas"):
+            e = self.entradas(clientes)
+        validos = e["validos"]
+        salida = [None] * len(clientes)
+        if not validos.any():
+            return salida
+        indices = e["indices"][validos]
+        consumo = self.almacen_consumo.cargar()
+        perfiles, dem_max = self.calcular(
+            e["vectores"][validos], e["luces"][validos], e["teletrabajo"][validos],
+            consumo.factores_mes[indices], consumo.diario_max[indices], e["zonas"][validos],
+            e["potencia_calefaccion"][validos], e["desea_calefaccion"][validos], indices)
+        desea = e["desea_calefaccion"][validos]
+        finitos = np.isfinite(perfiles).all(axis=(1, 2)) & np.isfinite(dem_max)
+        for k, i in enumerate(np.flatnonzero(validos)):
+            if finitos[k]:
+                salida[i] = (perfil_dataframe(perfiles[k], desea[k]), dem_max[k])
+        return salida
+
+    def serie_anual(self, clientes, anio=2025, feriados=(), formas=None, tamano_bloque=500):
+        """
+        Series cronológicas de 8760 horas de una lista de (indice, cliente_data, vector).
+
+        Cada día del año toma el perfil horario de su tipo (laboral, fin de semana o
+        feriado) escalado por el factor de su mes, más la calefacción horaria del mes.
+        Los días laborales usan el mismo perfil que Cliente (con las columnas de oficina
+        sólo si hay teletrabajo); los fines de semana y feriados no usan las columnas de
+        oficina. Todo se calcula sobre arreglos (clientes, días, horas), por bloques de
+        clientes para acotar la memoria.
+
+        Parameters
+        ----------
+        clientes : list
+            (indice, cliente_data, vector) de cada cliente.
+        anio : int
+            Año del calendario (en años bisiestos se omite el 29 de febrero).
+        feriados : iterable
+            Feriados adicionales a FERIADOS_FIJOS (fechas 'AAAA-MM-DD' o datetime.date).
+        formas : dict, optional
+            Multiplicadores horarios (24,) por tipo de día ('laboral', 'fin_de_semana',
+            'feriado'); los tipos que no aparecen quedan sin modificar.
+        tamano_bloque : int
+            Clientes por bloque de cálculo.
+
+        Returns
+        -------
+        tuple
+            (series ndarray float32 (N, 8760) [kWh], validos ndarray bool (N,)). Las filas
+            de clientes no válidos (ver entradas) quedan en NaN.
+        """
+        meses_dia, tipos_dia = calendario(anio, feriados)
+        multiplicadores = np.ones((len(TIPOS_DIA), 24))
+        for tipo, forma in (formas or {}).items():
+            multiplicadores[TIPOS_DIA.index(tipo)] = np.asarray(forma, dtype=float)
+
+        series = np.full((len(clientes), HORAS_ANIO), np.nan, dtype=np.float32)
+        if not clientes:
+            return series, np.zeros(0, dtype=bool)
+        with medir(self.medidor, "MotorDemanda", "entradas"):
+            e = self.entradas(clientes)
+        validos = e["validos"]
+        consumo = self.almacen_consumo.cargar()
+        filas_validas = np.flatnonzero(validos)
+        for inicio in range(0, len(filas_validas), tamano_bloque):
+            filas = filas_validas[inicio:inicio + tamano_bloque]
+            n = len(filas)
+            indices = e["indices"][filas]
+            with medir(self.medidor, "MotorDemanda", "perfiles_tipo_dia", clientes=n):
+                # Día laboral: igual que Cliente; fin de semana y feriado: sin columnas de oficina
+                laboral = self._consumo_10min(e["vectores"][filas], e["luces"][filas], e["teletrabajo"][filas])
+                descanso = self._consumo_10min(e["vectores"][filas], e["luces"][filas], np.zeros(n, dtype=bool))
+                with np.errstate(divide="ignore", invalid="ignore"):
+                    factor_dia = consumo.diario_max[indices] / laboral.sum(axis=1)
+                por_tipo = np.stack([laboral, descanso, descanso], axis=1) * factor_dia[:, None, None]
+                por_tipo = por_tipo.reshape(n, len(TIPOS_DIA), 24, INTERVALOS_POR_HORA).sum(axis=3)
+                por_tipo *= multiplicadores[None, :, :]
+                calor = self._calor(e["zonas"][filas], e["potencia_calefaccion"][filas],
+                                    e["desea_calefaccion"][filas], indices).transpose(0, 2, 1)  # (n, 12, 24)
+            with medir(self.medidor, "MotorDemanda", "serie_8760", clientes=n):
+                # (n, 365, 24): perfil del tipo de día x factor del mes + calefacción del mes
+                anual = (por_tipo[:, tipos_dia, :] * consumo.factores_mes[indices][:, meses_dia, None]
+                         + calor[:, meses_dia, :])
+                series[filas] = anual.reshape(n, HORAS_ANIO)
+        # Igual que en ejecutar: sin consumo diario (división por cero) el cliente no es válido
+        validos = validos & np.isfinite(series).all(axis=1)
+        series[~validos] = np.nan
+        return series, validos
+
+
+def calendario(anio=2025, feriados=()):
+    """
+    Mes (0-11) y tipo de día (LABORAL, FIN_DE_SEMANA o FERIADO) de los 365 días del año.
+
+    Los feriados (FERIADOS_FIJOS y los entregados) prevalecen sobre el fin de semana.
+    En años bisiestos se omite el 29 de febrero para mantener 8760 horas.
+    """
+    dias = np.arange(np.datetime64(f"{anio}-01-01"), np.datetime64(f"{anio + 1}-01-01"), dtype="datetime64[D]")
+    inicio_mes = dias.astype("datetime64[M]")
+    meses = inicio_mes.astype(np.int64) % 12
+    dia_mes = (dias - inicio_mes.astype("datetime64[D]")).astype(np.int64) + 1
+    conservar = ~((meses == 1) & (dia_mes == 29))
+    dias, meses, dia_mes = dias[conservar], meses[conservar], dia_mes[conservar]
+
+    dia_semana = (dias.astype(np.int64) + 3) % 7  # 0 = lunes (1970-01-01 fue jueves)
+    tipos = np.where(dia_semana >= 5, FIN_DE_SEMANA, LABORAL)
+    feriado = np.zeros(len(dias), dtype=bool)
+    for mes, dia in FERIADOS_FIJOS:
+        feriado |= (meses == mes - 1) & (dia_mes == dia)
+    adicionales = [np.datetime64(str(fecha), "D") for fecha in feriados]
+    if adicionales:
+        feriado |= np.isin(dias, np.array(adicionales, dtype="datetime64[D]"))
+    tipos[feriado] = FERIADO
+    return meses, tipos
+
+
+def factores_trapezoidales(zona):
+    """Factores mensuales de calefacción de la zona (Cliente.calcular_factores_trapezoidales)."""
+    rango = MESES_INVIERNO_POR_ZONA.get(zona, {'inicio': 6, 'fin': 8})
+    mes_inicio, mes_fin = rango['inicio'], rango['fin']
+    if zona == 'Z5':
+        return [0.1] * 12
+    factores = [0.0] * 12
+    for i in range(mes_inicio - 1):
+        factores[i] = round((i + 1) / mes_inicio, 3)
+    for i in range(mes_inicio - 1, mes_fin):
+        factores[i] = 1.0
+    duracion_bajada = 12 - mes_fin
+    for i in range(mes_fin, 12):
+        factores[i] = round(1 - ((i - mes_fin + 1) / (duracion_bajada + 1)), 3)
+    return factores
+
+
+def perfil_dataframe(perfil, con_calefaccion):
+    """
+    DataFrame 24x12 (horas x meses) de un perfil (12, 24), con el mismo índice que
+    Cliente.function_heat: enteros si se suma calefacción, textos '0'..'23' si no.
+    Un perfil (12, 144) de 10 minutos conserva su float32 y siempre usa índice entero.
+    """
+    if perfil.shape[1] != 24:
+        return pd.DataFrame(np.array(perfil.T, dtype=np.float32), index=np.arange(perfil.shape[1]),
+                            columns=NOMBRES_MESES)
+    indice = pd.Index(np.arange(24)) if con_calefaccion else [str(i) for i in range(24)]
+    return pd.DataFrame(np.array(perfil.T, dtype=float), index=indice, columns=NOMBRES_MESES)
+
+
+def _suma_columnas(valores):
+    """Suma (N, filas, columnas) -> (N, filas) acumulando columna por columna, en orden."""
+    total = valores[:, :, 0].copy()
+    for j in range(1, valores.shape[2]):
+        total += valores[:, :, j]
+    return total
+
+
+def _tomar(valores, filas):
+    """Columnas de `valores` según las filas de la unión (NaN = sin pareja -> 0)."""
+    resultado = np.zeros((valores.shape[0], len(filas)))
+    presentes = ~np.isnan(filas)
+    resultado[:, presentes] = valores[:, filas[presentes].astype(np.int64)]
+    return resultado
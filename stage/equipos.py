@@ -0,0 +1,208 @@
+import numpy as np
+import pandas as pd
+
+FACTOR_SEGURIDAD_INVERSOR = 1.15  # Como en SeleccionInversor.seleccionar
+
+
+class BusquedaConfiguraciones:
+    """
+    Búsqueda combinatoria de configuraciones OffGrid panel x MPPT x inversor x batería.
+
+    Para cada combinación compatible se calcula el costo total y el margen de capacidad,
+    el menor de los márgenes de PV instalada, potencia de inversor y energía de baterías
+    sobre lo requerido (una configuración es tan holgada como su componente más justo).
+    Las compatibilidades son máscaras vectorizadas:
+
+    - strings: paneles en serie por MPPT = int(DC-link / Vmp) >= 1;
+    - bus DC: 'Voltaje Bateria (V)' del MPPT, 'Voltaje de carga (V)' del inversor y
+      'Voltaje (V)' de la batería iguales;
+    - inversor: potencia nominal > Potencia_Inversor x factor de seguridad.
+
+    Como el costo es una suma y el margen un mínimo, una opción de un componente
+    dominada por otra del mismo bus (más cara y con menor o igual margen) nunca forma
+    parte del frente: cada componente (el par panel-MPPT como subsistema PV) se poda a
+    su frente de Pareto antes de cruzarlo con los demás. Así el producto cruz final
+    crece con el tamaño de los frentes y no con el del catálogo.
+
+    Parameters
+    ----------
+    eq_paneles, eq_mppts, eq_inversores, eq_baterias : pandas.DataFrame
+        Hojas de BBDD_Equipos.
+    factor_seguridad_inversor : float
+        Factor sobre Potencia_Inversor.
+    """
+
+    def __init__(self, eq_paneles, eq_mppts, eq_inversores, eq_baterias,
+                 factor_seguridad_inversor=FACTOR_SEGURIDAD_INVERSOR):
+        self.eq_paneles = eq_paneles
+        self.eq_mppts = eq_mppts
+        self.eq_inversores = eq_inversores
+        self.eq_baterias = eq_baterias
+        self.factor_seguridad_inversor = factor_seguridad_inversor
+        self.estadisticas = {}  # Opciones evaluadas, compatibles y tras la poda (ver buscar)
+
+    def buscar(self, potencia_pv_kw, potencia_inversor_kw, autonomia_kwh):
+        """
+        Frente de Pareto costo vs. margen de capacidad.
+
+        Parameters
+        ----------
+        potencia_pv_kw : float
+            Potencia PV requerida (Potencia_PV).
+        potencia_inversor_kw : float
+            Potencia de inversor requerida antes del factor de seguridad (Potencia_Inversor).
+        autonomia_kwh : float
+            Energía de baterías requerida (Autonomia_Promedio).
+
+        Returns
+        -------
+        pandas.DataFrame
+            Una fila por configuración no dominada, ordenadas por costo: índices y modelos de
+            cada equipo, cantidades, voltaje del bus, costo total [CLP] y márgenes [-].
+        """
+        pv = self._opciones_pv(potencia_pv_kw)
+        inversores = self._opciones_inversor(potencia_inversor_kw)
+        baterias = self._opciones_bateria(autonomia_kwh)
+        self.estadisticas = {
+            "pv": {"evaluadas": pv["evaluadas"], "compatibles": pv["compatibles"]},
+            "inversores": {"evaluadas": len(self.eq_inversores), "compatibles": len(inversores["costo"])},
+            "baterias": {"evaluadas": len(self.eq_baterias), "compatibles": len(baterias["costo"])},
+        }
+
+        bloques = []
+        podadas = {"pv": 0, "inversores": 0, "baterias": 0}
+        for voltaje in np.intersect1d(np.intersect1d(pv["voltaje"], inversores["voltaje"]), baterias["voltaje"]):
+            # Frente de cada componente en este bus
+            grupos = {}
+            for nombre, opciones in (("pv", pv), ("inversores", inversores), ("baterias", baterias)):
+                en_bus = np.flatnonzero(opciones["voltaje"] == voltaje)
+                frente = en_bus[frente_pareto(opciones["costo"][en_bus], opciones["margen"][en_bus])]
+                grupos[nombre] = frente
+                podadas[nombre] += len(frente)
+            a, b, c = (grupos["pv"], grupos["inversores"], grupos["baterias"])
+            costo = (pv["costo"][a][:, None, None] + inversores["costo"][b][None, :, None]
+                     + baterias["costo"][c][None, None, :])
+            margen = np.minimum(np.minimum(pv["margen"][a][:, None, None], inversores["margen"][b][None, :, None]),
+                                baterias["margen"][c][None, None, :])
+            ia, ib, ic = (x.reshape(-1) for x in np.meshgrid(a, b, c, indexing="ij"))
+            bloques.append((costo.reshape(-1), margen.reshape(-1), ia, ib, ic))
+        for nombre, n in podadas.items():
+            self.estadisticas[nombre]["frente"] = n
+
+        if not bloques:
+            self.estadisticas["combinaciones"] = 0
+            return self._tabla(pv, inversores, baterias, *(np.empty(0, dtype=np.int64) for _ in range(3)),
+                               np.empty(0), np.empty(0))
+        costo, margen, ia, ib, ic = (np.concatenate(x) for x in zip(*bloques))
+        self.estadisticas["combinaciones"] = len(costo)
+        frente = frente_pareto(costo, margen)
+        return self._tabla(pv, inversores, baterias, ia[frente], ib[frente], ic[frente], costo[frente], margen[frente])
+
+    def _opciones_pv(self, potencia_pv_kw):
+        """Pares panel x MPPT compatibles (aplanados), como en SeleccionPanel y SeleccionMPPT.relacion_panel_mppt."""
+        watts = self.eq_paneles['Potencia nominal (W)'].to_numpy(dtype=float)
+        vmp = self.eq_paneles['Vmp (V)'].to_numpy(dtype=float)
+        # Poda previa: MPPTs del mismo bus y DC-link dan los mismos strings; sólo el más barato
+        voltaje_bus = self.eq_mppts['Voltaje Bateria (V)'].to_numpy(dtype=float)
+        dc_link = self.eq_mppts['Voltaje DC-link(V)'].to_numpy(dtype=float)
+        precio_mppt = self.eq_mppts['Precio CLP'].to_numpy(dtype=float)
+        orden = np.lexsort((precio_mppt, dc_link, voltaje_bus))
+        primero = np.ones(len(orden), dtype=bool)
+        primero[1:] = (np.diff(voltaje_bus[orden]) != 0) | (np.diff(dc_link[orden]) != 0)
+        mppts = orden[primero]
+        dc_link = dc_link[mppts]
+
+        objetivo_w = potencia_pv_kw * 1000
+        paneles = objetivo_w // watts + (objetivo_w % watts > 0)               # (P,)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            serie = np.floor(dc_link[None, :] / vmp[:, None])                  # (P, M) paneles por string
+        compatible = np.isfinite(serie) & (serie >= 1)
+        serie = np.where(compatible, serie, 1.0)
+        n_mppt = paneles[:, None] // serie + (paneles[:, None] % serie > 0)
+        instalados = n_mppt * serie                                            # Paneles reales (strings completos)
+
+        costo = (instalados * self.eq_paneles['Precio CLP'].to_numpy(dtype=float)[:, None]
+                 + n_mppt * precio_mppt[mppts][None, :])
+        with np.errstate(divide="ignore", invalid="ignore"):
+            margen = np.where(compatible, instalados * watts[:, None] / objetivo_w - 1.0, -np.inf)
+
+        # Poda por panel: ordenados por costo, un MPPT que no supera el mejor margen de los más
+        # baratos está dominado (se dejan los empates; frente_pareto los resuelve después)
+        orden = np.argsort(costo, axis=1, kind="stable")
+        margen_orden = np.take_along_axis(margen, orden, axis=1)
+        mejor_previo = np.maximum.accumulate(margen_orden, axis=1)
+        mejor_previo = np.concatenate((np.full((len(margen), 1), -np.inf), mejor_previo[:, :-1]), axis=1)
+        ip, posicion = np.nonzero((margen_orden >= mejor_previo) & np.isfinite(margen_orden))
+        im = orden[ip, posicion]
+        return {
+            "panel": ip, "mppt": mppts[im],
+            "paneles": instalados[ip, im].astype(np.int64), "n_mppt": n_mppt[ip, im].astype(np.int64),
+            "voltaje": voltaje_bus[mppts[im]],
+            "costo": costo[ip, im], "margen": margen[ip, im],
+            "evaluadas": len(watts) * len(voltaje_bus), "compatibles": int(compatible.sum()),
+        }
+
+    def _opciones_inversor(self, potencia_inversor_kw):
+        requerida_w = potencia_inversor_kw * self.factor_seguridad_inversor * 1e3
+        potencia = self.eq_inversores['Potencia nominal (W)'].to_numpy(dtype=float)
+        indices = np.flatnonzero(potencia > requerida_w)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            margen = potencia[indices] / requerida_w - 1.0
+        return {
+            "inversor": indices,
+            "voltaje": self.eq_inversores['Voltaje de carga (V)'].to_numpy(dtype=float)[indices],
+            "costo": self.eq_inversores['Precio CLP'].to_numpy(dtype=float)[indices],
+            "margen": margen,
+        }
+
+    def _opciones_bateria(self, autonomia_kwh):
+        """Número mínimo de baterías de cada modelo, como en SeleccionBateria.numero_baterias."""
+        capacidad_ah = self.eq_baterias['Capacidad (Ah)'].to_numpy(dtype=float)
+        voltaje = self.eq_baterias['Voltaje (V)'].to_numpy(dtype=float)
+        carga_ah = autonomia_kwh * 1000 / voltaje
+        cantidad = (carga_ah // capacidad_ah + (carga_ah % capacidad_ah > 0)).astype(np.int64)
+        energia = cantidad * capacidad_ah * voltaje / 1000
+        with np.errstate(divide="ignore", invalid="ignore"):
+            margen = np.where(autonomia_kwh > 0, energia / autonomia_kwh - 1.0, np.inf)
+        return {
+            "bateria": np.arange(len(capacidad_ah)), "cantidad": cantidad, "voltaje": voltaje,
+            "costo": cantidad * self.eq_baterias['Precio CLP'].to_numpy(dtype=float), "margen": margen,
+        }
+
+    def _tabla(self, pv, inversores, baterias, ia, ib, ic, costo, margen):
+        ip, im = pv["panel"][ia], pv["mppt"][ia]
+        iinv, ibat = inversores["inversor"][ib], baterias["bateria"][ic]
+        return pd.DataFrame({
+            "Panel": ip,
+            "Modelo Panel": self.eq_paneles['Modelo'].to_numpy()[ip],
+            "# Paneles": pv["paneles"][ia],
+            "MPPT": im,
+            "Modelo MPPT": self.eq_mppts['Modelo'].to_numpy()[im],
+            "# MPPT": pv["n_mppt"][ia],
+            "Inversor": iinv,
+            "Modelo Inversor": self.eq_inversores['Modelo'].to_numpy()[iinv],
+            "Bateria": ibat,
+            "Modelo Bateria": self.eq_baterias['Modelo'].to_numpy()[ibat],
+            "# Baterias": baterias["cantidad"][ibat],
+            "Voltaje Bus [V]": pv["voltaje"][ia],
+            "Costo [CLP]": costo,
+            "Margen PV [-]": pv["margen"][ia],
+            "Margen Inversor [-]": inversores["margen"][ib],
+            "Margen Bateria [-]": baterias["margen"][ic],
+            "Margen [-]": margen,
+        })
+
+
+def frente_pareto(costo, margen):
+    """
+    Índices de las opciones no dominadas (menor costo, mayor margen), ordenadas por costo.
+
+    Una opción queda si ninguna otra cuesta lo mismo o menos con un margen mayor o igual;
+    de las repetidas (mismo costo y margen) queda la primera.
+    """
+    costo = np.asarray(costo, dtype=float)
+    margen = np.asarray(margen, dtype=float)
+    orden = np.lexsort((-margen, costo))
+    ordenado = margen[orden]
+    mejor_previo = np.concatenate(([-np.inf], np.maximum.accumulate(ordenado)[:-1]))
+    return orden[ordenado > mejor_previo]
@@ -0,0 +1,121 @@
+import numpy as np
+
+INTERVALOS_DIA = 144          # Perfiles de 10 minutos
+INTERVALOS_POR_HORA = 6
+
+# Variabilidad de uso por defecto de cada electrodoméstico
+DESFASE_SIGMA_MIN = 30.0      # Desviación estándar del corrimiento de la hora de inicio [min]
+DESFASE_MAX_MIN = 120.0       # Corrimiento máximo (se recorta) [min]
+DURACION_SIGMA = 0.2          # Desviación estándar del logaritmo del factor de duración [-]
+
+
+class SimuladorOcupacion:
+    """
+    Monte Carlo del comportamiento de los ocupantes sobre perfiles de 10 minutos.
+
+    En cada sorteo, cada electrodoméstico corre su perfil diario en un desfase aleatorio
+    (normal, recortado) y estira o acorta su tiempo de uso alrededor de su hora central
+    con un factor lognormal de media 1 (a igual potencia, la energía cambia con la
+    duración). Los sorteos se calculan juntos sobre arreglos (sorteos, equipos, 144),
+    en lotes de sorteos para acotar la memoria. Con la misma semilla los resultados se
+    repiten exactamente.
+
+    Parameters
+    ----------
+    n_sorteos : int
+        Número de sorteos.
+    semilla : int
+        Semilla del generador aleatorio (numpy.random.default_rng).
+    desfase_sigma_min, desfase_max_min : float
+        Desviación estándar y máximo del desfase de inicio [min].
+    duracion_sigma : float
+        Desviación estándar del logaritmo del factor de duración.
+    tamano_lote : int
+        Sorteos por lote de cálculo.
+    """
+
+    def __init__(self, n_sorteos=2000, semilla=0, desfase_sigma_min=DESFASE_SIGMA_MIN,
+                 desfase_max_min=DESFASE_MAX_MIN, duracion_sigma=DURACION_SIGMA, tamano_lote=500):
+        self.n_sorteos = n_sorteos
+        self.semilla = semilla
+        self.desfase_sigma_min = desfase_sigma_min
+        self.desfase_max_min = desfase_max_min
+        self.duracion_sigma = duracion_sigma
+        self.tamano_lote = tamano_lote
+
+    def sortear(self, componentes):
+        """
+        Perfiles diarios totales de todos los sorteos.
+
+        Parameters
+        ----------
+        componentes : ndarray (A, 144)
+            Perfil de 10 minutos de cada electrodoméstico [kWh por intervalo].
+
+        Returns
+        -------
+        ndarray (n_sorteos, 144)
+            Suma de los electrodomésticos en cada sorteo.
+        """
+        componentes = np.asarray(componentes, dtype=float)
+        n_equipos, n_intervalos = componentes.shape
+        rng = np.random.default_rng(self.semilla)
+        centros = _centro_circular(componentes)
+        minutos_intervalo = 24 * 60 / n_intervalos
+        t = np.arange(n_intervalos, dtype=float)
+        # Posición de cada intervalo respecto de la hora central del equipo, en (-72, 72]
+        relativo = (t[None, :] - centros[:, None] + n_intervalos / 2) % n_intervalos - n_intervalos / 2
+        filas = np.arange(n_equipos)[None, :, None]
+
+        totales = np.empty((self.n_sorteos, n_intervalos))
+        for inicio in range(0, self.n_sorteos, self.tamano_lote):
+            n = min(self.tamano_lote, self.n_sorteos - inicio)
+            desfase = np.clip(rng.normal(0.0, self.desfase_sigma_min, (n, n_equipos)),
+                              -self.desfase_max_min, self.desfase_max_min) / minutos_intervalo
+            duracion = np.exp(rng.normal(-self.duracion_sigma ** 2 / 2, self.duracion_sigma, (n, n_equipos)))
+            # Intervalo de origen: se deshace el desfase y luego el estiramiento alrededor del centro
+            origen = (relativo[None, :, :] - desfase[:, :, None]) / duracion[:, :, None]
+            dentro = np.abs(origen) < n_intervalos / 2
+            indices = np.rint(origen + centros[None, :, None]).astype(np.int64) % n_intervalos
+            valores = np.where(dentro, componentes[filas, indices], 0.0)
+            totales[inicio:inicio + n] = valores.sum(axis=1)
+        return totales
+
+
+def percentiles_perfil(perfiles, percentiles=(50, 90), pasos_por_hora=1):
+    """
+    Percentiles por intervalo y distribución de la demanda máxima de los sorteos.
+
+    Parameters
+    ----------
+    perfiles : ndarray (S, 144)
+        Perfiles diarios de 10 minutos ya escalados [kWh por intervalo].
+    percentiles : iterable of float
+    pasos_por_hora : int
+        1: percentiles sobre el perfil horario; 6: sobre el de 10 minutos.
+
+    Returns
+    -------
+    dict
+        perfiles {p: ndarray (24 * pasos_por_hora,)}, dem_max ndarray (S,) (máximo de cada
+        sorteo a esa resolución) y dem_max_percentiles {p: float}.
+    """
+    perfiles = np.asarray(perfiles, dtype=float)
+    if pasos_por_hora == 1:
+        perfiles = perfiles.reshape(len(perfiles), 24, INTERVALOS_POR_HORA).sum(axis=2)
+    dem_max = perfiles.max(axis=1)
+    percentiles = tuple(percentiles)
+    return {
+        "perfiles": dict(zip(percentiles, np.percentile(perfiles, percentiles, axis=0))),
+        "dem_max": dem_max,
+        "dem_max_percentiles": dict(zip(percentiles, np.percentile(dem_max, percentiles).tolist())),
+    }
+
+
+def _centro_circular(componentes):
+    """Intervalo central de uso de cada equipo (media circular ponderada por energía)."""
+    n_intervalos = componentes.shape[1]
+    angulo = 2 * np.pi * np.arange(n_intervalos) / n_intervalos
+    seno = componentes @ np.sin(angulo)
+    coseno = componentes @ np.cos(angulo)
+    return (np.arctan2(seno, coseno) % (2 * np.pi)) * n_intervalos / (2 * np.pi)
@@ -1,17 +1,15 @@
 import pandas as pd
 import numpy as np
 import os
+import time
+from dataclasses import dataclass
 from typing import Dict, List, Optional
-from pytoolconfig import dataclass
-try:
-    import numpy_financial as npf
-except ImportError:
-    npf = None
-import pyomo.environ as pyo
-from pyomo.opt import SolverFactory
+from utils.eventos import emitir
+from utils.perf import medir
+from utils.pgen import AlmacenPGEN, get_almacen_pgen
 
 class Optimizador:
-    def __init__(self, indice, cliente_data, pdem_cliente, dimension, path_pgen_clientes, logger=None):
+    def __init__(self, indice, cliente_data, pdem_cliente, dimension, path_pgen_clientes, logger=None, medidor=None, almacen_pgen=None, eventos=None):
         """
         Inicializa el optimizador.
         :param indice: Índice del cliente.
@@ -19,6 +17,8 @@ class Optimizador:
         :param pdem_cliente: Perfil de demanda del cliente.
         :param dimension: Resultados de la etapa de dimensionamiento (sizing).
         :param path_pgen_clientes: Ruta a la carpeta con perfiles de generación.
+        :param almacen_pgen: Almacén PGEN compartido (opcional, ver utils.pgen).
+        :param eventos: Registro de eventos JSONL (opcional, ver utils.eventos).
         """
         self.indice = indice
         self.cliente_data = cliente_data
@@ -26,6 +26,9 @@ class Optimizador:
         self.dimension = dimension
         self.path_pgen_clientes = path_pgen_clientes
         self.logger = logger
+        self.medidor = medidor
+        self.almacen_pgen = almacen_pgen
+        self.eventos = eventos
         # Atributos para almacenar estado y resultados
         self.params = {}
         self.model = None
@@ -34,6 +37,8 @@ class Optimizador:
         self.pgen_cliente = None # Variable para almacenar el perfil de generación
         self.array_pdem = None
         self.array_pgen = None
+        self.pasos_por_hora = 1  # 1: periodos de 1 h; 6: periodos de 10 minutos (según pdem_cliente)
+        self.tiempos_modelo = {}  # Construcción vs. resolución del modelo Pyomo
 
     @dataclass
     class MicrogridUCData:
@@ -84,6 +89,7 @@ class Optimizador:
             self.logger.log(mensaje, prefijo="Optimizador")
         else:
             print(f"[Optimizador] {mensaje}")
+        emitir(self.eventos, "Optimizador", mensaje=mensaje)
 
     def ejecutar(self):
         """
@@ -92,11 +98,13 @@ class Optimizador:
         self.log(f"🚀 Iniciando proceso para cliente {self.indice}...")
         
         # 1. Lectura y preparación de parámetros
-        self.leer_parametros()
+        with medir(self.medidor, "Optimizador", "leer_parametros"):
+            self.leer_parametros()
         
         # 2. Construcción y resolución del modelo de optimización
         # Optimización anual: 12 meses × 24 horas = 288 periodos
-        self.resolver_optimizacion(optimizar_anual=True)
+        with medir(self.medidor, "Optimizador", "resolver_optimizacion"):
+            self.resolver_optimizacion(optimizar_anual=True)
         
         # Alternativa: Optimizar solo un mes específico
         # self.resolver_optimizacion(mes_idx=0)
@@ -112,7 +120,8 @@ class Optimizador:
     def leer_parametros(self):
         """
         Extrae y prepara los parámetros necesarios desde cliente_data y dimension.
-        Mantiene los arrays de Demanda y Generación en formato estandarizado (12, 24) [Meses x Horas].
+        Mantiene los arrays de Demanda y Generación en formato estandarizado (12, 24) [Meses x Horas],
+        o (12, 144) si la demanda viene con resolución de 10 minutos (PGEN se reparte en 6 intervalos).
         """
         self.log("📖 [1/4] Leyendo parámetros de entrada...")
         
@@ -127,39 +136,30 @@ class Optimizador:
             raw_pdem = np.array(self.pdem_cliente)
 
         # Estandarización: Queremos formato (12, 24) -> (Meses, Horas)
-        # Si viene en formato (24, 12) -> (Horas, Meses), lo transponemos
-        if raw_pdem.shape == (24, 12):
+        # Si viene en formato (24, 12) -> (Horas, Meses), lo transponemos (igual con (144, 12) de 10 minutos)
+        if raw_pdem.shape in ((24, 12), (144, 12)):
             self.array_pdem = raw_pdem.T
             self.log(f"🔄 PDEM estandarizado: Transpuesto de {raw_pdem.shape} a {self.array_pdem.shape} (Meses x Horas)")
         else:
             self.array_pdem = raw_pdem
             self.log(f"ℹ️ PDEM cargado con forma: {self.array_pdem.shape}")
+        if self.array_pdem.ndim == 2 and self.array_pdem.shape[1] == 144:
+            self.pasos_por_hora = 6
         
         # --- 2. Cargar y guardar Perfil de Generación (Segundo Array) ---
-        aux = self.indice + 1
-        codigo = f"{int(aux):02d}"
-        archivo_cliente = None
-        
-        if os.path.exists(self.path_pgen_clientes):
-            archivos = os.listdir(self.path_pgen_clientes)
-            for archivo in archivos:
-                if archivo.startswith(f"PGEN_{codigo}_") and archivo.endswith(".xlsx"):
-                    archivo_cliente = archivo
-                    break
-        
-        if archivo_cliente:
+        codigo = AlmacenPGEN.codigo(self.indice)
+        if self.almacen_pgen is None:
+            self.almacen_pgen = get_almacen_pgen(self.path_pgen_clientes)
+        ruta_completa = self.almacen_pgen.ruta(self.indice)
+
+        if ruta_completa:
             try:
-                ruta_completa = os.path.join(self.path_pgen_clientes, archivo_cliente)
-                self.log(f"📂 Cargando perfil de generación: {archivo_cliente}")
-                
-                # Cargar hoja 'pv' y extraer rango específico
-                df_aux = pd.read_excel(ruta_completa, sheet_name='pv', header=None)
-                # Rango original: filas 6 a 17 (índices 5:17), columnas C a Z (índices 2:26) -> Resulta en (12, 24)
-                df_rango = df_aux.iloc[5:17, 2:26]
-                
-                # Guardar como array (Segundo Array)
-                # Al ser (12, 24) por lectura directa, ya cumple el estándar deseado
-                self.array_pgen = np.array(df_rango.values, dtype=float)
+                self.log(f"📂 Cargando perfil de generación: {os.path.basename(ruta_completa)}")
+                # Hoja 'pv', filas 6 a 17 y columnas C a Z -> (12, 24) [Meses x Horas], ya en el estándar deseado
+                self.array_pgen = self.almacen_pgen.perfil(self.indice)
+                if self.pasos_por_hora > 1:
+                    # Misma potencia [kW/kWp] en los intervalos de cada hora -> energía por intervalo
+                    self.array_pgen = np.repeat(self.array_pgen, self.pasos_por_hora, axis=1) / self.pasos_por_hora
                 self.log(f"✅ PGEN estandarizado y cargado. Forma: {self.array_pgen.shape} (Meses x Horas)")
                 
             except Exception as e:
@@ -210,17 +210,23 @@ class Optimizador:
         Define y resuelve el modelo matemático con Pyomo.
         
         :param mes_idx: Índice del mes a optimizar (0-11) si optimizar_anual=False.
-        :param optimizar_anual: Si True, optimiza los 12 meses simultáneamente (288 periodos).
+        :param optimizar_anual: Si True, optimiza los 12 meses simultáneamente (288 periodos,
+            o 1728 con resolución de 10 minutos).
         """
         self.log("⚙️ [2/4] Resolviendo optimización matemática...")
         
         # --- Construir datos de entrada desde atributos de clase ---
         cap_fv = self.params.get('capacidad_fv', 0.0)
         cap_bat = self.params.get('baterias_cap', 0.0)
+        # Periodos por día y duración de cada periodo [h]: las potencias máximas pasan a energía por periodo
+        pasos = self.pasos_por_hora
+        periodos_dia = 24 * pasos
+        dt = 1.0 / pasos
         
         # --- MODO: Optimización Anual (12 meses × 24 horas) ---
         if optimizar_anual:
-            self.log("📅 Modo: Optimización anual (288 periodos = 12 meses × 24 horas)")
+            unidad = "horas" if pasos == 1 else "periodos de 10 minutos"
+            self.log(f"📅 Modo: Optimización anual ({12 * periodos_dia} periodos = 12 meses × {periodos_dia} {unidad})")
             
             # Validar que tengamos datos completos
             if self.array_pdem is None or self.array_pdem.shape[0] < 12:
@@ -229,41 +235,36 @@ class Optimizador:
             
             if self.array_pgen is None or self.array_pgen.shape[0] < 12:
                 self.log("⚠️ Warning: Faltan datos de generación, usando 0.")
-                self.array_pgen = np.zeros((12, 24))
+                self.array_pgen = np.zeros((12, periodos_dia))
             
-            # Construir diccionarios para 288 periodos
-            # Periodo t = mes*24 + hora, donde t ∈ [0, 287]
-            demand_dict = {}
-            pv_avail_dict = {}
+            # Construir diccionarios para 288 periodos (1728 con 10 minutos)
+            # Periodo t = mes*periodos_dia + paso, donde t ∈ [0, 12*periodos_dia - 1]
+            # (en una sola pasada sobre los arreglos aplanados por filas)
+            demand_dict = dict(enumerate(self.array_pdem[:12, :periodos_dia].ravel().tolist()))
+            pv_avail_dict = dict(enumerate((self.array_pgen[:12, :periodos_dia] * cap_fv).ravel().tolist()))
             
-            for mes in range(12):
-                for hora in range(24):
-                    t = mes * 24 + hora  # Periodo global [0-287]
-                    demand_dict[t] = self.array_pdem[mes, hora]
-                    pv_avail_dict[t] = self.array_pgen[mes, hora] * cap_fv
-            
-            horizonte = list(range(288))  # 0 a 287
+            horizonte = list(range(12 * periodos_dia))  # 0 a 287 (1727)
             self.log(f"📊 Total demanda anual: {sum(demand_dict.values()):.2f} kWh")
             self.log(f"📊 Total generación anual: {sum(pv_avail_dict.values()):.2f} kWh")
         
         # --- MODO: Optimización Mensual (24 horas) ---
         else:
-            self.log(f"📅 Modo: Optimización mensual (mes {mes_idx+1}, 24 periodos)")
+            self.log(f"📅 Modo: Optimización mensual (mes {mes_idx+1}, {periodos_dia} periodos)")
             
             # Validar que tengamos datos
             if self.array_pdem is None:
                 self.log("⚠️ Warning: No hay datos de demanda. Usando valores por defecto.")
-                demand_dict = {t: 1.0 for t in range(24)}
+                demand_dict = {t: 1.0 for t in range(periodos_dia)}
             else:
-                demand_dict = {t: self.array_pdem[mes_idx, t] for t in range(24)}
+                demand_dict = {t: self.array_pdem[mes_idx, t] for t in range(periodos_dia)}
             
             if self.array_pgen is None or cap_fv == 0:
                 self.log("⚠️ Warning: No hay datos de generación o capacidad FV = 0.")
-                pv_avail_dict = {t: 0.0 for t in range(24)}
+                pv_avail_dict = {t: 0.0 for t in range(periodos_dia)}
             else:
-                pv_avail_dict = {t: self.array_pgen[mes_idx, t] * cap_fv for t in range(24)}
+                pv_avail_dict = {t: self.array_pgen[mes_idx, t] * cap_fv for t in range(periodos_dia)}
             
-            horizonte = list(range(24))  # 0 a 23
+            horizonte = list(range(periodos_dia))  # 0 a 23 (143)
             self.log(f"📊 Demanda del mes: {sum(demand_dict.values()):.2f} kWh")
             self.log(f"📊 Generación del mes: {sum(pv_avail_dict.values()):.2f} kWh")
         
@@ -291,8 +292,8 @@ class Optimizador:
             'e_init': cap_bat * 0.5 if cap_bat > 0 else 0.0,
             'e_min': cap_bat * 0.2 if cap_bat > 0 else 0.0,
             'e_max': cap_bat,
-            'p_ch_max': cap_bat / 2.0 if cap_bat > 0 else 0.0,
-            'p_dis_max': cap_bat / 2.0 if cap_bat > 0 else 0.0,
+            'p_ch_max': cap_bat / 2.0 * dt if cap_bat > 0 else 0.0,
+            'p_dis_max': cap_bat / 2.0 * dt if cap_bat > 0 else 0.0,
             'no_simultaneous_charge_discharge': no_sim_bat_flag,
             'eff_ch': 0.95,
             'eff_dis': 0.95,
@@ -301,8 +302,8 @@ class Optimizador:
             'ongrid': ongrid_flag,
             'grid_buy_price': precio_compra,
             'grid_sell_price': precio_venta,
-            'p_imp_max': 100.0,
-            'p_exp_max': cap_fv if cap_fv > 0 else 0.0,
+            'p_imp_max': 100.0 * dt,
+            'p_exp_max': cap_fv * dt if cap_fv > 0 else 0.0,
             'no_simultaneous_imp_exp': no_sim_grid_flag,
             # Load shedding
             'allow_ls': allow_ls_flag,
@@ -317,6 +318,9 @@ class Optimizador:
         )
         
         # --- Construcción del modelo Pyomo ---
+        # Importación diferida: Pyomo solo se carga cuando se construye un modelo
+        import pyomo.environ as pyo
+        t_inicio_modelo = time.perf_counter()
         model = pyo.ConcreteModel("UC_Microgrid")
         model.T = pyo.Set(initialize=data.T, ordered=True)
         T_list = list(data.T)
@@ -333,8 +337,8 @@ class Optimizador:
 
         if optimizar_anual:
             dias_mes = [31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31]
-            mes_de_t = {t: (t // 24) for t in T_list}
-            hora_de_t = {t: (t % 24) for t in T_list}
+            mes_de_t = {t: (t // periodos_dia) for t in T_list}
+            hora_de_t = {t: (t % periodos_dia) for t in T_list}  # Periodo dentro del día (hora con perfil horario)
             peso_t = {t: dias_mes[mes_de_t[t]] for t in T_list}
         else:
             dias_mes = [31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31]
@@ -432,7 +436,7 @@ class Optimizador:
         #     hora = hora_de_t[t]
         #     if hora == 0:
         #         t_inicio_mes[mes] = t
-        #     if hora == 23:
+        #     if hora == periodos_dia - 1:
         #         t_fin_mes[mes] = t
 
         # def soc_rule(m, t):
@@ -480,6 +484,7 @@ class Optimizador:
 
         # self.log('✅ Modelo construido con FO anual ponderada y ciclicidad mensual SOC.')
 
+        # from pyomo.opt import SolverFactory
         # solver_name = 'glpk'
         # solver = SolverFactory(solver_name)
 
@@ -525,6 +530,18 @@ class Optimizador:
         #     self.resultados_opt['objective_usd'] = None
         #     self.resultados_opt['descarga_total'] = 0
 
+        # --- Tiempos del modelo: construcción vs. resolución ---
+        construccion_modelo_s = time.perf_counter() - t_inicio_modelo
+        self.tiempos_modelo = {
+            "n_periodos": len(T_list),
+            "n_variables": model.nvariables(),
+            "n_restricciones": model.nconstraints(),
+            "construccion_modelo_s": construccion_modelo_s,
+            "resolucion_s": None,  # La llamada al solver está deshabilitada en esta versión
+        }
+        if self.medidor is not None:
+            self.medidor.registrar("Optimizador", "modelo_pyomo", **self.tiempos_modelo)
+
     def post_analisis(self, gestor):
         """
         Procesa los resultados brutos de la optimización para obtener KPIs.
@@ -593,6 +610,10 @@ class Optimizador:
         van = sum([f / ((1 + tasa_desc)**i) for i, f in enumerate(flujos_array)])
         
         # TIR (IRR)
+        try:
+            import numpy_financial as npf
+        except ImportError:
+            npf = None
         tir = None
         if npf:
             try:
@@ -1,4 +1,5 @@
 import pandas as pd
+from utils.perf import leer_excel
 
 class Preprocess:
     Electrodomesticos_Posibles = [
@@ -18,6 +19,37 @@ class Preprocess:
         'Cine en casa (Sistema de sonido + Pantalla gigante, proyector o similar)'
     ]
 
+    # Mapeos de normalización de la encuesta (se aplican vectorizados sobre columnas completas)
+    Mapeo_Columnas = {
+        'Nombre:': 'Nombre',
+        'Dirección de la instalación o casa para evaluación energética (calle, número y comuna):  ': 'Direccion',
+        'Tipo de solución:': 'Tipo de solución',
+        'Tamaño de la casa en metros cuadrados:': 'Tamaño casa',
+        'Ingrese la cantidad de habitaciones que tiene en su casa (Incluya todos los espacios menos los baños):': 'N° habitaciones',
+        'Ingrese la cantidad de baños que tiene en su casa:': 'N° baños',
+        '¿Algún miembro de la familia trabaja desde casa regularmente? ': 'Teletrabajo',
+        '¿Su casa tiene Calefacción Eléctrica?': 'Calefacción',
+        '¿Cuantas habitaciones tienen calefacción? ': 'N° habitaciones con calefaccion',
+        '¿Desea incluir en el estudio Calefacción Eléctrica? ': 'Desea calefacción',
+        '¿Cuántas habitaciones quiere calefaccionar? (Considerar habitaciones de 15 metros cuadrados)': 'N° habitaciones que quiere calefaccionar',
+        'Columna 15': 'Electrodomésticos Extra',
+        'Seleccione la región de la instalación o casa para evaluación energética:': 'Zona'
+    }
+    Mapeo_Tipo_Solucion = {
+        'Independiente': 'OffGrid',
+        'Conectado': 'OnGrid',
+        'Mixto': 'Hibrido'}
+    # Posición de la columna que se descarta (Columna 16: enlace a archivo adjunto)
+    Columna_Descartada = 16
+    # Zona de calefacción por región (las regiones no listadas quedan en Zona_Por_Defecto)
+    Zonas_Por_Region = {
+        'Valparaíso': 'Z1', 'Metropolitana': 'Z1', "O'Higgins": 'Z1',
+        'Maule': 'Z2', 'Ñuble': 'Z2', 'BioBío': 'Z2',
+        'La Araucanía': 'Z3', 'Los Ríos': 'Z3', 'Los Lagos': 'Z3',
+        'Aysén': 'Z4', 'Magallanes': 'Z4',
+    }
+    Zona_Por_Defecto = 'Z5'
+
     def __init__(self, ruta_archivo):
         self.ruta_archivo = ruta_archivo
         self.df_clientes = None
@@ -36,7 +68,8 @@ class Preprocess:
     def log(self, mensaje):
         self.historial.append(mensaje)
 
-    def ejecutar(self):
+    def ejecutar(self, numero=None):
+        # numero: cliente preseleccionado (numeración del menú); si es None se solicita por consola
         try:
             ## """Método principal que ejecuta funciones internas base."""
             ## Cargar datos desde el archivo Excel
@@ -52,7 +85,7 @@ class Preprocess:
             print("\nClientes disponibles:")
             for i, nombre in enumerate(self.df_clientes['Nombre'], start=1):
                 print(f"[{i}] {nombre}")
-            self.seleccionar_cliente()
+            self.seleccionar_cliente(numero)
             self.log(f"✔️ Cliente seleccionado: {self.cliente_actual['Nombre']}")
             self.obtener_cliente_actual()
             self.generar_vector_electrodomesticos()
@@ -65,48 +98,222 @@ class Preprocess:
             raise
 
     def cargar_datos(self):
-        import pandas as pd
-        self.df_clientes = pd.read_excel(self.ruta_archivo)
+        self.df_clientes = leer_excel(self.ruta_archivo)
         self.log("✔️ Datos cargados correctamente.")
 
     def renombrar_columnas(self):
-        self.df_clientes.rename(columns={
-            'Nombre:': 'Nombre',
-            'Dirección de la instalación o casa para evaluación energética (calle, número y comuna):  ': 'Direccion',
-            'Tipo de solución:': 'Tipo de solución',
-            'Tamaño de la casa en metros cuadrados:': 'Tamaño casa',
-            'Ingrese la cantidad de habitaciones que tiene en su casa (Incluya todos los espacios menos los baños):': 'N° habitaciones',
-            'Ingrese la cantidad de baños que tiene en su casa:': 'N° baños',
-            '¿Algún miembro de la familia trabaja desde casa regularmente? ': 'Teletrabajo',
-            '¿Su casa tiene Calefacción Eléctrica?': 'Calefacción',
-            '¿Cuantas habitaciones tienen calefacción? ': 'N° habitaciones con calefaccion',
-            '¿Desea incluir en el estudio Calefacción Eléctrica? ': 'Desea calefacción',
-            '¿Cuántas habitaciones quiere calefaccionar? (Considerar habitaciones de 15 metros cuadrados)': 'N° habitaciones que quiere calefaccionar',
-            'Columna 15': 'Electrodomésticos Extra',
-            'Seleccione la región de la instalación o casa para evaluación energética:': 'Zona'
-        }, inplace=True)
+        self.df_clientes.rename(columns=self.Mapeo_Columnas, inplace=True)
 
             # Eliminar la columna 16
-        if self.df_clientes.shape[1] > 16:  # Solo si existe
-            self.df_clientes.drop(self.df_clientes.columns[16], axis=1, inplace=True)
+        if self.df_clientes.shape[1] > self.Columna_Descartada:  # Solo si existe
+            self.df_clientes.drop(self.df_clientes.columns[self.Columna_Descartada], axis=1, inplace=True)
 
     def formatear_tipo_solucion(self):
-        tipo_solucion_mapeo = {
-            'Independiente': 'OffGrid',
-            'Conectado': 'OnGrid',
-            'Mixto': 'Hibrido'}
         # Verifica si la columna 'Tipo de solución' existe antes de intentar formatearla
         # y aplica el mapeo correspondiente
         if 'Tipo de solución' in self.df_clientes.columns:
-            self.df_clientes['Tipo de solución'] = self.df_clientes['Tipo de solución'].astype(str).apply(
-                lambda solucion: tipo_solucion_mapeo.get(solucion.strip().split()[0], solucion)
-            )
+            self.df_clientes['Tipo de solución'] = self.mapear_tipo_solucion(self.df_clientes['Tipo de solución'])
             self.log("Columna 'tipo_de_solucion' formateada correctamente")
         else:
             self.log("⚠️ Columna 'Tipo de solución' no encontrada")
 
-    def seleccionar_cliente(self):
-        indice = int(input("\nIngrese el número del cliente: "))
+    @classmethod
+    def mapear_tipo_solucion(cls, serie):
+        """
+        Traduce la respuesta de la encuesta a OffGrid/OnGrid/Hibrido según su primera palabra
+        (operación vectorizada; los valores sin mapeo se conservan).
+        """
+        texto = serie.astype(str)
+        return texto.str.strip().str.split().str[0].map(cls.Mapeo_Tipo_Solucion).fillna(texto)
+
+    def leer_encuesta_por_bloques(self, tamano_bloque=500):
+        """
+        Lee la encuesta en modo streaming (openpyxl read-only) y entrega bloques ya
+        normalizados: columnas renombradas, columna 16 descartada y tipo de solución mapeado.
+
+        Sólo un bloque de filas está en memoria a la vez. El índice de cada bloque
+        continúa la numeración de la encuesta (base 0), igual que cargar_tabla().
+
+        Parameters
+        ----------
+        tamano_bloque : int
+            Número de respuestas por bloque.
+
+        Yields
+        ------
+        pandas.DataFrame
+        """
+        import numpy as np
+        from openpyxl import load_workbook
+
+        libro = load_workbook(self.ruta_archivo, read_only=True, data_only=True)
+        try:
+            filas = libro.worksheets[0].iter_rows(values_only=True)
+            encabezado = next(filas, None)
+            if encabezado is None:
+                return
+            # Mapeo de columnas resuelto una sola vez para toda la lectura
+            nombres = [self.Mapeo_Columnas.get(h, h) if h is not None else f"Unnamed: {i}"
+                       for i, h in enumerate(encabezado)]
+            posiciones = [i for i in range(len(nombres))
+                          if not (len(nombres) > self.Columna_Descartada and i == self.Columna_Descartada)]
+            columnas = [nombres[i] for i in posiciones]
+
+            def construir(bloque, inicio):
+                df = pd.DataFrame(bloque, columns=columnas, index=pd.RangeIndex(inicio, inicio + len(bloque)))
+                df = df.where(df.notna(), np.nan).infer_objects()
+                if 'Tipo de solución' in df.columns:
+                    df['Tipo de solución'] = self.mapear_tipo_solucion(df['Tipo de solución'])
+                return df
+
+            bloque, inicio, vacias = [], 0, 0
+            for fila in filas:
+                if all(v is None for v in fila):
+                    vacias += 1  # Las filas vacías sólo cuentan si luego hay más respuestas
+                    continue
+                fila = tuple(fila) + (None,) * (len(nombres) - len(fila))
+                for _ in range(vacias):
+                    bloque.append((None,) * len(columnas))
+                vacias = 0
+                bloque.append(tuple(fila[i] for i in posiciones))
+                if len(bloque) >= tamano_bloque:
+                    yield construir(bloque, inicio)
+                    inicio += len(bloque)
+                    bloque = []
+            if bloque:
+                yield construir(bloque, inicio)
+        finally:
+            libro.close()
+
+    @classmethod
+    def matriz_electrodomesticos(cls, df):
+        """
+        Vectores de electrodomésticos de todas las filas en una sola pasada.
+
+        Mismo resultado que generar_vector_electrodomesticos fila a fila: búsqueda de
+        subcadenas (sin regex) sobre 'Electrodomésticos Extra' y, en la columna del
+        calefactor, el número de habitaciones calefaccionadas si 'Calefacción' es 'Si'.
+
+        Parameters
+        ----------
+        df : pandas.DataFrame
+            Encuesta (o bloque) con las columnas ya renombradas.
+
+        Returns
+        -------
+        tuple
+            (ndarray int (n_filas, 14), ndarray bool (n_filas,)). La máscara marca las
+            filas con valores que el cálculo por fila no acepta (p. ej. 'Calefacción'
+            vacía o habitaciones no numéricas); esas filas deben prepararse con
+            preparar_registro para conservar su comportamiento (y su error).
+        """
+        import numpy as np
+
+        n = len(df)
+        matriz = np.zeros((n, len(cls.Electrodomesticos_Posibles)), dtype=np.int64)
+        revisar = np.zeros(n, dtype=bool)
+        if 'Electrodomésticos Extra' not in df.columns:
+            return matriz, revisar
+
+        extras = df['Electrodomésticos Extra']
+        es_texto = extras.map(lambda valor: isinstance(valor, str)).to_numpy(dtype=bool)
+        texto = extras.where(es_texto, "").astype(str)
+        con_extras = (texto.str.strip().str.len() > 0).to_numpy()
+
+        for j, item in enumerate(cls.Electrodomesticos_Posibles):
+            if item == 'Calefactor Eléctrico':
+                continue
+            matriz[:, j] = texto.str.contains(item, regex=False).to_numpy() & con_extras
+
+        # Calefactor: habitaciones con calefacción (truncadas a entero, como int())
+        j = cls.Electrodomesticos_Posibles.index('Calefactor Eléctrico')
+        if 'Calefacción' in df.columns:
+            calefaccion = df['Calefacción']
+            calef_texto = calefaccion.map(lambda valor: isinstance(valor, str)).to_numpy(dtype=bool)
+            revisar |= con_extras & ~calef_texto
+            con_calefaccion = con_extras & calef_texto & (
+                calefaccion.where(calef_texto, "").astype(str).str.strip() == 'Si').to_numpy()
+            if 'N° habitaciones con calefaccion' in df.columns:
+                habitaciones = df['N° habitaciones con calefaccion']
+                numero = pd.to_numeric(habitaciones, errors='coerce').to_numpy(dtype=float)
+                presente = habitaciones.notna().to_numpy()
+                no_numerico = presente & (~np.isfinite(numero)
+                                          | habitaciones.map(lambda valor: isinstance(valor, str)).to_numpy(dtype=bool))
+                revisar |= con_calefaccion & no_numerico
+                valido = con_calefaccion & presente & ~no_numerico
+                matriz[valido, j] = np.trunc(numero[valido]).astype(np.int64)
+        return matriz, revisar
+
+    @classmethod
+    def asignar_zonas(cls, df):
+        """'Tipo Zona' de todas las filas a partir de la región (tabla Zonas_Por_Region)."""
+        if 'Zona' not in df.columns:
+            return pd.Series(cls.Zona_Por_Defecto, index=df.index, dtype=object)
+        return df['Zona'].map(cls.Zonas_Por_Region).fillna(cls.Zona_Por_Defecto).astype(object)
+
+    def preparar_bloque(self, df):
+        """
+        Prepara todas las filas de un bloque de la encuesta de una vez (modo lote).
+
+        Returns
+        -------
+        tuple
+            (DataFrame con la columna 'Tipo Zona', matriz de electrodomésticos
+            (n_filas, 14), máscara de filas a preparar con preparar_registro).
+        """
+        matriz, revisar = self.matriz_electrodomesticos(df)
+        df = df.copy()
+        df['Tipo Zona'] = self.asignar_zonas(df)
+        self.log(f"Bloque preparado: {len(df)} clientes, {int(revisar.sum())} a revisar fila a fila.")
+        return df, matriz, revisar
+
+    def construir_indice(self, tamano_bloque=500, columnas=None):
+        """
+        Recorre la encuesta en bloques y construye su IndiceEncuesta (selección por ID,
+        nombre, rango o filtro). Sólo las columnas indexadas quedan en memoria.
+        """
+        from utils.seleccion import COLUMNAS_INDICE, IndiceEncuesta
+
+        indice = IndiceEncuesta(columnas if columnas is not None else COLUMNAS_INDICE)
+        for bloque in self.leer_encuesta_por_bloques(tamano_bloque):
+            bloque = bloque.assign(**{'Tipo Zona': self.asignar_zonas(bloque)})
+            indice.agregar(bloque)
+        self.log(f"✔️ Índice de la encuesta construido: {indice.n_filas} clientes.")
+        return indice
+
+    def cargar_tabla(self):
+        """Carga la encuesta y normaliza columnas y tipo de solución, sin seleccionar cliente."""
+        self.cargar_datos()
+        self.renombrar_columnas()
+        self.formatear_tipo_solucion()
+        return self.df_clientes
+
+    def preparar_cliente(self, indice):
+        """
+        Prepara un cliente por índice (base 0) sin interacción con el usuario.
+        Requiere haber llamado antes a cargar_tabla().
+        """
+        self.seleccionar_cliente(numero=indice + 1)
+        return self.preparar_registro(self.indice_cliente, self.cliente_actual)
+
+    def preparar_registro(self, indice, registro):
+        """
+        Prepara un cliente a partir de su fila ya normalizada (p. ej. un registro de
+        leer_encuesta_por_bloques), sin necesidad de tener la encuesta completa cargada.
+        """
+        self.cliente_actual = registro.copy()
+        self.indice_cliente = indice
+        self.obtener_cliente_actual()
+        self.generar_vector_electrodomesticos()
+        self.calcular_zona_calefaccion()
+        return self.indice_cliente, self.cliente_actual, self.vector_prueba
+
+    def seleccionar_cliente(self, numero=None):
+        # numero: posición base 1 (igual que el menú). Si no se entrega, se solicita por consola.
+        if numero is None:
+            indice = int(input("\nIngrese el número del cliente: "))
+        else:
+            indice = int(numero)
         if self.df_clientes is None:
             raise ValueError("Primero debes cargar los datos antes de seleccionar un cliente.")
         if 0 < indice <= len(self.df_clientes):
@@ -167,25 +374,9 @@ class Preprocess:
 
 
     def calcular_zona_calefaccion(self):
-        # Definir las zonas de calefacción
-        # Definir las zonas de calefacción
-        Zona_1 = ['Valparaíso', 'Metropolitana', "O'Higgins"]
-        Zona_2 = ['Maule', 'Ñuble', 'BioBío']
-        Zona_3 = ['La Araucanía', 'Los Ríos', 'Los Lagos']
-        Zona_4 = ['Aysén', 'Magallanes']
-
+        # Zona de calefacción según la región (tabla Zonas_Por_Region; Z5 para regiones no listadas)
         region_cliente = self.cliente_actual.get('Zona', "")
-
-        if region_cliente in Zona_1:
-            self.tipo_zona = 'Z1'
-        elif region_cliente in Zona_2:
-            self.tipo_zona = 'Z2'
-        elif region_cliente in Zona_3:
-            self.tipo_zona = 'Z3'
-        elif region_cliente in Zona_4:
-            self.tipo_zona = 'Z4'
-        else:
-            self.tipo_zona = 'Z5'  # Zona por defecto para regiones no listadas
+        self.tipo_zona = self.Zonas_Por_Region.get(region_cliente, self.Zona_Por_Defecto)
 
         # print(f"Zona de calefacción calculada: {self.tipo_zona}")
         self.log(f"Zona de calefacción calculada: {self.tipo_zona}")
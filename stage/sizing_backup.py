@@ -1,8 +1,136 @@
 import os
+import numpy as np
 import pandas as pd
+from utils.eventos import emitir
+from utils.perf import medir
+from utils.pgen import get_almacen_pgen
+from utils.redondeo import redondear
+from utils.referencia import leer_tabla
+from utils.reportes import DETALLE, RESUMEN, Reportes, tabla
+
+
+def potencias_minimas_offgrid(energia_gen, energia_dem, pasos):
+    """
+    Multiplicador PV mínimo por mes para uno o varios pasos y clientes, sin iterar.
+
+    Equivale exactamente a, para cada mes y paso::
+
+        pv_n = 1.0
+        while energia_gen * pv_n < energia_dem:
+            pv_n += paso
+        round(pv_n, 2)
+
+    El número de pasos se estima con una división con techo,
+    k = ceil((energia_dem / energia_gen - 1) / paso), y pv_n se toma de la suma
+    acumulada 1.0 + paso + paso + ... (np.add.accumulate suma en el mismo orden que el
+    ciclo, con el mismo redondeo). La estimación se corrige con la condición del ciclo
+    en los pocos casos en que el redondeo la desplaza un paso.
+
+    Parameters
+    ----------
+    energia_gen, energia_dem : array_like (..., 12)
+        Energía generada por kW instalado y energía demandada por mes [kWh].
+    pasos : float or array_like (P,)
+        Pasos del multiplicador [kW].
+
+    Returns
+    -------
+    numpy.ndarray
+        Forma shape(pasos) + forma común de las energías, redondeado a 2 decimales.
+
+    Raises
+    ------
+    ValueError
+        Si un paso no es positivo o un mes con demanda no tiene generación (el ciclo
+        no terminaría).
+    """
+    gen = np.asarray(energia_gen, dtype=float)
+    dem = np.asarray(energia_dem, dtype=float)
+    pasos = np.asarray(pasos, dtype=float)
+    forma = np.broadcast_shapes(gen.shape, dem.shape)
+    gen = np.broadcast_to(gen, forma).reshape(1, -1)
+    dem = np.broadcast_to(dem, forma).reshape(1, -1)
+    paso = pasos.reshape(-1, 1)
+    if not (paso > 0).all():
+        raise ValueError(f"❌ Los pasos PV deben ser mayores que 0: {pasos}")
+    falta = gen < dem  # El ciclo avanza al menos una vez
+    if (falta & ~(gen > 0)).any():
+        raise ValueError("❌ Hay meses con demanda y sin generación PV: no existe potencia que la cubra.")
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        k = np.where(falta, np.ceil((dem / gen - 1.0) / paso), 0.0).astype(np.int64)
+    k = np.maximum(k, 0)
+    n_columnas = int(k.max()) + 3
+    sumandos = np.empty((len(paso), n_columnas))
+    sumandos[:, 0] = 1.0
+    sumandos[:, 1:] = paso
+    acumulado = np.add.accumulate(sumandos, axis=1)  # acumulado[:, j] = pv_n tras j pasos
+    filas = np.arange(len(paso))[:, None]
+    # Corrección: k es el primer j con gen * pv_n >= dem
+    while True:
+        atras = (k > 0) & ~(gen * acumulado[filas, np.maximum(k - 1, 0)] < dem)
+        if not atras.any():
+            break
+        k -= atras
+    while True:
+        adelante = gen * acumulado[filas, k] < dem
+        if not adelante.any():
+            break
+        k += adelante
+    return redondear(acumulado[filas, k], 2).reshape(pasos.shape + forma)
+
+
+class GrillaSensibilidad:
+    """
+    Energía residual diaria (generación - demanda) sobre una grilla de escenarios.
+
+    Los ejes de ``valores`` son (potencia PV, capacidad de batería, escala de demanda,
+    mes) y la grilla completa se calcula de una vez por broadcasting::
+
+        valores[p, b, s, m] = energia_gen[m] * potencias[p] - escalas[s] * energia_dem[m] + baterias[b]
+
+    La capacidad útil de batería se suma como energía disponible en el día. Con una
+    sola batería (0 kWh) y una sola escala (1.0) es la energía residual de siempre.
+
+    Parameters
+    ----------
+    energia_gen : array_like (12,)
+        Energía generada por kW instalado en cada mes [kWh/kW].
+    energia_dem : array_like (12,)
+        Energía demandada en cada mes [kWh].
+    potencias : array_like (P,)
+        Potencias PV evaluadas [kWp].
+    baterias : array_like (B,)
+        Capacidades útiles de batería [kWh].
+    escalas : array_like (S,)
+        Factores de escala de la demanda [-].
+    """
+
+    def __init__(self, energia_gen, energia_dem, potencias, baterias=(0.0,), escalas=(1.0,)):
+        self.potencias = np.asarray(potencias, dtype=float).reshape(-1)
+        self.baterias = np.asarray(baterias, dtype=float).reshape(-1)
+        self.escalas = np.asarray(escalas, dtype=float).reshape(-1)
+        gen = np.asarray(energia_gen, dtype=float)
+        dem = np.asarray(energia_dem, dtype=float)
+        self.valores = (gen * self.potencias[:, None, None, None]
+                        - self.escalas[None, None, :, None] * dem
+                        + self.baterias[None, :, None, None])
+
+    @property
+    def central(self):
+        """Posición de la potencia nominal (centro de la grilla de potencias)."""
+        return len(self.potencias) // 2
+
+    def residual(self, potencia=None, bateria=0, escala=0):
+        """Energía residual por mes (12,) de un escenario (por defecto, la potencia nominal)."""
+        return self.valores[self.central if potencia is None else potencia, bateria, escala]
+
+    def vista(self, bateria=0, escala=0):
+        """DataFrame meses x potencias (columnas 0..P-1) de un escenario de batería y demanda, para reportes."""
+        return pd.DataFrame(self.valores[:, bateria, escala].T)
 
 class Dimensionamiento:
-    def __init__(self, indice, cliente_data, pdem_cliente, Dem_Max, path_pgen, path_equipos, logger=None, interactive_mode=False):
+    def __init__(self, indice, cliente_data, pdem_cliente, Dem_Max, path_pgen, path_equipos, logger=None, interactive_mode=False, medidor=None, almacen=None, almacen_pgen=None, reportes=None, eventos=None, objetivo_bateria=None, objetivo_lolp=None, buscar_configuraciones=False):
         self.indice_cliente = indice
         self.cliente_data = cliente_data
         self.pdem_cliente = pdem_cliente
@@ -11,17 +139,32 @@ class Dimensionamiento:
         self.path_equipos = path_equipos
         self.logger = logger
         self.interactive_mode = interactive_mode
+        self.medidor = medidor
+        self.eventos = eventos  # Registro de eventos JSONL (opcional)
+        self.almacen = almacen  # Almacén de tablas de referencia (opcional)
+        self.almacen_pgen = almacen_pgen  # Almacén de perfiles PGEN (si es None se usa el del proceso)
+        self.reportes = reportes if reportes is not None else Reportes()  # Tablas según verbosidad (ver utils.reportes)
+        # Fracción máxima de energía no servida para dimensionar baterías por simulación de SOC (None = autonomía)
+        self.objetivo_bateria = objetivo_bateria
+        # LOLP máxima para la superficie PV x batería (None = no se calcula, ver superficie_lolp_offgrid)
+        self.objetivo_lolp = objetivo_lolp
+        self.superficie_lolp = None
+        # Búsqueda combinatoria del frente costo vs. margen (ver frente_configuraciones_offgrid)
+        self.buscar_configuraciones = buscar_configuraciones
+        self.frente_configuraciones = None
         # Leer hojas desde el archivo Excel de equipos
-        self.eq_paneles    = pd.read_excel(self.path_equipos, sheet_name="Paneles")
-        self.eq_inversores = pd.read_excel(self.path_equipos, sheet_name="Inversores")
-        self.eq_baterias   = pd.read_excel(self.path_equipos, sheet_name="Baterias")
-        self.eq_mppts      = pd.read_excel(self.path_equipos, sheet_name="MPPTs")
+        with medir(self.medidor, "Dimensionamiento", "cargar_equipos"):
+            self.eq_paneles    = leer_tabla(self.almacen, self.path_equipos, sheet_name="Paneles")
+            self.eq_inversores = leer_tabla(self.almacen, self.path_equipos, sheet_name="Inversores")
+            self.eq_baterias   = leer_tabla(self.almacen, self.path_equipos, sheet_name="Baterias")
+            self.eq_mppts      = leer_tabla(self.almacen, self.path_equipos, sheet_name="MPPTs")
         self.df_pgen_cliente = None  # aquí se guardará el archivo Excel cargado
         self.resultados_por_paso = {}
         self.pasos_default = [0.4, 0.5, 0.8, 1.0]
         self.meses = ['Ene', 'Feb', 'Mar', 'Abr', 'May', 'Jun',
                       'Jul', 'Ago', 'Sep', 'Oct', 'Nov', 'Dic']
         self.meses_criticos = None
+        self.sensibilidad = None  # GrillaSensibilidad del último calc_sensibilidad
         self.dimensionamiento_final = None
         self.panel_criterio_minprecio = None
         self.panel_criterio_avgprecio = None
@@ -34,6 +177,7 @@ class Dimensionamiento:
             self.logger.log(mensaje, prefijo="Sizing")
         else:
             print(f"[Sizing] {mensaje}")
+        emitir(self.eventos, "Dimensionamiento", mensaje=mensaje)
 
     def ejecutar(self, path_pgen=None, indice_cliente=None):
         
@@ -44,32 +188,49 @@ class Dimensionamiento:
             path_pgen = self.path_pgen
 
         # Cargar archivo PGEN
-        self.cargar_archivo_pgen(path_pgen)
+        with medir(self.medidor, "Dimensionamiento", "cargar_archivo_pgen"):
+            self.cargar_archivo_pgen(path_pgen)
 
         # Obtener el tipo de solución del cliente
         tipo_solucion = self.cliente_data.get("Tipo de solución")
 
         # Lógica según tipo de solución
         if tipo_solucion == "OffGrid":
-            self.dimensionar_offgrid_interactivo()
-            sens_resultado =self.calc_sensibilidad_interactivo()
+            with medir(self.medidor, "Dimensionamiento", "dimensionar_offgrid_interactivo"):
+                self.dimensionar_offgrid_interactivo()
+            with medir(self.medidor, "Dimensionamiento", "calc_sensibilidad_interactivo"):
+                sens_resultado =self.calc_sensibilidad_interactivo()
             rango = sens_resultado["Rango"]
-            ediff = sens_resultado["EnergiaResidual"]
-            self.calc_meses_criticos_interactivo(rango, ediff, self.meses)
-            self.calcular_dimensionamiento_final_offgrid()
-            seleccionador_paneles = SeleccionPanel(self.eq_paneles, self.dimensionamiento_final)
-            paneles = seleccionador_paneles.ejecutar()
+            ediff = sens_resultado["Grilla"].residual()
+            with medir(self.medidor, "Dimensionamiento", "calc_meses_criticos_interactivo"):
+                self.calc_meses_criticos_interactivo(rango, ediff, self.meses)
+            with medir(self.medidor, "Dimensionamiento", "calcular_dimensionamiento_final_offgrid"):
+                self.calcular_dimensionamiento_final_offgrid()
+            if self.objetivo_lolp is not None:
+                with medir(self.medidor, "Dimensionamiento", "superficie_lolp_offgrid"):
+                    self.superficie_lolp = self.superficie_lolp_offgrid(self.objetivo_lolp)
+            if self.buscar_configuraciones:
+                with medir(self.medidor, "Dimensionamiento", "frente_configuraciones_offgrid"):
+                    self.frente_configuraciones = self.frente_configuraciones_offgrid()
+            with medir(self.medidor, "Dimensionamiento", "SeleccionPanel"):
+                seleccionador_paneles = SeleccionPanel(self.eq_paneles, self.dimensionamiento_final, reportes=self.reportes)
+                paneles = seleccionador_paneles.ejecutar()
             self.panel_criterio_minprecio = paneles["Criterio_Min_Precio"]
             self.panel_criterio_avgprecio = paneles["Criterio_Avg_Precio"]
-            seleccionador_mppt = SeleccionMPPT(self.eq_paneles, self.eq_mppts, self.dimensionamiento_final, self.panel_criterio_minprecio, self.panel_criterio_avgprecio)
-            mppt = seleccionador_mppt.ejecutar()
+            with medir(self.medidor, "Dimensionamiento", "SeleccionMPPT"):
+                seleccionador_mppt = SeleccionMPPT(self.eq_paneles, self.eq_mppts, self.dimensionamiento_final, self.panel_criterio_minprecio, self.panel_criterio_avgprecio, reportes=self.reportes)
+                mppt = seleccionador_mppt.ejecutar()
             self.seleccion_mppt = mppt["MPPTs"]
             self.seleccion_mppt_paneles = mppt["Paneles_with_MPPT"]   
-            seleccionador_inversor = SeleccionInversor(self.eq_inversores, self.dimensionamiento_final, self.seleccion_mppt)
-            inversor = seleccionador_inversor.ejecutar()
+            with medir(self.medidor, "Dimensionamiento", "SeleccionInversor"):
+                seleccionador_inversor = SeleccionInversor(self.eq_inversores, self.dimensionamiento_final, self.seleccion_mppt, reportes=self.reportes)
+                inversor = seleccionador_inversor.ejecutar()
             self.seleccion_inversor = inversor["Inversor"]
-            seleccionador_bateria = SeleccionBateria(self.eq_baterias, self.dimensionamiento_final)
-            self.seleccionador_bateria = seleccionador_bateria.ejecutar()
+            with medir(self.medidor, "Dimensionamiento", "SeleccionBateria"):
+                serie_horaria = self.serie_horaria_offgrid() if self.objetivo_bateria is not None else None
+                seleccionador_bateria = SeleccionBateria(self.eq_baterias, self.dimensionamiento_final, reportes=self.reportes,
+                                                         serie_horaria=serie_horaria, objetivo=self.objetivo_bateria)
+                self.seleccionador_bateria = seleccionador_bateria.ejecutar()
 
         elif tipo_solucion == "OnGrid":
             self.log("🔄 Iniciando dimensionamiento OnGrid...")
@@ -88,6 +249,8 @@ class Dimensionamiento:
             "potencia_panel_total": self.dimensionamiento_final.get('Potencia_PV_Total_kW', 0) if self.dimensionamiento_final else 0,
             # Intento de extraer número de baterías si existe
             "num_baterias": getattr(self, 'seleccionador_bateria', {}).get('Num_Baterias', 0) if hasattr(self, 'seleccionador_bateria') and isinstance(self.seleccionador_bateria, dict) else 0,
+            "superficie_lolp": self.superficie_lolp,
+            "frente_configuraciones": self.frente_configuraciones,
             "costo_total_inversion": 15000  # Placeholder: Sumar costos reales aquí
         }
         return resultados_etapa
@@ -95,53 +258,28 @@ class Dimensionamiento:
 
     def cargar_archivo_pgen(self, base_path=None):
         """
-        Carga el archivo Excel del cliente según su índice (número identificador).
-        El archivo debe tener el formato PGEN_0X_NombreCliente.xlsx
+        Carga el perfil de generación del cliente según su índice (número identificador).
+        El archivo debe tener el formato PGEN_0X_NombreCliente.xlsx y se obtiene del
+        almacén PGEN compartido (ver utils.pgen).
         """
-        # print(indice_cliente)
-        aux = self.indice_cliente + 1
-        # print(aux)
-
         if self.indice_cliente is None:
             raise ValueError("⚠️ No se ha definido 'indice_cliente'. Asigna un valor al instanciar la clase o antes de ejecutar el método.")
 
-        # Asegurar que el índice tenga dos dígitos (por ejemplo, 1 -> 01)
-        codigo = f"{int(aux):02d}"  
-
-        # Buscar archivos en el directorio que empiecen con ese patrón
-        archivos = os.listdir(base_path)
-        archivo_cliente = None
-
-        for archivo in archivos:
-            if archivo.startswith(f"PGEN_{codigo}_") and archivo.endswith(".xlsx"):
-                archivo_cliente = archivo
-                break
-
-        if archivo_cliente is None:
-            raise FileNotFoundError(f"❌ No se encontró un archivo para el cliente con índice {codigo} en {base_path}")
+        if self.almacen_pgen is None:
+            self.almacen_pgen = get_almacen_pgen(base_path or self.path_pgen, almacen=self.almacen)
 
+        # Rango filas 6 a 17, columnas C a Z de la hoja 'pv' (FileNotFoundError si no hay archivo)
+        valores = self.almacen_pgen.valores(self.indice_cliente)
         print("------AQUI--------, Sizing: 123")
-        ruta_completa = os.path.join(base_path, archivo_cliente)
-        print(f"📂 Archivo encontrado: {archivo_cliente}")
-
-        # Cargar el archivo
-        df_aux = pd.read_excel(ruta_completa, sheet_name='pv', header=None)
+        print(f"📂 Archivo encontrado: {os.path.basename(self.almacen_pgen.ruta(self.indice_cliente))}")
         print("✅ Archivo cargado correctamente.")
- 
-        # Extraer el rango: filas 6 a 17 (índice 5 a 16), columnas C a Z (índice 2 a 25)
-        df_rango = df_aux.iloc[5:17, 2:26]
 
-        # Asignar nombres de columnas: 1 a 24 (horas)
-        df_rango.columns = list(range(1, 25))
-
-        # Asignar nombres de fila: meses del año
+        # Asignar nombres de columnas: 1 a 24 (horas) y de fila: meses del año
         meses = ['Enero', 'Febrero', 'Marzo', 'Abril', 'Mayo', 'Junio',
                 'Julio', 'Agosto', 'Septiembre', 'Octubre', 'Noviembre', 'Diciembre']
-        df_rango.index = meses
+        df_rango = pd.DataFrame(valores, index=meses, columns=list(range(1, 25)))
         # Mostrar el resultado
-        print()
-        print("📊 Perfil de generación cargado (kW):")
-        print(df_rango)
+        self.reportes.agregar("Sizing", "\n📊 Perfil de generación cargado (kW):", lambda: df_rango, nivel=DETALLE)
         self.df_pgen_cliente = df_rango
 
     def dimensionar_offgrid(self, paso_pv=0.5):
@@ -164,26 +302,22 @@ class Dimensionamiento:
         energia_dem = self.pdem_cliente.sum(axis=0).tolist()
 
         # Reporte previo
-        print("📊 Tabla de Energía Generada vs Demandada (por mes):")
-        print("Mes    - EGen [kWh] - EDem [kWh]")
-        for i in range(12):
-            print(f"{meses[i]:<6} - {energia_pvgen[i]:10.2f} - {energia_dem[i]:10.2f}")
-
-        # Cálculo de potencia mínima por mes
-        pot_pv = [0] * 12
-        for i in range(12):
-            pv_n = 1.0
-            while energia_pvgen[i] * pv_n < energia_dem[i]:
-                pv_n += paso_pv
-            pot_pv[i] = round(pv_n, 2)
+        self.reportes.agregar(
+            "Sizing", "📊 Tabla de Energía Generada vs Demandada (por mes):",
+            lambda: tabla((f"{meses[i]:<6} - {energia_pvgen[i]:10.2f} - {energia_dem[i]:10.2f}" for i in range(12)),
+                          encabezado=["Mes    - EGen [kWh] - EDem [kWh]"]),
+            nivel=RESUMEN)
+
+        # Cálculo de potencia mínima por mes (ver potencias_minimas_offgrid)
+        pot_pv = potencias_minimas_offgrid(energia_pvgen, energia_dem, paso_pv).tolist()
 
         # Reporte final
-        print("\n⚙️ Resultado del dimensionamiento:")
-        print("Mes    - PotPV [kW] - EGen [kWh] - EDem [kWh]")
-        for i in range(12):
-            eg = energia_pvgen[i] * pot_pv[i]
-            ed = energia_dem[i]
-            print(f"{meses[i]:<6} - {pot_pv[i]:10.2f} - {eg:10.2f} - {ed:10.2f}")
+        self.reportes.agregar(
+            "Sizing", "\n⚙️ Resultado del dimensionamiento:",
+            lambda: tabla((f"{meses[i]:<6} - {pot_pv[i]:10.2f} - {energia_pvgen[i] * pot_pv[i]:10.2f} - {energia_dem[i]:10.2f}"
+                           for i in range(12)),
+                          encabezado=["Mes    - PotPV [kW] - EGen [kWh] - EDem [kWh]"]),
+            nivel=RESUMEN)
 
         # Puedes guardar resultados en atributos
         self.potencia_pv_mensual = pot_pv
@@ -198,6 +332,20 @@ class Dimensionamiento:
             "PasoPV": paso_pv
             }
 
+    def barrer_pasos_offgrid(self, pasos=None):
+        """
+        Potencia mínima por mes para varios pasos PV a la vez (por defecto self.pasos_default).
+        Guarda cada resultado en self.resultados_por_paso y devuelve una tabla pasos x meses.
+        """
+        if self.df_pgen_cliente is None or self.pdem_cliente is None:
+            raise ValueError("Perfil_Gen_Cliente o Perfil_Dem_Cliente no están definidos.")
+        pasos = list(self.pasos_default if pasos is None else pasos)
+        potencias = potencias_minimas_offgrid(self.df_pgen_cliente.sum(axis=1).to_numpy(dtype=float),
+                                              self.pdem_cliente.sum(axis=0).to_numpy(dtype=float), pasos)
+        for paso, fila in zip(pasos, potencias.tolist()):
+            self.resultados_por_paso[paso] = fila
+        return pd.DataFrame(potencias, index=pd.Index(pasos, name="PasoPV"), columns=self.meses)
+
     def dimensionar_offgrid_interactivo(self, paso_por_defecto=0.4):
         paso_actual = paso_por_defecto
 
@@ -240,9 +388,13 @@ class Dimensionamiento:
                 print("✅ Continuando con el proceso usando el paso actual.")
                 break
 
-    def calc_sensibilidad(self, paso, pot_max=None):
+    def calc_sensibilidad(self, paso, pot_max=None, potencias=None, baterias=(0.0,), escalas=(1.0,)):
         """
         Calcula la sensibilidad de la energía residual para distintos escenarios de potencia instalada.
+
+        Por defecto evalúa cinco potencias alrededor de pot_max (±2 pasos); potencias,
+        baterias y escalas permiten cualquier grilla (ver GrillaSensibilidad). El reporte
+        y el rango usan el escenario sin batería adicional y con la primera escala.
         """
         if pot_max is None:
             if not hasattr(self, 'potencia_pv_mensual'):
@@ -256,27 +408,35 @@ class Dimensionamiento:
         meses = ['Ene', 'Feb', 'Mar', 'Abr', 'May', 'Jun',
                 'Jul', 'Ago', 'Sep', 'Oct', 'Nov', 'Dic']
 
-        dim_pot = [pot_max - paso*2, pot_max - paso, pot_max, pot_max + paso, pot_max + paso*2]
-        ediff = pd.DataFrame(columns=range(5), index=range(12))
-
-        for i in range(5):
-            for j in range(12):
-                ediff.loc[j, i] = energia_pvgen[j] * dim_pot[i] - energia_dem[j]
-
-        # Mostrar tabla
-        print("\n📉 Análisis de Sensibilidad - Energía Residual:")
-        print("Mes   | {:>6.2f} | {:>6.2f} || {:>6.2f} || {:>6.2f} | {:>6.2f} [kWp]".format(*dim_pot))
-        print("---------------------------------------------------------------")
-        for i in range(12):
-            print(f"{meses[i]:<6} | " +
-                " | ".join(f"{ediff.iloc[i, col]:6.2f}" for col in range(5)) +
-                " [kWh]")
-
-        diff_max = max(ediff[2])  # Potencia nominal (posición central)
-        diff_min = min(ediff[2])
+        if potencias is None:
+            potencias = [pot_max - paso*2, pot_max - paso, pot_max, pot_max + paso, pot_max + paso*2]
+        grilla = GrillaSensibilidad(energia_pvgen, energia_dem, potencias, baterias, escalas)
+        self.sensibilidad = grilla
+        dim_pot = grilla.potencias.tolist()
+        central = grilla.central
+        ediff = grilla.vista()
+
+        # Mostrar tabla (la potencia nominal, al centro, va entre ||)
+        def encabezado():
+            texto = "Mes   "
+            for i, pot in enumerate(dim_pot):
+                texto += ("|| " if i in (central, central + 1) else "| ") + f"{pot:>6.2f} "
+            return texto + "[kWp]"
+
+        self.reportes.agregar(
+            "Sizing", "\n📉 Análisis de Sensibilidad - Energía Residual:",
+            lambda: tabla((f"{meses[i]:<6} | " + " | ".join(f"{v:6.2f}" for v in fila) + " [kWh]"
+                           for i, fila in enumerate(grilla.valores[:, 0, 0].T.tolist())),
+                          encabezado=[encabezado(),
+                                      "---------------------------------------------------------------"]),
+            nivel=RESUMEN)
+
+        residual = grilla.residual()  # Potencia nominal (posición central)
+        diff_max = float(residual.max())
+        diff_min = float(residual.min())
         rango = diff_max - diff_min
 
-        print("\n📊 Rango de energía residual (Pot. nominal = {:.2f} kWp):".format(dim_pot[2]))
+        print("\n📊 Rango de energía residual (Pot. nominal = {:.2f} kWp):".format(dim_pot[central]))
         print(f"🔼 Máxima energía residual: {diff_max:.2f} kWh")
         print(f"🔽 Mínima energía residual: {diff_min:.2f} kWh")
         print(f"📏 Rango total: {rango:.2f} kWh")
@@ -284,7 +444,8 @@ class Dimensionamiento:
         return {
             "Rango": rango,
             "EnergiaResidual": ediff,
-            "Potencias": dim_pot
+            "Potencias": dim_pot,
+            "Grilla": grilla
         }
     
     def calc_sensibilidad_interactivo(self):
@@ -315,35 +476,15 @@ class Dimensionamiento:
         return resultado
     
     def calc_meses_criticos_interactivo(self, rango, ediff, meses):
+        """
+        Meses cuya energía residual (ediff: arreglo (12,) de la potencia nominal, ver
+        GrillaSensibilidad.residual) queda bajo un porcentaje del rango.
+        """
         print("\n🔍 Analizando meses críticos...")
+        residual = np.asarray(ediff, dtype=float)
 
         diff_pp = 10.0  # valor por defecto
-        print(f"\n⚙️ Calculando meses críticos con sensibilidad del {diff_pp:.1f}%...")
-        mc_trigg = rango * (diff_pp / 100)
-        mc_ix = []
-        mc_value = []
-                                                                                                                                                         
-        for idx, val in enumerate(ediff.loc[:, 2]):
-            if mc_trigg > val:
-                mc_ix.append(idx)
-                mc_value.append(val)
-
-        # Mostrar resultados
-        if not mc_ix:
-            print("✅ No se detectaron meses críticos bajo el umbral especificado.")
-        else:
-            print("\n📌 Los Meses Críticos son:")
-            for i, idx in enumerate(mc_ix):
-                print(f"{i+1}. {meses[idx]} con energía residual de {mc_value[i]:.2f} [kWh]")
-
-        # Guardar en atributo
-        self.meses_criticos = {
-            "indices": mc_ix,
-            "valores": mc_value,
-            "meses": [meses[i] for i in mc_ix],
-            "umbral_kWh": mc_trigg,
-            "porcentaje": diff_pp
-        }
+        mc_ix = self._meses_criticos(rango, residual, meses, diff_pp)
 
         # Solo solicitar modificación si interactive_mode está activo
         if self.interactive_mode:
@@ -361,32 +502,7 @@ class Dimensionamiento:
                             print("⚠️ Por favor, ingrese un número válido.")
                     
                     # Recalcular con el nuevo valor
-                    print(f"\n⚙️ Calculando meses críticos con sensibilidad del {diff_pp:.1f}%...")
-                    mc_trigg = rango * (diff_pp / 100)
-                    mc_ix = []
-                    mc_value = []
-
-                    for idx, val in enumerate(ediff.loc[:, 2]):
-                        if mc_trigg > val:
-                            mc_ix.append(idx)
-                            mc_value.append(val)
-
-                    # Mostrar resultados
-                    if not mc_ix:
-                        print("✅ No se detectaron meses críticos bajo el umbral especificado.")
-                    else:
-                        print("\n📌 Los Meses Críticos son:")
-                        for i, idx in enumerate(mc_ix):
-                            print(f"{i+1}. {meses[idx]} con energía residual de {mc_value[i]:.2f} [kWh]")
-
-                    # Actualizar en atributo
-                    self.meses_criticos = {
-                        "indices": mc_ix,
-                        "valores": mc_value,
-                        "meses": [meses[i] for i in mc_ix],
-                        "umbral_kWh": mc_trigg,
-                        "porcentaje": diff_pp
-                    }
+                    mc_ix = self._meses_criticos(rango, residual, meses, diff_pp)
                 else:
                     print("✅ Análisis de meses críticos finalizado.")
                     break
@@ -395,12 +511,40 @@ class Dimensionamiento:
             print("✅ Análisis de meses críticos finalizado.")
 
         return mc_ix
+
+    def _meses_criticos(self, rango, residual, meses, diff_pp):
+        """Índices de los meses con energía residual bajo diff_pp % del rango; guarda self.meses_criticos."""
+        print(f"\n⚙️ Calculando meses críticos con sensibilidad del {diff_pp:.1f}%...")
+        mc_trigg = rango * (diff_pp / 100)
+        mc_ix = np.flatnonzero(mc_trigg > residual).tolist()
+        mc_value = residual[mc_ix].tolist()
+
+        # Mostrar resultados
+        if not mc_ix:
+            print("✅ No se detectaron meses críticos bajo el umbral especificado.")
+        else:
+            print("\n📌 Los Meses Críticos son:")
+            for i, idx in enumerate(mc_ix):
+                print(f"{i+1}. {meses[idx]} con energía residual de {mc_value[i]:.2f} [kWh]")
+
+        # Guardar en atributo
+        self.meses_criticos = {
+            "indices": mc_ix,
+            "valores": mc_value,
+            "meses": [meses[i] for i in mc_ix],
+            "umbral_kWh": mc_trigg,
+            "porcentaje": diff_pp
+        }
+        return mc_ix
     
     def calcular_dimensionamiento_final_offgrid(self):
         print("\n🔧 Paso 3: Dimensionamiento final OffGrid")
 
         # Potencia del Inversor
+        # Con perfil horario Dem_Max es el máximo de 1 h; con resolución de 10 minutos (144 filas)
+        # es el máximo de 10 minutos y Dem_Max*6 es la potencia pico real
         dim_p_inv = self.Dem_Max*6  # Cambio 17-02-26: Usar Dem_Max en lugar de Dem_Max_10min
+        pasos_por_hora = len(self.pdem_cliente) // 24  # 1 (perfil horario) o 6 (10 minutos)
 
         print(f"⚡ Potencia máxima demandada: {dim_p_inv:.2f} [kW]")
 
@@ -432,7 +576,7 @@ class Dimensionamiento:
             tz1, tz2 = ventana_tiempo(perfil_mes_pv)
 
             energia_total = self.pdem_cliente.iloc[:, mes].sum()
-            energia_dia = self.pdem_cliente.iloc[tz1:tz2+1, mes].sum()
+            energia_dia = self.pdem_cliente.iloc[tz1*pasos_por_hora:(tz2+1)*pasos_por_hora, mes].sum()
             energia_noche = energia_total - energia_dia
 
             energia_dem_noche.append(energia_noche)
@@ -450,10 +594,111 @@ class Dimensionamiento:
             "Autonomia_Promedio": autonomia_prom
         }
 
+    def serie_horaria_offgrid(self, anio=2025):
+        """
+        Generación PV (con Potencia_PV instalada) y demanda del cliente hora a hora durante
+        un año, repitiendo el día tipo de cada mes (ver stage.bateria.serie_anual_horaria).
+        """
+        from stage.bateria import serie_anual_horaria
+
+        potencia_pv = self.dimensionamiento_final["Potencia_PV"]
+        generacion = serie_anual_horaria(self.df_pgen_cliente.to_numpy(dtype=float).T * potencia_pv, anio)
+        demanda = serie_anual_horaria(self.pdem_cliente.to_numpy(dtype=float), anio)
+        return generacion, demanda
+
+    def superficie_lolp_offgrid(self, objetivo, potencias=None, capacidades=None, anio=2025):
+        """
+        LOLP, energía no servida y vertimiento sobre una grilla potencia PV x capacidad de
+        batería (ver stage.bateria.SimuladorSOC.superficie), con el año horario del cliente.
+
+        Por defecto la grilla va de 0.5 a 2 veces Potencia_PV y de 0 a 3 veces la
+        Autonomia_Promedio en múltiplos de la batería más barata por kWh. El costo usa el
+        menor precio por kWp de los paneles y por kWh de las baterías de BBDD_Equipos.
+
+        Returns
+        -------
+        dict
+            Superficie (SuperficieLOLP), Isocurva (DataFrame potencia -> menor batería con
+            LOLP <= objetivo), Minimo_Costo (dict o None), precios unitarios y objetivo.
+        """
+        from stage.bateria import SimuladorSOC, capacidad_kwh, serie_anual_horaria
+
+        precio_kwp = float((self.eq_paneles['Precio CLP'] / (self.eq_paneles['Potencia nominal (W)'] / 1000)).min())
+        kwh_unidad = capacidad_kwh(self.eq_baterias['Capacidad (Ah)'].to_numpy(dtype=float))
+        precios_kwh = self.eq_baterias['Precio CLP'].to_numpy(dtype=float) / kwh_unidad
+        precio_kwh = float(precios_kwh.min())
+        if potencias is None:
+            potencias = self.dimensionamiento_final["Potencia_PV"] * np.linspace(0.5, 2.0, 31)
+        if capacidades is None:
+            unidad = kwh_unidad[precios_kwh.argmin()]
+            n_max = max(10, int(np.ceil(3 * self.dimensionamiento_final["Autonomia_Promedio"] / unidad)))
+            capacidades = unidad * np.arange(n_max + 1)
+
+        generacion_kwp = serie_anual_horaria(self.df_pgen_cliente.to_numpy(dtype=float).T, anio)
+        demanda = serie_anual_horaria(self.pdem_cliente.to_numpy(dtype=float), anio)
+        superficie = SimuladorSOC().superficie(generacion_kwp, demanda, potencias, capacidades)
+        isocurva = pd.DataFrame({"Potencia_PV [kWp]": superficie.potencias,
+                                 "Bateria [kWh]": superficie.isocurva(objetivo)})
+        minimo = superficie.minimo_costo(objetivo, precio_kwp, precio_kwh)
+
+        self.reportes.agregar(
+            "Sizing", f"\n🗺️ Isocurva LOLP <= {objetivo:.2%} (menor batería por potencia PV):",
+            lambda: isocurva.dropna(), nivel=DETALLE)
+        if minimo is None:
+            self.log(f"⚠️ Ninguna combinación PV x batería de la grilla cumple LOLP <= {objetivo:.2%}")
+        else:
+            self.reportes.agregar(
+                "Sizing", "\n💰 Combinación PV x batería de menor costo:",
+                lambda: tabla([f"PV       : {minimo['Potencia_PV']:.2f} [kWp]",
+                               f"Batería  : {minimo['Capacidad_Bateria']:.2f} [kWh]",
+                               f"LOLP     : {minimo['lolp']:.2%}",
+                               f"No serv. : {minimo['energia_no_servida']:.1f} [kWh/año]",
+                               f"Vertim.  : {minimo['vertimiento']:.1f} [kWh/año]",
+                               f"Costo    : ${minimo['Costo']:,.0f} CLP"]),
+                nivel=RESUMEN)
+        return {
+            "Superficie": superficie,
+            "Isocurva": isocurva,
+            "Minimo_Costo": minimo,
+            "Precio_kWp": precio_kwp,
+            "Precio_kWh": precio_kwh,
+            "Objetivo_LOLP": objetivo,
+        }
+
+    def frente_configuraciones_offgrid(self):
+        """
+        Frente de Pareto costo vs. margen de capacidad de las configuraciones panel x MPPT x
+        inversor x batería compatibles (ver stage.equipos.BusquedaConfiguraciones), para
+        Potencia_PV, Potencia_Inversor y Autonomia_Promedio del dimensionamiento final.
+
+        Returns
+        -------
+        pandas.DataFrame
+            Configuraciones no dominadas ordenadas por costo (vacío si ninguna es compatible).
+        """
+        from stage.equipos import BusquedaConfiguraciones
+
+        busqueda = BusquedaConfiguraciones(self.eq_paneles, self.eq_mppts, self.eq_inversores, self.eq_baterias)
+        frente = busqueda.buscar(self.dimensionamiento_final["Potencia_PV"],
+                                 self.dimensionamiento_final["Potencia_Inversor"],
+                                 self.dimensionamiento_final["Autonomia_Promedio"])
+        if frente.empty:
+            self.log("⚠️ Ninguna configuración panel x MPPT x inversor x batería es compatible")
+        else:
+            self.log(f"📐 Frente costo vs. margen: {len(frente)} configuraciones de "
+                     f"{busqueda.estadisticas['combinaciones']} combinaciones tras la poda")
+            self.reportes.agregar(
+                "Sizing", "\n📐 Frente de Pareto costo vs. margen de capacidad:",
+                lambda: frente[["Modelo Panel", "# Paneles", "Modelo MPPT", "# MPPT", "Modelo Inversor",
+                                "Modelo Bateria", "# Baterias", "Costo [CLP]", "Margen [-]"]],
+                nivel=DETALLE)
+        return frente
+
 class SeleccionPanel:
-    def __init__(self, df_paneles, dimensionamiento_final):
+    def __init__(self, df_paneles, dimensionamiento_final, reportes=None):
         self.df_paneles = df_paneles
         self.dimensionamiento_final = dimensionamiento_final
+        self.reportes = reportes if reportes is not None else Reportes()
         self.num_paneles = []
         self.precios_totales = []
         self.panel_seleccionado_criterio_avgprecio = None
@@ -464,8 +709,8 @@ class SeleccionPanel:
         return self.ejecutar_seleccion()
 
     def presentar_paneles(self):
-        print("📋 Paneles disponibles en base de datos:\n")
-        print(self.df_paneles.head(), "\n")
+        self.reportes.agregar("Sizing", "📋 Paneles disponibles en base de datos:\n",
+                              lambda: self.df_paneles.head(), nivel=DETALLE)
 
     def numero_paneles(self):
         df_paneles = self.df_paneles
@@ -485,15 +730,16 @@ class SeleccionPanel:
             self.num_paneles.append(cantidad)
             self.precios_totales.append(total_precio)
 
-        print("\n📊 Comparativa de Paneles Solares")
-        print("Potencia PV [Wp] | Cant de Paneles [-] | Precio Total [CLP]")
-        print("-----------------------------------------------------------")
-        for i in range(len_pv):
-            print("{:16d} | {:18d} | {:14,d}".format(
-                df_paneles.loc[i, 'Potencia nominal (W)'],
-                self.num_paneles[i],
-                self.precios_totales[i]
-            ))
+        self.reportes.agregar(
+            "Sizing", "\n📊 Comparativa de Paneles Solares",
+            lambda: tabla(("{:16d} | {:18d} | {:14,d}".format(
+                              df_paneles.loc[i, 'Potencia nominal (W)'],
+                              self.num_paneles[i],
+                              self.precios_totales[i]
+                          ) for i in range(len_pv)),
+                          encabezado=["Potencia PV [Wp] | Cant de Paneles [-] | Precio Total [CLP]",
+                                      "-----------------------------------------------------------"]),
+            nivel=RESUMEN)
 
     def aplicar_criterio_minprecio(self):
         precios = self.precios_totales
@@ -554,9 +800,10 @@ class SeleccionPanel:
         }
       
 class SeleccionMPPT:
-    def __init__(self, df_paneles, df_mppts, dimensionamiento_final, panel_minprecio=None, panel_avgprecio=None):
+    def __init__(self, df_paneles, df_mppts, dimensionamiento_final, panel_minprecio=None, panel_avgprecio=None, reportes=None):
         self.df_paneles = df_paneles
         self.df_mppts = df_mppts
+        self.reportes = reportes if reportes is not None else Reportes()
         self.dimensionamiento_final = dimensionamiento_final
         self.panel_minprecio = panel_minprecio
         self.panel_avgprecio = panel_avgprecio
@@ -578,8 +825,8 @@ class SeleccionMPPT:
         return self.ejecutar_seleccion()
 
     def presentar_mppts(self):
-        print("📋 Controladores MPPT disponibles en base de datos:\n")
-        print(self.df_mppts.head(), "\n")
+        self.reportes.agregar("Sizing", "📋 Controladores MPPT disponibles en base de datos:\n",
+                              lambda: self.df_mppts.head(), nivel=DETALLE)
 
     ## NOT USED METHOD
     def paneles_serie(self):
@@ -638,25 +885,31 @@ class SeleccionMPPT:
         MPPT_ValorC1 = [0] * lenMPPT
         MPPT_ValorC2 = [0] * lenMPPT
 
-        # === Mostrar primero criterio 1 ===
-        print("\n🔹 Criterio 1: Panel Menor Precio")
-        print("DC-Link MPPT [V] | Paneles/MPPT [-] | #MPPT [-] | Precio Total [CLP]")
-        print("---------------------------------------------------------------")
+        # === Criterio 1: panel menor precio ===
         for x in range(lenMPPT):
             String1[x] = int(MPPT_DCLink[x] / DatosPV.loc[0, 'Vmp'])
             MPPTC1[x] = int(DatosPV.loc[0, 'Cantidad'] / String1[x]) + (DatosPV.loc[0, 'Cantidad'] % String1[x] > 0)
             MPPT_ValorC1[x] = MPPTC1[x] * self.df_mppts.loc[x, 'Precio CLP']
-            print("{:<18} | {:<17} | {:<9} | {:,}".format(MPPT_DCLink[x], String1[x], MPPTC1[x], MPPT_ValorC1[x]))
 
-        # === Mostrar luego criterio 2 ===
-        print("\n🔸 Criterio 2: Panel Precio Promedio")
-        print("DC-Link MPPT [V] | Paneles/MPPT [-] | #MPPT [-] | Precio Total [CLP]")
-        print("---------------------------------------------------------------")
+        # === Criterio 2: panel precio promedio ===
         for x in range(lenMPPT):
             String2[x] = int(MPPT_DCLink[x] / DatosPV.loc[1, 'Vmp'])
             MPPTC2[x] = int(DatosPV.loc[1, 'Cantidad'] / String2[x]) + (DatosPV.loc[1, 'Cantidad'] % String2[x] > 0)
             MPPT_ValorC2[x] = MPPTC2[x] * self.df_mppts.loc[x, 'Precio CLP']
-            print("{:<18} | {:<17} | {:<9} | {:,}".format(MPPT_DCLink[x], String2[x], MPPTC2[x], MPPT_ValorC2[x]))
+
+        encabezado = ["DC-Link MPPT [V] | Paneles/MPPT [-] | #MPPT [-] | Precio Total [CLP]",
+                      "---------------------------------------------------------------"]
+        for titulo, strings, cantidades, valores in (
+            ("\n🔹 Criterio 1: Panel Menor Precio", String1, MPPTC1, MPPT_ValorC1),
+            ("\n🔸 Criterio 2: Panel Precio Promedio", String2, MPPTC2, MPPT_ValorC2),
+        ):
+            self.reportes.agregar(
+                "Sizing", titulo,
+                lambda strings=strings, cantidades=cantidades, valores=valores: tabla(
+                    ("{:<18} | {:<17} | {:<9} | {:,}".format(MPPT_DCLink[x], strings[x], cantidades[x], valores[x])
+                     for x in range(lenMPPT)),
+                    encabezado=encabezado),
+                nivel=RESUMEN)
 
         # Guardar como instancias
         self.relacion_mppt_panel_minprecio = String1
@@ -852,11 +1105,9 @@ class SeleccionMPPT:
         self.resumen_mppt_paneles = pd.DataFrame(resumen_paneles)
 
         # Reportar
-        print("📄 DatosMPPT:")
-        print(self.resumen_mppt)
-        print()
-        print("📄 Resumen de Paneles asociados a selección MPPT:")
-        print(self.resumen_mppt_paneles)
+        self.reportes.agregar("Sizing", "📄 DatosMPPT:", lambda df=self.resumen_mppt: df, nivel=RESUMEN)
+        self.reportes.agregar("Sizing", "\n📄 Resumen de Paneles asociados a selección MPPT:",
+                              lambda df=self.resumen_mppt_paneles: df, nivel=RESUMEN)
 
     def ejecutar_seleccion(self):
         self.presentar_mppts()
@@ -875,8 +1126,9 @@ class SeleccionMPPT:
             }
 
 class SeleccionInversor:
-    def __init__(self, df_inversores, dimensionamiento_final, seleccion_mppt):
+    def __init__(self, df_inversores, dimensionamiento_final, seleccion_mppt, reportes=None):
         self.eq_inversores = df_inversores
+        self.reportes = reportes if reportes is not None else Reportes()
         self.seleccion_mppt = seleccion_mppt
         self.dimensionamiento_final = dimensionamiento_final
         self.resultado_inversor = None
@@ -886,8 +1138,8 @@ class SeleccionInversor:
         return self.ejecutar_seleccion()
 
     def presentar_inversores(self):
-        print("📋 Inversores disponibles en base de datos:\n")
-        print(self.eq_inversores.head(), "\n")
+        self.reportes.agregar("Sizing", "📋 Inversores disponibles en base de datos:\n",
+                              lambda: self.eq_inversores.head(), nivel=DETALLE)
 
     def seleccionar(self):
         """
@@ -951,9 +1203,8 @@ class SeleccionInversor:
         self.inversor_indice_minprecio = ix_minPrecio
         self.inversor_precio_minimo = minPrecio_inv
 
-        print()
-        print("📄 Datos Inversor seleccionado:")
-        print(self.resultado_inversor)
+        self.reportes.agregar("Sizing", "\n📄 Datos Inversor seleccionado:",
+                              lambda df=self.resultado_inversor: df, nivel=RESUMEN)
 
     def ejecutar_seleccion(self):
         self.presentar_inversores()
@@ -964,9 +1215,19 @@ class SeleccionInversor:
         }
     
 class SeleccionBateria:
-    def __init__(self, df_baterias, dimensionamiento_final):
+    def __init__(self, df_baterias, dimensionamiento_final, reportes=None, serie_horaria=None, objetivo=None,
+                 simulador=None, max_unidades=100):
         self.df_baterias = df_baterias
+        self.reportes = reportes if reportes is not None else Reportes()
         self.dimensionamiento_final = dimensionamiento_final
+        # Dimensionamiento por simulación de SOC (ver stage.bateria): con serie_horaria (generación,
+        # demanda) [kWh] y objetivo (fracción máxima de energía no servida) el número de baterías de
+        # cada modelo es el mínimo que cumple el objetivo; si no, se usa Autonomia_Promedio.
+        self.serie_horaria = serie_horaria
+        self.objetivo = objetivo
+        self.simulador = simulador
+        self.max_unidades = max_unidades
+        self.simulacion = None
         self.bateria_seleccionado_criterio_avgprecio = None
         self.bateria_seleccionado_minprecio = None
         self.capacidad_bateria_kwh = None
@@ -981,8 +1242,8 @@ class SeleccionBateria:
         return self.ejecutar_seleccion()
     
     def presentar_baterias(self):
-        print("📋 Baterías disponibles en base de datos:\n")
-        print(self.df_baterias.head(), "\n")
+        self.reportes.agregar("Sizing", "📋 Baterías disponibles en base de datos:\n",
+                              lambda: self.df_baterias.head(), nivel=DETALLE)
 
     def numero_baterias(self):
         """
@@ -993,6 +1254,8 @@ class SeleccionBateria:
             - self.numero_baterias_necesarias
             - self.valores_baterias_totales
         """
+        if self.serie_horaria is not None and self.objetivo is not None:
+            return self.numero_baterias_simulado()
         print("\n🔋 Calculando número de baterías necesarias...")
         print("-------------------------------------------------")
         print("Autonomia de la bateria requerida: {:.2f} kWh".format(self.dimensionamiento_final["Autonomia_Promedio"]))
@@ -1005,9 +1268,6 @@ class SeleccionBateria:
         numBat = [0] * len_bat
         valorBat = [0] * len_bat
 
-        print("Capacidad [Ah] | # Baterias [-] | Precio Total [CLP]")
-        print("-" * 50)
-
         for i in range(len_bat):
             capacidad_ah = eq_baterias.loc[i, 'Capacidad (Ah)']
             precio_unitario = eq_baterias.loc[i, 'Precio CLP']
@@ -1020,7 +1280,68 @@ class SeleccionBateria:
             numBat[i] = num_bat
             valorBat[i] = num_bat * precio_unitario
 
-            print(f"{capacidad_ah:>14} | {num_bat:>14} | ${valorBat[i]:>14,}")
+        self.reportes.agregar(
+            "Sizing", "",
+            lambda: tabla((f"{eq_baterias.loc[i, 'Capacidad (Ah)']:>14} | {numBat[i]:>14} | ${valorBat[i]:>14,}"
+                           for i in range(len_bat)),
+                          encabezado=["Capacidad [Ah] | # Baterias [-] | Precio Total [CLP]", "-" * 50]),
+            nivel=RESUMEN)
+
+        # Guardar en la clase para próximos métodos
+        self.numero_baterias_necesarias = numBat
+        self.valores_baterias_totales = valorBat
+
+    def numero_baterias_simulado(self):
+        """
+        Número de baterías de cada alternativa por simulación cronológica del SOC: el mínimo
+        con el que la energía no servida del año no supera self.objetivo (fracción de la
+        demanda). Todas las capacidades candidatas (1..max_unidades unidades de cada modelo)
+        se simulan juntas. Si ninguna cumple, se usa la mayor evaluada.
+
+        Guarda los resultados en:
+            - self.numero_baterias_necesarias
+            - self.valores_baterias_totales
+            - self.simulacion (métricas de cada alternativa con su número de baterías)
+        """
+        from stage.bateria import SimuladorSOC, capacidad_kwh
+
+        print("\n🔋 Calculando número de baterías por simulación del estado de carga...")
+        print("-------------------------------------------------")
+        print(f"Energía no servida máxima: {self.objetivo:.2%} de la demanda anual")
+
+        eq_baterias = self.df_baterias
+        simulador = self.simulador if self.simulador is not None else SimuladorSOC()
+        generacion, demanda = self.serie_horaria
+        unidades = np.arange(1, self.max_unidades + 1)
+        capacidades_ah = eq_baterias['Capacidad (Ah)'].to_numpy(dtype=float)
+        candidatas = capacidad_kwh(capacidades_ah[:, None], unidades[None, :])  # (modelos, unidades)
+        unicas, posicion = np.unique(candidatas, return_inverse=True)
+        resultado = simulador.simular(generacion, demanda, unicas)
+        posicion = posicion.reshape(candidatas.shape)
+        cumple = (resultado["fraccion_no_servida"] <= self.objetivo)[posicion]
+
+        numBat = [int(unidades[fila.argmax()]) if fila.any() else int(unidades[-1]) for fila in cumple]
+        valorBat = [n * eq_baterias.loc[i, 'Precio CLP'] for i, n in enumerate(numBat)]
+        elegidas = posicion[np.arange(len(numBat)), np.asarray(numBat) - 1]
+        self.simulacion = pd.DataFrame({
+            "Capacidad [kWh]": unicas[elegidas],
+            "No servida [%]": 100 * resultado["fraccion_no_servida"][elegidas],
+            "Horas déficit": resultado["horas_deficit"][elegidas].astype(int),
+            "Vertimiento [kWh]": resultado["vertimiento"][elegidas],
+            "Ciclos [-]": resultado["ciclos"][elegidas],
+            "Cumple": cumple.any(axis=1),
+        }, index=eq_baterias.index)
+        if not self.simulacion["Cumple"].all():
+            print(f"⚠️ Hay modelos que no cumplen el objetivo con {self.max_unidades} unidades; se usa ese máximo.")
+
+        self.reportes.agregar(
+            "Sizing", "",
+            lambda: tabla((f"{eq_baterias.loc[i, 'Capacidad (Ah)']:>14} | {numBat[i]:>14} | ${valorBat[i]:>14,}"
+                           f" | {self.simulacion.loc[i, 'No servida [%]']:>13.2f} | {self.simulacion.loc[i, 'Ciclos [-]']:>10.1f}"
+                           for i in range(len(eq_baterias))),
+                          encabezado=["Capacidad [Ah] | # Baterias [-] | Precio Total [CLP] | No servida [%] | Ciclos [-]",
+                                      "-" * 83]),
+            nivel=RESUMEN)
 
         # Guardar en la clase para próximos métodos
         self.numero_baterias_necesarias = numBat
@@ -1134,7 +1455,7 @@ class SeleccionBateria:
         }
 
         self.resumen_baterias = pd.DataFrame(datos_resumen)
-        print(self.resumen_baterias)
+        self.reportes.agregar("Sizing", "", lambda df=self.resumen_baterias: df, nivel=RESUMEN)
 
     def ejecutar_seleccion(self):
         self.presentar_baterias()
@@ -1142,10 +1463,13 @@ class SeleccionBateria:
         self.aplicar_criterio_minprecio()
         self.aplicar_criterio_avgprecio()
         self.generar_resumen_baterias()
-        return {
+        resultado = {
             "Bateria_Avg_Precio": self.bateria_seleccionado_criterio_avgprecio,
             "Bateria_Min_Precio": self.bateria_seleccionado_minprecio
         }
+        if self.simulacion is not None:
+            resultado["Simulacion_SOC"] = self.simulacion
+        return resultado
 
         # return {
         #     "Inversor": self.resultado_inversor
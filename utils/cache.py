@@ -0,0 +1,137 @@
+# utils/cache.py
+import hashlib
+import json
+import os
+import pickle
+import tempfile
+
+# Incrementar cuando cambie la lógica de una etapa para invalidar las entradas existentes.
+VERSION_CACHE = "1"
+
+
+class CacheEtapas:
+    """
+    Caché en disco (checkpoints) de las salidas de las etapas del pipeline.
+
+    Cada entrada se guarda en ``<directorio>/<etapa>/<clave>.pkl``, donde la clave es
+    un hash SHA-256 de las entradas de la etapa: datos del cliente, huella de los
+    archivos de referencia (mtime, tamaño y contenido) y parámetros de la etapa.
+
+    Parameters
+    ----------
+    directorio : str
+        Carpeta raíz de la caché.
+    activo : bool
+        Si es False, obtener() nunca encuentra entradas y guardar() no escribe.
+    """
+
+    def __init__(self, directorio=".cache/etapas", activo=True):
+        self.directorio = directorio
+        self.activo = activo
+        self._huellas = {}  # (ruta, mtime_ns, tamaño) -> sha256 del contenido
+
+    def huella_archivo(self, ruta):
+        """Devuelve mtime, tamaño y hash de contenido de un archivo (None si no existe)."""
+        if ruta is None or not os.path.isfile(ruta):
+            return None
+        stat = os.stat(ruta)
+        memo = (os.path.abspath(ruta), stat.st_mtime_ns, stat.st_size)
+        if memo not in self._huellas:
+            h = hashlib.sha256()
+            with open(ruta, "rb") as f:
+                for bloque in iter(lambda: f.read(1 << 20), b""):
+                    h.update(bloque)
+            self._huellas[memo] = h.hexdigest()
+        return {"mtime_ns": stat.st_mtime_ns, "tamano": stat.st_size, "sha256": self._huellas[memo]}
+
+    def clave(self, etapa, entradas, archivos=(), parametros=None):
+        """
+        Calcula la clave de una etapa.
+
+        Parameters
+        ----------
+        etapa : str
+            Nombre de la etapa ('clientes', 'sizing', 'optimizacion').
+        entradas : Any
+            Datos de entrada (fila del cliente, vector, clave de la etapa previa...).
+        archivos : iterable of str
+            Archivos de referencia leídos por la etapa.
+        parametros : dict, optional
+            Parámetros de la etapa.
+        """
+        contenido = {
+            "version": VERSION_CACHE,
+            "etapa": etapa,
+            "entradas": _normalizar(entradas),
+            "archivos": {os.path.normpath(r): self.huella_archivo(r) for r in archivos if r},
+            "parametros": _normalizar(parametros or {}),
+        }
+        texto = json.dumps(contenido, sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(texto.encode("utf-8")).hexdigest()
+
+    def _ruta(self, etapa, clave):
+        return os.path.join(self.directorio, etapa, f"{clave}.pkl")
+
+    def obtener(self, etapa, clave):
+        """Devuelve (True, valor) si la entrada existe y es legible; (False, None) si no."""
+        if not self.activo:
+            return False, None
+        ruta = self._ruta(etapa, clave)
+        if not os.path.exists(ruta):
+            return False, None
+        try:
+            with open(ruta, "rb") as f:
+                return True, pickle.load(f)
+        except Exception:
+            # Entrada corrupta o de una versión incompatible: se recalcula
+            return False, None
+
+    def guardar(self, etapa, clave, valor):
+        """Guarda la salida de una etapa (escritura atómica, segura entre procesos)."""
+        if not self.activo:
+            return
+        ruta = self._ruta(etapa, clave)
+        os.makedirs(os.path.dirname(ruta), exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(ruta), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                pickle.dump(valor, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp, ruta)
+        except BaseException:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            raise
+
+
+def _normalizar(obj):
+    """Convierte un objeto en una estructura JSON estable para el hash."""
+    import numpy as np
+    import pandas as pd
+    if isinstance(obj, pd.DataFrame):
+        return {
+            "columnas": [str(c) for c in obj.columns],
+            "indice": [str(i) for i in obj.index],
+            "valores": hashlib.sha256(np.ascontiguousarray(obj.to_numpy()).tobytes()).hexdigest()
+            if all(dt.kind in "biuf" for dt in obj.dtypes) else _normalizar(obj.to_numpy().tolist()),
+        }
+    if isinstance(obj, pd.Series):
+        return {str(k): _normalizar(v) for k, v in obj.items()}
+    if isinstance(obj, np.ndarray):
+        return {"shape": list(obj.shape), "dtype": str(obj.dtype),
+                "sha256": hashlib.sha256(np.ascontiguousarray(obj).tobytes()).hexdigest()}
+    if isinstance(obj, dict):
+        return {str(k): _normalizar(v) for k, v in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [_normalizar(v) for v in obj]
+    if isinstance(obj, np.generic):
+        return _normalizar(obj.item())
+    if isinstance(obj, float) and obj != obj:
+        return "nan"
+    if obj is None or isinstance(obj, (bool, int, float, str)):
+        return obj
+    try:
+        if pd.isna(obj):
+            return "nan"
+    except (TypeError, ValueError):
+        pass
+    return repr(obj)
@@ -0,0 +1,89 @@
+# utils/consumo.py
+import os
+
+from utils.redondeo import redondear
+
+# Instancias por proceso (ver get_almacen_consumo)
+_almacenes_consumo = {}
+
+
+class AlmacenConsumo:
+    """
+    Consumos mensuales de BBDD_Clientes.csv cargados una sola vez como matriz (n_clientes, 12).
+
+    Los factores mensuales (consumo / máximo anual, redondeados a 5 decimales) y el
+    consumo diario máximo (máximo / 30) se calculan para todos los clientes en una
+    sola pasada vectorizada. El archivo se vuelve a leer sólo si cambia su mtime o tamaño.
+
+    Parameters
+    ----------
+    ruta_csv : str
+        Archivo CSV separado por ';' (nombre del cliente + 12 meses).
+    """
+
+    def __init__(self, ruta_csv):
+        self.ruta_csv = ruta_csv
+        self._huella = None
+        self.nombres = None        # list[str], en el orden del archivo
+        self.meses = None          # Encabezados de las 12 columnas de consumo
+        self.matriz = None         # ndarray (n_clientes, 12) [kWh/mes]
+        self.maximos = None        # ndarray (n_clientes,) consumo mensual máximo
+        self.factores_mes = None   # ndarray (n_clientes, 12), round(consumo / máximo, 5)
+        self.diario_max = None     # ndarray (n_clientes,) máximo / 30 [kWh/día]
+        self._por_nombre = {}
+
+    def cargar(self):
+        """Lee el CSV si aún no se ha leído (o si cambió) y recalcula los factores."""
+        import numpy as np
+        import pandas as pd
+
+        stat = os.stat(self.ruta_csv)
+        huella = (stat.st_mtime_ns, stat.st_size)
+        if huella == self._huella:
+            return self
+        data_BBDD = pd.read_csv(self.ruta_csv, delimiter=';')
+        self.nombres = data_BBDD.iloc[:, 0].tolist()
+        self.meses = list(data_BBDD.columns[1:])
+        self.matriz = data_BBDD.iloc[:, 1:].to_numpy()
+        self._por_nombre = {}
+        for i, nombre in enumerate(self.nombres):
+            self._por_nombre.setdefault(nombre, i)
+
+        # Una pasada para todos los clientes
+        self.maximos = self.matriz.max(axis=1) if len(self.matriz) else np.zeros(0)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            self.factores_mes = redondear(self.matriz / self.maximos[:, None], 5)
+        self.diario_max = self.maximos / 30
+        self._huella = huella
+        return self
+
+    def __len__(self):
+        return len(self.cargar().matriz)
+
+    def indice(self, nombre):
+        """Fila del cliente por nombre (primera coincidencia), o None si no existe."""
+        return self.cargar()._por_nombre.get(nombre)
+
+    def consumos(self, indice):
+        """Consumos mensuales del cliente como lista (valores Python, como en el CSV)."""
+        return self.cargar().matriz[indice].tolist()
+
+    def factor_mes(self, indice):
+        """Factores mensuales del cliente (lista de 12 valores)."""
+        return self.cargar().factores_mes[indice].tolist()
+
+    def factor_dia(self, indice, energia_dia):
+        """Factor de escala diario: (consumo mensual máximo / 30) / energía diaria del perfil."""
+        return self.cargar().diario_max[indice] / energia_dia
+
+    def factores_dia(self, energias_dia):
+        """Factores de escala diarios de todos los clientes (energías en el orden del archivo)."""
+        return self.cargar().diario_max / energias_dia
+
+
+def get_almacen_consumo(ruta_csv):
+    """Devuelve el almacén de consumos compartido del proceso para ese archivo."""
+    clave = os.path.abspath(ruta_csv)
+    if clave not in _almacenes_consumo:
+        _almacenes_consumo[clave] = AlmacenConsumo(ruta_csv)
+    return _almacenes_consumo[clave]
@@ -0,0 +1,104 @@
+# utils/eventos.py
+import json
+import os
+import time
+
+
+class RegistroEventos:
+    """
+    Eventos estructurados de la ejecución, para análisis automático (un JSON por línea).
+
+    Cada evento lleva el índice del cliente en curso, la etapa, el sub-paso y sus
+    campos propios: duración y métricas de las mediciones del MedidorRendimiento,
+    tamaños del problema, estado y condición de término del solver, o el mensaje de
+    los log de las etapas. Los eventos se acumulan en memoria; sólo el proceso
+    principal los escribe (los workers del modo lote los devuelven con su resultado).
+
+    Parameters
+    ----------
+    ejecucion : str, optional
+        Identificador de la ejecución (por defecto, fecha-hora y pid del proceso).
+    """
+
+    def __init__(self, ejecucion=None):
+        self.ejecucion = ejecucion or f"{time.strftime('%Y%m%dT%H%M%S')}-{os.getpid()}"
+        self.indice = None  # Cliente en curso (lo fija GestorProyecto.ejecutar_cliente)
+        self.eventos = []
+
+    def emitir(self, etapa, paso=None, tipo="log", **campos):
+        """
+        Agrega un evento.
+
+        Parameters
+        ----------
+        etapa : str
+            'Gestor', 'Cliente', 'Dimensionamiento', 'Optimizador'...
+        paso : str, optional
+            Sub-paso de la etapa.
+        tipo : str
+            'log', 'medicion' o 'cliente' (resultado final de un cliente).
+        **campos
+            Campos del evento (duracion_s, estado, terminacion, mensaje, tamaños...).
+        """
+        evento = {"ts": time.time(), "pid": os.getpid(), "indice": self.indice,
+                  "etapa": etapa, "paso": paso, "tipo": tipo}
+        evento.update(campos)
+        self.eventos.append(evento)
+        return evento
+
+    def medicion(self, registro):
+        """Evento a partir de un registro de MedidorRendimiento (wall_s pasa a duracion_s)."""
+        campos = {k: v for k, v in registro.items() if k not in ("etapa", "paso", "wall_s")}
+        if "wall_s" in registro:
+            campos["duracion_s"] = registro["wall_s"]
+        return self.emitir(registro["etapa"], registro.get("paso"), tipo="medicion", **campos)
+
+    def vaciar(self):
+        """Devuelve los eventos acumulados y deja el registro vacío."""
+        eventos, self.eventos = self.eventos, []
+        return eventos
+
+    def escribir(self, ruta, eventos=None):
+        """
+        Agrega al archivo JSONL los eventos entregados (por defecto, los propios, que se vacían),
+        marcados con el identificador de esta ejecución.
+        """
+        if eventos is None:
+            eventos = self.vaciar()
+        escribir_jsonl(ruta, eventos, ejecucion=self.ejecucion)
+
+
+def emitir(eventos, etapa, paso=None, tipo="log", **campos):
+    """Atajo para emitir con un registro opcional (sin registro no hace nada)."""
+    if eventos is None:
+        return None
+    return eventos.emitir(etapa, paso, tipo, **campos)
+
+
+def escribir_jsonl(ruta, eventos, **comunes):
+    """Agrega los eventos al archivo (una línea JSON por evento), con campos comunes opcionales."""
+    if not eventos:
+        return
+    carpeta = os.path.dirname(ruta)
+    if carpeta:
+        os.makedirs(carpeta, exist_ok=True)
+    lineas = [json.dumps({**comunes, **evento}, ensure_ascii=False, default=_a_json) for evento in eventos]
+    with open(ruta, "a", encoding="utf-8") as f:
+        f.write("\n".join(lineas) + "\n")
+
+
+def leer_jsonl(ruta):
+    """Itera los eventos de un archivo JSONL (ignora líneas vacías)."""
+    with open(ruta, encoding="utf-8") as f:
+        for linea in f:
+            if linea.strip():
+                yield json.loads(linea)
+
+
+def _a_json(valor):
+    """Conversión de valores no nativos de JSON (escalares y arreglos de numpy, rutas...)."""
+    if hasattr(valor, "tolist"):
+        return valor.tolist()
+    if hasattr(valor, "item"):
+        return valor.item()
+    return str(valor)
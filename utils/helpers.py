@@ -1,5 +1,7 @@
 # utils/helpers.py
+import contextlib
 import logging
+import os
 import sys
 
 def get_logger(nombre: str = "app", nivel=logging.INFO) -> logging.Logger:
@@ -35,28 +37,196 @@ def get_logger(nombre: str = "app", nivel=logging.INFO) -> logging.Logger:
 
     return logger
 
+# Niveles de SimpleLogger (mismos valores que el módulo logging)
+NIVELES = {"DEBUG": 10, "INFO": 20, "WARNING": 30, "ERROR": 40}
+
+# Marcadores internos de las colas del logger
+_FIN = "__fin__"
+_VACIAR = "__vaciar__"
+
+
 class SimpleLogger:
     """
     Logger simplificado personalizado para escribir en consola y archivo simultáneamente.
+
+    La consola se escribe en el momento (síncrona). El archivo lo escribe un hilo en
+    segundo plano que recibe los registros por una cola, mantiene el archivo abierto
+    y escribe/vacía en lotes. Los mensajes bajo el nivel configurado se descartan
+    antes de formatearse (usar argumentos al estilo %: log("%s: %s", a, b)).
+
+    Parameters
+    ----------
+    filename : str
+        Archivo de log.
+    modo : str
+        "w" reinicia el archivo con un encabezado; "a" agrega al existente.
+    consola : bool
+        Si es False, no se imprime en consola.
+    nivel : str or int
+        Nivel mínimo ("DEBUG", "INFO", "WARNING", "ERROR").
+    cola : multiprocessing.Queue, optional
+        Si se entrega (procesos worker), los registros se envían por esa cola al
+        logger del proceso principal (ver cola_procesos) en vez de escribir el archivo.
+    tamano_lote : int
+        Máximo de registros por escritura.
     """
-    def __init__(self, filename="log_ejecucion.txt"):
+
+    def __init__(self, filename="log_ejecucion.txt", modo="w", consola=True, nivel="INFO", cola=None, tamano_lote=256):
+        import atexit
+        import queue
+        import threading
+        import time
+
         self.filename = filename
-        # Limpiar/Iniciar archivo
-        with open(self.filename, "w", encoding="utf-8") as f:
-            import time
-            f.write(f"--- Inicio de Ejecución: {time.strftime('%Y-%m-%d %H:%M:%S')} ---\n")
-    
-    def log(self, mensaje, prefijo="Gestor"):
+        self.consola = consola
+        self.nivel = NIVELES.get(nivel, nivel) if isinstance(nivel, str) else nivel
+        self.tamano_lote = tamano_lote
+        self._cola_remota = cola
+        self._cola_procesos = None
+        self._oyente = None
+        self._vaciados = None  # Eventos de vaciar() pendientes de pasar por la cola multiproceso
+        self._cerrado = False
+        if cola is not None:
+            return
+
+        # Limpiar/Iniciar archivo. Con modo="a" (procesos worker) se agrega al log existente.
+        self._archivo = open(self.filename, "w" if modo == "w" else "a", encoding="utf-8")
+        if modo == "w":
+            self._archivo.write(f"--- Inicio de Ejecución: {time.strftime('%Y-%m-%d %H:%M:%S')} ---\n")
+        self._cola = queue.SimpleQueue()
+        self._escritor = threading.Thread(target=self._escribir, name="SimpleLogger", daemon=True)
+        self._escritor.start()
+        atexit.register(self.cerrar)
+
+    def habilitado(self, nivel="INFO"):
+        """Indica si un mensaje de ese nivel se registraría (para evitar trabajo previo)."""
+        return NIVELES.get(nivel, 20) >= self.nivel
+
+    def log(self, mensaje, *args, prefijo="Gestor", nivel="INFO"):
+        if NIVELES.get(nivel, 20) < self.nivel:
+            return  # Descartado sin formatear
         import time
+        if args:
+            mensaje = mensaje % args
         timestamp = time.strftime('%H:%M:%S')
         texto_completo = f"[{timestamp}] [{prefijo}] {mensaje}"
         
         # 1. Consola
-        print(texto_completo)
+        if self.consola:
+            print(texto_completo)
         
-        # 2. Archivo
-        with open(self.filename, "a", encoding="utf-8") as f:
-            f.write(texto_completo + "\n")
+        # 2. Archivo (asíncrono)
+        if self._cola_remota is not None:
+            self._cola_remota.put(texto_completo)
+        elif not self._cerrado:
+            self._cola.put(texto_completo)
+
+    def debug(self, mensaje, *args, prefijo="Gestor"):
+        self.log(mensaje, *args, prefijo=prefijo, nivel="DEBUG")
 
+    def info(self, mensaje, *args, prefijo="Gestor"):
+        self.log(mensaje, *args, prefijo=prefijo, nivel="INFO")
 
+    def warning(self, mensaje, *args, prefijo="Gestor"):
+        self.log(mensaje, *args, prefijo=prefijo, nivel="WARNING")
 
+    def error(self, mensaje, *args, prefijo="Gestor"):
+        self.log(mensaje, *args, prefijo=prefijo, nivel="ERROR")
+
+    def cola_procesos(self):
+        """
+        Cola multiproceso para loggers de procesos worker (SimpleLogger(cola=...)).
+
+        Un hilo del proceso principal reenvía lo recibido al escritor de este logger,
+        de modo que un solo proceso escribe el archivo. Se crea en la primera llamada.
+        """
+        if self._cola_remota is not None:
+            return self._cola_remota
+        if self._cola_procesos is None:
+            import multiprocessing
+            import queue
+            import threading
+            self._cola_procesos = multiprocessing.Queue()
+            self._vaciados = queue.SimpleQueue()
+            self._oyente = threading.Thread(target=self._reenviar, name="SimpleLogger-procesos", daemon=True)
+            self._oyente.start()
+        return self._cola_procesos
+
+    def vaciar(self):
+        """Espera a que todo lo registrado hasta ahora (incluidos los workers terminados) esté en disco."""
+        import threading
+        if self._cola_remota is not None or self._cerrado:
+            return
+        listo = threading.Event()
+        if self._cola_procesos is not None:
+            # Pasa primero por la cola multiproceso: queda detrás de lo ya enviado por los workers
+            self._vaciados.put(listo)
+            self._cola_procesos.put(_VACIAR)
+        else:
+            self._cola.put(listo)
+        listo.wait()
+
+    def cerrar(self):
+        """Vacía los registros pendientes y cierra el archivo."""
+        if self._cola_remota is not None or self._cerrado:
+            return
+        if self._cola_procesos is not None:
+            self._cola_procesos.put(_FIN)
+            self._oyente.join()
+        self._cerrado = True
+        self._cola.put(_FIN)
+        self._escritor.join()
+
+    def _reenviar(self):
+        """Hilo oyente: pasa los registros de los workers a la cola local del escritor."""
+        while True:
+            registro = self._cola_procesos.get()
+            if registro == _VACIAR:
+                self._cola.put(self._vaciados.get())
+            elif registro == _FIN:
+                return
+            else:
+                self._cola.put(registro)
+
+    def _escribir(self):
+        """Hilo escritor: toma los registros en lotes, los escribe y vacía el buffer."""
+        import queue
+        fin = False
+        while not fin:
+            lote = [self._cola.get()]
+            while len(lote) < self.tamano_lote:
+                try:
+                    lote.append(self._cola.get_nowait())
+                except queue.Empty:
+                    break
+            lineas, eventos = [], []
+            for registro in lote:
+                if registro == _FIN:
+                    fin = True
+                elif isinstance(registro, str):
+                    lineas.append(registro + "\n")
+                else:
+                    eventos.append(registro)
+            if lineas:
+                self._archivo.write("".join(lineas))
+            self._archivo.flush()
+            for evento in eventos:
+                evento.set()
+        self._archivo.close()
+
+
+@contextlib.contextmanager
+def silenciar_consola(activo=True):
+    """
+    Redirige stdout a os.devnull mientras dure el bloque (modo lote).
+
+    Parameters
+    ----------
+    activo : bool
+        Si es False, no se modifica la salida estándar.
+    """
+    if not activo:
+        yield
+        return
+    with open(os.devnull, "w", encoding="utf-8") as nulo, contextlib.redirect_stdout(nulo):
+        yield
@@ -0,0 +1,105 @@
+# utils/memo.py
+import os
+from collections import OrderedDict
+
+from utils.cache import CacheEtapas
+
+# Instancias por proceso (ver get_memo_demanda)
+_memos = {}
+
+
+class MemoDemanda:
+    """
+    Memo de perfiles de demanda por firma del cliente.
+
+    Muchos clientes de la encuesta comparten las entradas que determinan su demanda
+    (vector de electrodomésticos, habitaciones, baños, teletrabajo, zona, calefacción y
+    fila de consumos mensuales, ver Cliente.firma). La clave es el hash de esa firma
+    junto con la huella de los archivos de referencia (CacheEtapas.clave), de modo que
+    clientes distintos con la misma firma comparten (perfil anual, Dem_Max).
+
+    Las entradas se guardan en memoria con política LRU y, opcionalmente, en disco
+    (``<directorio>/demanda/<clave>.pkl``) para reutilizarlas entre ejecuciones.
+
+    Parameters
+    ----------
+    capacidad : int
+        Entradas máximas en memoria (se descarta la usada hace más tiempo).
+    directorio : str, optional
+        Carpeta de la capa en disco (None = sólo memoria).
+    """
+
+    def __init__(self, capacidad=1024, directorio=None):
+        self.capacidad = capacidad
+        self.directorio = directorio
+        self._disco = CacheEtapas(directorio or "", activo=directorio is not None)
+        self._memoria = OrderedDict()  # clave -> (perfil, Dem_Max)
+        self.aciertos = 0         # Encontradas en memoria
+        self.aciertos_disco = 0   # Encontradas en disco (y subidas a memoria)
+        self.fallos = 0
+
+    def __len__(self):
+        return len(self._memoria)
+
+    def clave(self, firma, archivos=()):
+        """Clave de una firma (dict de entradas del cliente) y de los archivos de referencia que lee."""
+        return self._disco.clave("demanda", firma, archivos=archivos)
+
+    def obtener(self, clave):
+        """
+        Busca una clave en memoria y luego en disco.
+
+        Returns
+        -------
+        tuple
+            (origen, valor): origen es 'memoria', 'disco' o None si no está. El perfil
+            se entrega como copia.
+        """
+        if clave in self._memoria:
+            self._memoria.move_to_end(clave)
+            self.aciertos += 1
+            return "memoria", _copiar(self._memoria[clave])
+        encontrado, valor = self._disco.obtener("demanda", clave)
+        if encontrado:
+            self.aciertos_disco += 1
+            self._en_memoria(clave, valor)
+            return "disco", _copiar(valor)
+        self.fallos += 1
+        return None, None
+
+    def guardar(self, clave, valor):
+        """Guarda (perfil, Dem_Max) en memoria y, si hay capa en disco, también en disco."""
+        valor = _copiar(valor)
+        self._en_memoria(clave, valor)
+        self._disco.guardar("demanda", clave, valor)
+
+    def _en_memoria(self, clave, valor):
+        self._memoria[clave] = valor
+        self._memoria.move_to_end(clave)
+        while len(self._memoria) > self.capacidad:
+            self._memoria.popitem(last=False)
+
+    def estadisticas(self):
+        """Contadores de aciertos y fallos del proceso."""
+        consultas = self.aciertos + self.aciertos_disco + self.fallos
+        return {
+            "aciertos": self.aciertos,
+            "aciertos_disco": self.aciertos_disco,
+            "fallos": self.fallos,
+            "tasa_aciertos": (self.aciertos + self.aciertos_disco) / consultas if consultas else 0.0,
+            "entradas": len(self._memoria),
+            "capacidad": self.capacidad,
+        }
+
+
+def _copiar(valor):
+    perfil, dem_max = valor
+    return perfil.copy(), dem_max
+
+
+def get_memo_demanda(capacidad=1024, directorio=None):
+    """Devuelve el memo compartido del proceso para esa capa en disco (lo crea si no existe)."""
+    clave = (os.path.abspath(directorio) if directorio is not None else None, capacidad)
+    if clave not in _memos:
+        _memos[clave] = MemoDemanda(capacidad, directorio)
+    return _memos[clave]
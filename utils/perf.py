@@ -0,0 +1,177 @@
+# utils/perf.py
+import contextlib
+import json
+import os
+import sys
+import time
+
+# Contador de lecturas de Excel del proceso (ver leer_excel)
+_lecturas_excel = 0
+
+# Presupuesto de arranque en frío [s]: intérprete nuevo + importación del módulo.
+# Aplica a invocaciones cortas de la CLI y al arranque de procesos worker.
+PRESUPUESTO_ARRANQUE_S = {
+    "main": 1.0,
+    "stage.process": 1.0,
+    "stage.sizing_backup": 1.0,
+    "stage.clients": 1.0,
+    "stage.optimization": 1.0,
+}
+
+
+def leer_excel(*args, **kwargs):
+    """
+    Envoltorio de pandas.read_excel que contabiliza las lecturas del proceso.
+
+    Acepta los mismos argumentos que pandas.read_excel.
+    """
+    global _lecturas_excel
+    import pandas as pd
+    _lecturas_excel += 1
+    return pd.read_excel(*args, **kwargs)
+
+
+def lecturas_excel():
+    """Número de lecturas de Excel realizadas por el proceso actual."""
+    return _lecturas_excel
+
+
+def pico_rss_mb():
+    """
+    Memoria residente máxima (peak RSS) del proceso en MB.
+
+    Returns
+    -------
+    float or None
+        None si la plataforma no permite obtenerla.
+    """
+    try:
+        import resource
+        rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Linux reporta KB; macOS reporta bytes
+        return rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024
+    except ImportError:
+        pass
+    try:
+        import psutil
+        info = psutil.Process().memory_info()
+        return getattr(info, "peak_wset", info.rss) / (1024 * 1024)
+    except ImportError:
+        return None
+
+
+class MedidorRendimiento:
+    """
+    Registro estructurado de tiempos por etapa y sub-paso del pipeline.
+
+    Cada medición guarda tiempo de reloj, tiempo de CPU, peak RSS y número de
+    lecturas de Excel. Los campos adicionales (p. ej. construcción vs. resolución
+    del modelo Pyomo) se agregan con registrar(). Si se entrega un registro de
+    eventos (utils.eventos), cada medición también se emite como evento.
+    """
+
+    def __init__(self, eventos=None):
+        self.registros = []
+        self.eventos = eventos
+
+    @contextlib.contextmanager
+    def medir(self, etapa, paso=None, **campos):
+        """
+        Mide el bloque como un registro de la etapa (paso=None) o de uno de sus sub-pasos.
+
+        El diccionario entregado por el context manager puede completarse dentro
+        del bloque con campos adicionales.
+        """
+        registro = {"etapa": etapa, "paso": paso, **campos}
+        lecturas_0 = lecturas_excel()
+        wall_0 = time.perf_counter()
+        cpu_0 = time.process_time()
+        try:
+            yield registro
+        finally:
+            registro["wall_s"] = time.perf_counter() - wall_0
+            registro["cpu_s"] = time.process_time() - cpu_0
+            registro["peak_rss_mb"] = pico_rss_mb()
+            registro["lecturas_excel"] = lecturas_excel() - lecturas_0
+            self.registros.append(registro)
+            if self.eventos is not None:
+                self.eventos.medicion(registro)
+
+    def registrar(self, etapa, paso=None, **campos):
+        """Agrega un registro sin medición de bloque (p. ej. tiempos del modelo Pyomo)."""
+        registro = {"etapa": etapa, "paso": paso, **campos}
+        self.registros.append(registro)
+        if self.eventos is not None:
+            self.eventos.medicion(registro)
+
+    def reporte(self):
+        """Devuelve los registros agrupados por etapa, con los sub-pasos anidados."""
+        etapas = {}
+        for registro in self.registros:
+            etapa = etapas.setdefault(registro["etapa"], {"pasos": {}})
+            campos = {k: v for k, v in registro.items() if k not in ("etapa", "paso")}
+            if registro["paso"] is None:
+                etapa.update(campos)
+            else:
+                etapa["pasos"].setdefault(registro["paso"], {}).update(campos)
+        return etapas
+
+    def exportar_json(self, ruta, extra=None):
+        """Escribe el reporte en formato JSON."""
+        contenido = {"etapas": self.reporte()}
+        if extra:
+            contenido.update(extra)
+        exportar_json(ruta, contenido)
+
+
+def medir(medidor, etapa, paso=None, **campos):
+    """Atajo para medir con un medidor opcional (sin medidor no hace nada)."""
+    if medidor is None:
+        return contextlib.nullcontext({})
+    return medidor.medir(etapa, paso, **campos)
+
+
+def exportar_json(ruta, contenido):
+    """Escribe un diccionario como JSON legible, creando la carpeta si no existe."""
+    carpeta = os.path.dirname(ruta)
+    if carpeta:
+        os.makedirs(carpeta, exist_ok=True)
+    with open(ruta, "w", encoding="utf-8") as f:
+        json.dump(contenido, f, ensure_ascii=False, indent=2, default=str)
+
+
+def medir_arranque(modulos=None, repeticiones=3):
+    """
+    Mide el tiempo de arranque en frío de cada módulo en un proceso Python nuevo.
+
+    Parameters
+    ----------
+    modulos : iterable of str, optional
+        Módulos a importar. Por defecto, los de PRESUPUESTO_ARRANQUE_S.
+    repeticiones : int
+        Se reporta el mínimo de las repeticiones (menos ruido del sistema).
+
+    Returns
+    -------
+    dict
+        modulo -> {"tiempo_s", "presupuesto_s", "cumple"}.
+    """
+    import subprocess
+
+    if modulos is None:
+        modulos = list(PRESUPUESTO_ARRANQUE_S)
+    raiz = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    resultados = {}
+    for modulo in modulos:
+        tiempos = []
+        for _ in range(repeticiones):
+            inicio = time.perf_counter()
+            subprocess.run([sys.executable, "-c", f"import {modulo}"], cwd=raiz, check=True)
+            tiempos.append(time.perf_counter() - inicio)
+        presupuesto = PRESUPUESTO_ARRANQUE_S.get(modulo)
+        resultados[modulo] = {
+            "tiempo_s": min(tiempos),
+            "presupuesto_s": presupuesto,
+            "cumple": presupuesto is None or min(tiempos) <= presupuesto,
+        }
+    return resultados
@@ -0,0 +1,266 @@
+# utils/pgen.py
+import json
+import os
+import re
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+
+from utils.referencia import leer_tabla
+
+# Archivos de generación: PGEN_<código>_<Nombre>.xlsx, con código = índice del cliente + 1 (2 dígitos)
+PATRON_PGEN = re.compile(r"^PGEN_(\d+)_.*\.xlsx$")
+
+# Rango del perfil en la hoja 'pv': filas 6 a 17 (índices 5:17), columnas C a Z (índices 2:26)
+FILAS_PV = slice(5, 17)
+COLUMNAS_PV = slice(2, 26)
+# La hoja 'temp' (temperatura a 2 m [°C]) tiene el mismo formato que 'pv'
+HOJA_TEMPERATURA = 'temp'
+
+# Matriz consolidada (ver construir_matriz_pgen)
+ARCHIVO_MATRIZ = "pgen.npy"
+ARCHIVO_INDICE = "pgen_indice.json"
+VERSION_MATRIZ = "1"
+
+# Instancias por proceso (ver get_almacen_pgen)
+_almacenes_pgen = {}
+
+
+class AlmacenPGEN:
+    """
+    Perfiles de generación PGEN indexados por código de cliente.
+
+    El directorio se recorre una sola vez para construir el índice código -> archivo,
+    y cada perfil 12x24 (meses x horas) de la hoja 'pv' se lee una sola vez por
+    proceso. Dimensionamiento, Optimizador y el Gestor consultan el mismo almacén.
+    Si se adjunta la matriz consolidada (adjuntar_matriz), los perfiles se sirven
+    desde ella sin abrir los Excel.
+
+    Parameters
+    ----------
+    directorio : str
+        Carpeta con los archivos PGEN_XX_*.xlsx.
+    almacen : AlmacenReferencia, optional
+        Si se entrega, la hoja 'pv' se lee desde su .npz en lugar del Excel.
+    """
+
+    def __init__(self, directorio, almacen=None):
+        self.directorio = directorio
+        self.almacen = almacen
+        self._indice = None
+        self._perfiles = {}  # (ruta, mtime_ns, tamaño) -> ndarray (12, 24) con los valores de la hoja
+        self._temperaturas = {}  # (ruta, mtime_ns, tamaño) -> ndarray float (12, 24) de la hoja 'temp'
+        self.matriz = None   # ndarray (n, 12, 24) mapeado en memoria (ver adjuntar_matriz)
+        self.filas = {}      # código -> fila de self.matriz
+
+    @staticmethod
+    def codigo(indice):
+        """Código de 2 dígitos del archivo para un índice de cliente (base 0)."""
+        return f"{int(indice) + 1:02d}"
+
+    def indice(self):
+        """Índice código -> nombre de archivo (se construye en la primera consulta)."""
+        if self._indice is None:
+            self._indice = {}
+            if os.path.isdir(self.directorio):
+                for archivo in sorted(os.listdir(self.directorio)):
+                    coincidencia = PATRON_PGEN.match(archivo)
+                    if coincidencia:
+                        self._indice.setdefault(coincidencia.group(1), archivo)
+        return self._indice
+
+    def ruta(self, indice):
+        """Ruta del archivo PGEN del cliente, o None si no existe."""
+        archivo = self.indice().get(self.codigo(indice))
+        return os.path.join(self.directorio, archivo) if archivo else None
+
+    def valores(self, indice):
+        """
+        Perfil de generación del cliente tal como viene en la hoja 'pv'.
+
+        Returns
+        -------
+        numpy.ndarray
+            Arreglo (12, 24) [Meses x Horas] de dtype object (copia).
+
+        Raises
+        ------
+        FileNotFoundError
+            Si no hay archivo PGEN para el cliente.
+        """
+        codigo = self.codigo(indice)
+        if codigo in self.filas:
+            return self.matriz[self.filas[codigo]].astype(object)
+        ruta = self.ruta(indice)
+        if ruta is None:
+            raise FileNotFoundError(
+                f"❌ No se encontró un archivo para el cliente con índice {codigo} en {self.directorio}")
+        stat = os.stat(ruta)
+        memo = (ruta, stat.st_mtime_ns, stat.st_size)
+        if memo not in self._perfiles:
+            self._perfiles[memo] = _leer_pv(ruta, self.almacen)
+        return self._perfiles[memo].copy()
+
+    def perfil(self, indice):
+        """Perfil de generación del cliente como arreglo float (12, 24) [Meses x Horas]."""
+        import numpy as np
+        codigo = self.codigo(indice)
+        if codigo in self.filas:
+            return np.array(self.matriz[self.filas[codigo]], dtype=float)
+        return np.array(self.valores(indice), dtype=float)
+
+    def temperaturas(self, indice):
+        """
+        Temperatura horaria del sitio del cliente (hoja 'temp'), arreglo float (12, 24) [°C].
+
+        Raises
+        ------
+        FileNotFoundError
+            Si no hay archivo PGEN para el cliente.
+        """
+        import numpy as np
+        ruta = self.ruta(indice)
+        if ruta is None:
+            raise FileNotFoundError(
+                f"❌ No se encontró un archivo para el cliente con índice {self.codigo(indice)} en {self.directorio}")
+        stat = os.stat(ruta)
+        memo = (ruta, stat.st_mtime_ns, stat.st_size)
+        if memo not in self._temperaturas:
+            self._temperaturas[memo] = np.array(_leer_pv(ruta, self.almacen, hoja=HOJA_TEMPERATURA), dtype=float)
+        return self._temperaturas[memo].copy()
+
+    def adjuntar_matriz(self, destino):
+        """
+        Mapea en memoria (sólo lectura) la matriz creada por construir_matriz_pgen.
+
+        Los clientes presentes en la matriz se sirven desde ella; el resto se sigue
+        leyendo de su archivo.
+        """
+        self.matriz, self.filas = cargar_matriz_pgen(destino)
+
+    def invalidar(self):
+        """Descarta el índice, los perfiles en memoria y la matriz adjunta."""
+        self._indice = None
+        self._perfiles.clear()
+        self._temperaturas.clear()
+        self.matriz = None
+        self.filas = {}
+
+
+def _leer_pv(ruta, almacen=None, hoja='pv'):
+    """Valores (12, 24) de la hoja 'pv' (u otra con el mismo formato) de un archivo PGEN (dtype object)."""
+    df_aux = leer_tabla(almacen, ruta, sheet_name=hoja, header=None)
+    return df_aux.iloc[FILAS_PV, COLUMNAS_PV].to_numpy(dtype=object)
+
+
+def construir_matriz_pgen(directorio, destino, almacen=None, max_workers=None, reconstruir=False):
+    """
+    Lee en paralelo todos los PGEN del directorio y los apila en una sola matriz.
+
+    Genera ``<destino>/pgen.npy`` (float64, forma (n_clientes, 12, 24), contigua) y
+    ``<destino>/pgen_indice.json`` con el índice código -> fila y la huella (mtime y
+    tamaño) de cada archivo. Si la matriz existente corresponde a los mismos archivos
+    no se vuelve a leer ningún Excel.
+
+    Parameters
+    ----------
+    directorio : str
+        Carpeta con los archivos PGEN_XX_*.xlsx.
+    destino : str
+        Carpeta de salida.
+    almacen : AlmacenReferencia, optional
+        Almacén de tablas para leer la hoja 'pv' desde su .npz.
+    max_workers : int, optional
+        Hilos de lectura (por defecto, el de ThreadPoolExecutor).
+    reconstruir : bool
+        Fuerza la lectura de todos los archivos.
+
+    Returns
+    -------
+    dict
+        Contenido del índice: {"codigos": {código: fila}, "archivos": {...}, "errores": {...}}.
+    """
+    import numpy as np
+
+    almacen_pgen = AlmacenPGEN(directorio)
+    archivos = {}
+    for codigo, archivo in almacen_pgen.indice().items():
+        stat = os.stat(os.path.join(directorio, archivo))
+        archivos[codigo] = {"archivo": archivo, "mtime_ns": stat.st_mtime_ns, "tamano": stat.st_size}
+
+    ruta_indice = os.path.join(destino, ARCHIVO_INDICE)
+    if not reconstruir and os.path.exists(ruta_indice) and os.path.exists(os.path.join(destino, ARCHIVO_MATRIZ)):
+        try:
+            with open(ruta_indice, encoding="utf-8") as f:
+                previo = json.load(f)
+            if previo.get("version") == VERSION_MATRIZ and previo.get("archivos") == archivos:
+                return previo
+        except (OSError, ValueError):
+            pass
+
+    codigos = sorted(archivos)
+    rutas = [os.path.join(directorio, archivos[c]["archivo"]) for c in codigos]
+    perfiles, errores = [], {}
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        futuros = [pool.submit(_leer_pv, ruta, almacen) for ruta in rutas]
+        for codigo, futuro in zip(codigos, futuros):
+            try:
+                perfiles.append((codigo, np.array(futuro.result(), dtype=float)))
+            except Exception as e:
+                # El cliente queda fuera de la matriz y se leerá (y fallará) desde su archivo
+                errores[codigo] = f"{type(e).__name__}: {e}"
+
+    matriz = np.zeros((len(perfiles), 12, 24), dtype=float)
+    for fila, (_, perfil) in enumerate(perfiles):
+        matriz[fila] = perfil
+    indice = {
+        "version": VERSION_MATRIZ,
+        "directorio": os.path.abspath(directorio),
+        "codigos": {codigo: fila for fila, (codigo, _) in enumerate(perfiles)},
+        "archivos": archivos,
+        "errores": errores,
+    }
+
+    os.makedirs(destino, exist_ok=True)
+    _reemplazar(os.path.join(destino, ARCHIVO_MATRIZ), lambda f: np.save(f, matriz))
+    _reemplazar(ruta_indice, lambda f: f.write(json.dumps(indice, ensure_ascii=False, indent=2).encode("utf-8")))
+    return indice
+
+
+def cargar_matriz_pgen(destino):
+    """
+    Abre la matriz consolidada en modo memmap (sin copiar datos entre procesos).
+
+    Returns
+    -------
+    tuple
+        (ndarray (n, 12, 24) de sólo lectura, dict código -> fila).
+    """
+    import numpy as np
+
+    with open(os.path.join(destino, ARCHIVO_INDICE), encoding="utf-8") as f:
+        indice = json.load(f)
+    filas = indice["codigos"]
+    if not filas:
+        return np.zeros((0, 12, 24), dtype=float), {}
+    return np.load(os.path.join(destino, ARCHIVO_MATRIZ), mmap_mode="r"), filas
+
+
+def _reemplazar(ruta, escribir):
+    """Escritura atómica: escribe en un temporal y lo renombra."""
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(ruta) or ".", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            escribir(f)
+        os.replace(tmp, ruta)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
+
+def get_almacen_pgen(directorio, almacen=None):
+    """Devuelve el almacén PGEN compartido del proceso para ese directorio."""
+    clave = (os.path.abspath(directorio), id(almacen) if almacen is not None else None)
+    if clave not in _almacenes_pgen:
+        _almacenes_pgen[clave] = AlmacenPGEN(directorio, almacen=almacen)
+    return _almacenes_pgen[clave]
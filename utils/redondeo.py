@@ -0,0 +1,40 @@
+# utils/redondeo.py
+
+
+def redondear(valores, decimales=0):
+    """
+    Redondeo vectorizado con el mismo resultado que round(x, decimales) de Python.
+
+    numpy.round escala por 10**decimales antes de redondear y ese producto puede
+    desplazar un valor muy cercano al punto medio hacia el lado equivocado. Esos
+    casos (poco frecuentes) se recalculan elemento a elemento con round().
+
+    Parameters
+    ----------
+    valores : array_like
+        Valores a redondear.
+    decimales : int
+        Número de decimales.
+
+    Returns
+    -------
+    numpy.ndarray
+        Arreglo float con los valores redondeados.
+    """
+    import numpy as np
+
+    valores = np.asarray(valores, dtype=float)
+    resultado = np.round(valores, decimales)
+    escalado = valores * 10.0 ** decimales
+    # Casos dudosos: parte fraccionaria a pocos ulp de 0.5, o magnitudes donde el escalado
+    # ya no es exacto. Se resuelven con round() (los no finitos se dejan como están).
+    fraccion = np.abs(escalado - np.floor(escalado))
+    umbral = np.maximum(1e-9, 4 * np.spacing(np.abs(escalado)))
+    dudosos = (np.abs(fraccion - 0.5) <= umbral) | (np.abs(escalado) >= 2.0 ** 52)
+    dudosos &= np.isfinite(escalado)
+    if dudosos.any():
+        resultado = np.array(resultado, copy=True)
+        plano = resultado.reshape(-1)
+        for i in np.flatnonzero(dudosos):
+            plano[i] = round(float(valores.flat[i]), decimales)
+    return resultado
@@ -0,0 +1,163 @@
+# utils/referencia.py
+import hashlib
+import json
+import os
+import tempfile
+
+from utils.perf import leer_excel
+
+# Incrementar si cambia el formato de los archivos .npz
+VERSION_REFERENCIA = "2"
+
+# Instancias por proceso (ver get_almacen)
+_almacenes = {}
+
+
+class AlmacenReferencia:
+    """
+    Almacén de tablas de referencia (Perfil_Base, Perfil_Extra, PConsumoZone, BBDD_Equipos...).
+
+    Cada combinación (archivo, hoja, opciones de lectura) se lee del Excel una sola vez
+    y se convierte a un .npz con una columna por arreglo. Las lecturas siguientes cargan
+    el .npz (sin openpyxl). El .npz guarda mtime, tamaño y hash SHA-256 del Excel de
+    origen: si el mtime o el tamaño cambian se recalcula el hash y, sólo si el contenido
+    cambió, se vuelve a convertir. Además mantiene una capa en memoria por proceso.
+
+    Parameters
+    ----------
+    directorio : str
+        Carpeta donde se guardan los .npz.
+    activo : bool
+        Si es False, siempre se lee el Excel (sin memoria ni disco).
+    """
+
+    def __init__(self, directorio=".cache/referencia", activo=True):
+        self.directorio = directorio
+        self.activo = activo
+        self._memoria = {}  # (ruta, opciones, mtime_ns, tamaño) -> DataFrame
+
+    def leer_tabla(self, ruta, **opciones):
+        """
+        Devuelve la tabla como DataFrame (copia, puede modificarse libremente).
+
+        Parameters
+        ----------
+        ruta : str
+            Archivo Excel de origen.
+        **opciones
+            Argumentos de lectura para pandas.read_excel (sheet_name, nrows, header...).
+        """
+        if not self.activo:
+            return leer_excel(ruta, **opciones)
+
+        stat = os.stat(ruta)
+        opciones_txt = json.dumps(opciones, sort_keys=True, default=str)
+        memo = (os.path.abspath(ruta), opciones_txt, stat.st_mtime_ns, stat.st_size)
+        if memo not in self._memoria:
+            self._memoria[memo] = self._cargar(ruta, opciones, opciones_txt, stat)
+        return self._memoria[memo].copy()
+
+    def leer_arreglo(self, ruta, **opciones):
+        """Igual que leer_tabla, pero devuelve los valores como ndarray."""
+        return self.leer_tabla(ruta, **opciones).to_numpy()
+
+    def _ruta_npz(self, ruta, opciones_txt):
+        nombre = hashlib.sha256(f"{os.path.abspath(ruta)}|{opciones_txt}".encode("utf-8")).hexdigest()
+        return os.path.join(self.directorio, f"{nombre}.npz")
+
+    def _cargar(self, ruta, opciones, opciones_txt, stat):
+        ruta_npz = self._ruta_npz(ruta, opciones_txt)
+        meta, df = _leer_npz(ruta_npz)
+        if meta is not None:
+            fuente = meta["fuente"]
+            if (fuente["mtime_ns"], fuente["tamano"]) == (stat.st_mtime_ns, stat.st_size):
+                return df
+            if fuente["sha256"] == _sha256(ruta):
+                # Sólo cambió el mtime (copia, checkout...): se actualiza la huella
+                _escribir_npz(ruta_npz, df, _fuente(ruta, stat, fuente["sha256"]))
+                return df
+
+        df = leer_excel(ruta, **opciones)
+        _escribir_npz(ruta_npz, df, _fuente(ruta, stat, _sha256(ruta)))
+        return df
+
+
+def get_almacen(directorio=".cache/referencia", activo=True):
+    """Devuelve el almacén compartido del proceso para ese directorio (lo crea si no existe)."""
+    clave = (os.path.abspath(directorio), activo)
+    if clave not in _almacenes:
+        _almacenes[clave] = AlmacenReferencia(directorio, activo=activo)
+    return _almacenes[clave]
+
+
+def leer_tabla(almacen, ruta, **opciones):
+    """Atajo para leer con un almacén opcional (sin almacén se lee el Excel directamente)."""
+    if almacen is None:
+        return leer_excel(ruta, **opciones)
+    return almacen.leer_tabla(ruta, **opciones)
+
+
+def _sha256(ruta):
+    h = hashlib.sha256()
+    with open(ruta, "rb") as f:
+        for bloque in iter(lambda: f.read(1 << 20), b""):
+            h.update(bloque)
+    return h.hexdigest()
+
+
+def _fuente(ruta, stat, sha256):
+    return {"ruta": os.path.abspath(ruta), "mtime_ns": stat.st_mtime_ns,
+            "tamano": stat.st_size, "sha256": sha256}
+
+
+def _etiqueta(columna):
+    """Nombre de columna serializable en JSON (conserva enteros, p. ej. con header=None)."""
+    if hasattr(columna, "item"):
+        columna = columna.item()
+    return columna if isinstance(columna, (str, int, float)) else str(columna)
+
+
+def _escribir_npz(ruta_npz, df, fuente):
+    """Guarda un DataFrame columna a columna en un .npz (escritura atómica)."""
+    import numpy as np
+
+    meta = {
+        "version": VERSION_REFERENCIA,
+        "fuente": fuente,
+        "columnas": [_etiqueta(c) for c in df.columns],
+        "dtypes": [str(dt) for dt in df.dtypes],
+        "n_filas": len(df),
+    }
+    arreglos = {f"c{i}": df.iloc[:, i].to_numpy(dtype=object if dt.kind not in "biufM" else None)
+                for i, dt in enumerate(df.dtypes)}
+    os.makedirs(os.path.dirname(ruta_npz) or ".", exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(ruta_npz) or ".", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            np.savez(f, __meta__=np.array(json.dumps(meta)), **arreglos)
+        os.replace(tmp, ruta_npz)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
+
+def _leer_npz(ruta_npz):
+    """Devuelve (meta, DataFrame) o (None, None) si no existe o es de otra versión."""
+    import numpy as np
+    import pandas as pd
+
+    if not os.path.exists(ruta_npz):
+        return None, None
+    try:
+        with np.load(ruta_npz, allow_pickle=True) as datos:
+            meta = json.loads(str(datos["__meta__"]))
+            if meta.get("version") != VERSION_REFERENCIA:
+                return None, None
+            columnas = {i: pd.Series(datos[f"c{i}"]).astype(dtype) for i, dtype in enumerate(meta["dtypes"])}
+        df = pd.DataFrame(columnas, index=pd.RangeIndex(meta["n_filas"]))
+        df.columns = pd.Index(meta["columnas"])
+        return meta, df
+    except Exception:
+        # Archivo corrupto o incompatible: se vuelve a convertir
+        return None, None
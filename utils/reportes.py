@@ -0,0 +1,117 @@
+# utils/reportes.py
+import os
+
+# Niveles de verbosidad de los reportes
+SILENCIO = 0   # No se genera ningún texto
+RESUMEN = 1    # Tablas cortas (12 meses, resultados de selección)
+DETALLE = 2    # Además DataFrames completos, perfiles horarios y catálogos de equipos
+
+
+class Reporte:
+    """
+    Bloque de salida diferido (tabla o DataFrame de una etapa).
+
+    El texto se genera sólo cuando se renderiza, llamando a `generar`. La función
+    debe capturar los valores que muestra (p. ej. como argumentos por defecto de la
+    lambda) si esos objetos pueden cambiar después.
+    """
+
+    __slots__ = ("etapa", "titulo", "nivel", "_generar", "_texto")
+
+    def __init__(self, etapa, titulo, generar, nivel=DETALLE):
+        self.etapa = etapa
+        self.titulo = titulo
+        self.nivel = nivel
+        self._generar = generar
+        self._texto = None
+
+    def texto(self):
+        if self._texto is None:
+            self._texto = str(self._generar())
+        return self._texto
+
+    def __str__(self):
+        return self.texto()
+
+    def __getstate__(self):
+        # La función generadora puede no ser serializable: se guarda el texto ya renderizado
+        return {"etapa": self.etapa, "titulo": self.titulo, "nivel": self.nivel, "_texto": self.texto()}
+
+    def __setstate__(self, estado):
+        for atributo, valor in estado.items():
+            setattr(self, atributo, valor)
+        self._generar = None
+
+
+class Reportes:
+    """
+    Colección de reportes de un cliente, con la verbosidad de la ejecución.
+
+    Un reporte se imprime al agregarlo si su nivel es <= verbosidad. Con guardar=True
+    se conserva para exportarlo después (exportar), aunque no se haya impreso. Si no
+    se imprime ni se guarda, la función que genera su texto nunca se llama.
+
+    Parameters
+    ----------
+    verbosidad : int
+        SILENCIO, RESUMEN o DETALLE.
+    guardar : bool
+        Conserva los reportes para exportarlos.
+    """
+
+    def __init__(self, verbosidad=DETALLE, guardar=False):
+        self.verbosidad = verbosidad
+        self.guardar = guardar
+        self.reportes = []
+
+    def __getstate__(self):
+        # Las etapas guardan una referencia a sus reportes: al serializarlas (caché de
+        # etapas, resultados del modo lote) no se arrastran los reportes del cliente
+        return {"verbosidad": self.verbosidad, "guardar": self.guardar, "reportes": []}
+
+    def activo(self, nivel=DETALLE):
+        """Indica si un reporte de ese nivel se imprimiría o guardaría."""
+        return self.guardar or nivel <= self.verbosidad
+
+    def agregar(self, etapa, titulo, generar, nivel=DETALLE):
+        """
+        Registra un reporte.
+
+        Parameters
+        ----------
+        etapa : str
+            Etapa que lo genera ('Cliente', 'Sizing'...).
+        titulo : str
+            Encabezado del reporte (se imprime antes del texto).
+        generar : callable
+            Función sin argumentos que devuelve el texto (o un objeto imprimible, p. ej. un DataFrame).
+        nivel : int
+            RESUMEN o DETALLE.
+        """
+        if not self.activo(nivel):
+            return None
+        reporte = Reporte(etapa, titulo, generar, nivel)
+        if self.guardar:
+            self.reportes.append(reporte)
+        if nivel <= self.verbosidad:
+            if titulo:
+                print(titulo)
+            print(reporte.texto())
+        return reporte
+
+    def exportar(self, ruta):
+        """Escribe todos los reportes guardados en un archivo de texto."""
+        carpeta = os.path.dirname(ruta)
+        if carpeta:
+            os.makedirs(carpeta, exist_ok=True)
+        with open(ruta, "w", encoding="utf-8") as f:
+            for reporte in self.reportes:
+                f.write(f"## [{reporte.etapa}] {reporte.titulo.strip()}\n")
+                f.write(reporte.texto() + "\n\n")
+
+
+def tabla(filas, encabezado=None):
+    """Une las líneas de una tabla ya formateadas (con encabezado opcional)."""
+    lineas = list(encabezado or [])
+    lineas.extend(filas)
+    return "\n".join(lineas)
@@ -0,0 +1,259 @@
+# utils/seleccion.py
+import re
+
+# Columnas de la encuesta (ya renombradas) que se indexan para selección y filtros
+COLUMNAS_INDICE = (
+    'Nombre',
+    'Correo electrónico:',
+    'Tipo de solución',
+    'Zona',
+    'Tipo Zona',
+    'Tamaño casa',
+    'N° habitaciones',
+    'N° baños',
+    'Número de personas que viven en la casa:',
+    'Teletrabajo',
+    'Calefacción',
+    'N° habitaciones con calefaccion',
+    'Desea calefacción',
+    'N° habitaciones que quiere calefaccionar',
+)
+
+# Elementos de una expresión de filtro: paréntesis, textos entre comillas, operadores, números y palabras
+_TOKEN = re.compile(r"""
+    \s*(?:
+        (?P<par>[()])
+      | (?P<texto>'(?:[^'\\]|\\.)*'|"(?:[^"\\]|\\.)*")
+      | (?P<op>==|!=|<=|>=|<|>)
+      | (?P<numero>-?\d+(?:\.\d+)?)(?=[\s()=!<>]|$)
+      | (?P<palabra>[^\s()=!<>'"]+)
+    )""", re.VERBOSE)
+
+
+class IndiceEncuesta:
+    """
+    Índices de la encuesta para seleccionar clientes sin recorrerla completa.
+
+    Se construye una sola vez al cargar la encuesta (agregar recibe los bloques ya
+    normalizados de Preprocess) y guarda, para cada columna indexada, un índice
+    valor -> posiciones y los valores numéricos en un arreglo. Las consultas por ID,
+    nombre, rango o expresión de filtro se resuelven con esos índices.
+
+    Parameters
+    ----------
+    columnas : iterable of str
+        Columnas a indexar (las que no estén en la encuesta se ignoran).
+    """
+
+    def __init__(self, columnas=COLUMNAS_INDICE):
+        self.columnas = tuple(columnas)
+        self.n_filas = 0
+        self._hash = {}      # columna -> {valor normalizado: [posiciones]}
+        self._valores = {}   # columna -> lista de valores (para comparaciones numéricas)
+        self._numericos = {}  # columna -> ndarray float (NaN si no es número), se arma al consultar
+
+    def agregar(self, df):
+        """Indexa un bloque de la encuesta (su índice es la posición base 0 de cada fila)."""
+        for columna in self.columnas:
+            if columna not in df.columns:
+                continue
+            hash_columna = self._hash.setdefault(columna, {})
+            valores = self._valores.setdefault(columna, [None] * self.n_filas)
+            for posicion, valor in zip(df.index, df[columna].tolist()):
+                valores.append(valor)
+                clave = _normalizar(valor)
+                if clave is not None:
+                    hash_columna.setdefault(clave, []).append(int(posicion))
+            self._numericos.pop(columna, None)
+        self.n_filas += len(df)
+        for columna, valores in self._valores.items():
+            valores.extend([None] * (self.n_filas - len(valores)))
+        return self
+
+    @staticmethod
+    def por_ids(texto):
+        """
+        Posiciones (base 0) a partir de IDs con la numeración del menú: '1,3,5-8'.
+
+        Los IDs fuera de rango se conservan para que el lote los informe como error.
+        """
+        indices = []
+        for parte in texto.split(","):
+            parte = parte.strip()
+            if not parte:
+                continue
+            if "-" in parte:
+                desde, hasta = parte.split("-", 1)
+                indices.extend(range(int(desde) - 1, int(hasta)))
+            else:
+                indices.append(int(parte) - 1)
+        return indices
+
+    def por_nombre(self, nombre):
+        """Posiciones de los clientes con ese nombre (sin distinguir mayúsculas ni espacios extremos)."""
+        buscado = str(nombre).strip().casefold()
+        posiciones = []
+        for clave, filas in self._hash.get('Nombre', {}).items():
+            if isinstance(clave, str) and clave.casefold() == buscado:
+                posiciones.extend(filas)
+        return sorted(posiciones)
+
+    def filtrar(self, expresion):
+        """
+        Posiciones que cumplen una expresión de filtro.
+
+        La expresión combina comparaciones ``columna OP valor`` con and/or y paréntesis
+        (and tiene precedencia sobre or). OP es ==, !=, <, <=, > o >=; el valor es un
+        texto entre comillas o un número. Ejemplo::
+
+            Zona == 'Los Lagos' and Tipo de solución == 'OffGrid'
+
+        Raises
+        ------
+        ValueError
+            Si la expresión no es válida o usa una columna no indexada.
+        """
+        import numpy as np
+
+        mascara = _Parser(self, _tokenizar(expresion)).evaluar()
+        return np.flatnonzero(mascara).tolist()
+
+    def seleccionar(self, ids=None, nombres=None, filtro=None):
+        """
+        Combina selectores: unión de IDs y nombres, restringida por el filtro.
+
+        Sin IDs ni nombres, el filtro se aplica a toda la encuesta. Sin ningún
+        selector devuelve None (todas las filas).
+        """
+        if ids is None and not nombres and filtro is None:
+            return None
+        seleccion = None
+        if ids is not None or nombres:
+            seleccion = set(self.por_ids(ids) if ids is not None else [])
+            for nombre in nombres or ():
+                seleccion.update(self.por_nombre(nombre))
+        if filtro is not None:
+            filtradas = set(self.filtrar(filtro))
+            seleccion = filtradas if seleccion is None else seleccion & filtradas
+        return sorted(seleccion)
+
+    def _igual(self, columna, valor):
+        import numpy as np
+
+        mascara = np.zeros(self.n_filas, dtype=bool)
+        mascara[self._hash[columna].get(_normalizar(valor), [])] = True
+        return mascara
+
+    def _numerico(self, columna):
+        import pandas as pd
+
+        if columna not in self._numericos:
+            serie = pd.Series(self._valores[columna], dtype=object)
+            self._numericos[columna] = pd.to_numeric(serie, errors="coerce").to_numpy(dtype=float)
+        return self._numericos[columna]
+
+    def comparar(self, columna, operador, valor):
+        """Máscara booleana (n_filas,) de una comparación sobre una columna indexada."""
+        if columna not in self._hash:
+            raise ValueError(f"❌ Columna no indexada: '{columna}'. Disponibles: {', '.join(self._hash)}")
+        if operador == "==":
+            return self._igual(columna, valor)
+        if operador == "!=":
+            return ~self._igual(columna, valor)
+        if isinstance(valor, str):
+            raise ValueError(f"❌ El operador {operador} sólo admite números ('{columna}' {operador} '{valor}')")
+        numeros = self._numerico(columna)  # NaN (vacíos, textos) nunca cumple la comparación
+        return {"<": numeros < valor, "<=": numeros <= valor,
+                ">": numeros > valor, ">=": numeros >= valor}[operador]
+
+
+def _normalizar(valor):
+    """Clave de índice: textos sin espacios extremos; vacíos y NaN no se indexan."""
+    if valor is None:
+        return None
+    if isinstance(valor, str):
+        valor = valor.strip()
+        return valor or None
+    if isinstance(valor, float) and valor != valor:
+        return None
+    if hasattr(valor, "item"):
+        valor = valor.item()
+    return valor
+
+
+def _tokenizar(expresion):
+    tokens, posicion = [], 0
+    expresion = expresion.strip()
+    while posicion < len(expresion):
+        coincidencia = _TOKEN.match(expresion, posicion)
+        if coincidencia is None or coincidencia.end() == posicion:
+            raise ValueError(f"❌ Expresión de filtro no válida cerca de: {expresion[posicion:]!r}")
+        tipo = coincidencia.lastgroup
+        valor = coincidencia.group(tipo)
+        if tipo == "texto":
+            valor = re.sub(r"\\(.)", r"\1", valor[1:-1])
+        elif tipo == "numero":
+            valor = float(valor) if "." in valor else int(valor)
+        elif tipo == "palabra" and valor.lower() in ("and", "or"):
+            tipo, valor = valor.lower(), valor.lower()
+        tokens.append((tipo, valor))
+        posicion = coincidencia.end()
+    return tokens
+
+
+class _Parser:
+    """Descenso recursivo: expr := conj (or conj)* ; conj := atomo (and atomo)* ; atomo := (expr) | columna OP valor."""
+
+    def __init__(self, indice, tokens):
+        self.indice = indice
+        self.tokens = tokens
+        self.pos = 0
+
+    def _actual(self):
+        return self.tokens[self.pos] if self.pos < len(self.tokens) else (None, None)
+
+    def evaluar(self):
+        if not self.tokens:
+            raise ValueError("❌ Expresión de filtro vacía")
+        mascara = self._expr()
+        if self.pos != len(self.tokens):
+            raise ValueError(f"❌ Expresión de filtro no válida: sobra {self._actual()[1]!r}")
+        return mascara
+
+    def _expr(self):
+        mascara = self._conj()
+        while self._actual()[0] == "or":
+            self.pos += 1
+            mascara = mascara | self._conj()
+        return mascara
+
+    def _conj(self):
+        mascara = self._atomo()
+        while self._actual()[0] == "and":
+            self.pos += 1
+            mascara = mascara & self._atomo()
+        return mascara
+
+    def _atomo(self):
+        tipo, valor = self._actual()
+        if tipo == "par" and valor == "(":
+            self.pos += 1
+            mascara = self._expr()
+            if self._actual() != ("par", ")"):
+                raise ValueError("❌ Expresión de filtro no válida: falta ')'")
+            self.pos += 1
+            return mascara
+        # Nombre de columna: palabras (y números) hasta el operador, p. ej. 'Tipo de solución'
+        palabras = []
+        while self._actual()[0] in ("palabra", "numero"):
+            palabras.append(str(self._actual()[1]))
+            self.pos += 1
+        tipo_op, operador = self._actual()
+        if not palabras or tipo_op != "op":
+            raise ValueError("❌ Expresión de filtro no válida: se esperaba 'columna OP valor'")
+        self.pos += 1
+        tipo_valor, literal = self._actual()
+        if tipo_valor not in ("texto", "numero"):
+            raise ValueError(f"❌ Se esperaba un texto entre comillas o un número después de {operador}")
+        self.pos += 1
+        return self.indice.comparar(" ".join(palabras), operador, literal)